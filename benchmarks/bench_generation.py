@@ -0,0 +1,268 @@
+"""
+题目生成的基准测试
+
+按难度 × 数值范围 × 运算符组合的矩阵测量QuestionGenerator的性能，每种配置记录：
+1. 工厂的构建耗时，以及包含预计算表构建的第一道题的耗时
+2. 逐题生成（generate_question）和批量生成（generate_batch）的每秒题目数，
+   取--repeat次计时中最快的一次，以减少噪声
+3. 生成过程中的内存峰值（tracemalloc，单独测量，不影响计时）
+4. 重试率：每道题平均的重试次数，来自工厂的性能统计
+5. 批量生成中退回逐题生成的比例
+
+结果以JSON写入--output指定的文件；指定--baseline时与之前保存的结果逐项比较，
+每秒题目数下降或内存峰值上升超过--tolerance的配置视为退步，以非零状态退出。
+每次运行前后各测量一段固定的纯Python计算作为校准，比较时每秒题目数按
+两次运行的校准耗时之比换算，减少机器负载不同带来的误报。
+
+运行方式：
+    python -m benchmarks.bench_generation --output bench.json
+    python -m benchmarks.bench_generation --baseline bench.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from src.factories.concrete_factories import HAS_NUMPY, QuestionGenerator
+from src.models.question import DifficultyLevel, OperatorType
+
+# 数值范围，最后一个超过默认的惰性阈值
+NUMBER_RANGES: List[Tuple[int, int]] = [
+    (1, 20),
+    (1, 100),
+    (-1000, 1000),
+    (1, 10**5),
+    (-(10**8), 10**8),
+]
+
+# 运算符组合
+OPERATOR_SETS: List[Tuple[OperatorType, ...]] = [
+    (OperatorType.ADDITION, OperatorType.SUBTRACTION),
+    (OperatorType.MULTIPLICATION, OperatorType.DIVISION),
+    tuple(OperatorType),
+]
+
+# 与基线比较的指标及其方向：1表示越大越好，-1表示越小越好
+COMPARED_METRICS = {
+    "single_qps": 1,
+    "batch_qps": 1,
+    "peak_memory_kb": -1,
+}
+
+
+def calibrate(repeat: int = 5) -> float:
+    """测量一段固定的纯Python计算的耗时（秒），用于换算不同机器或负载下的结果"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total = 0
+        for i in range(200_000):
+            total += i * i % 7
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def config_name(
+    difficulty: DifficultyLevel,
+    number_range: Tuple[int, int],
+    operators: Tuple[OperatorType, ...],
+) -> str:
+    """配置的名称，用作结果中的键"""
+    symbols = "".join(op.value for op in operators)
+    return f"{difficulty.name} [{number_range[0]}, {number_range[1]}] {symbols}"
+
+
+def run_config(
+    difficulty: DifficultyLevel,
+    number_range: Tuple[int, int],
+    operators: Tuple[OperatorType, ...],
+    questions: int,
+    seed: int,
+    repeat: int = 3,
+) -> Dict[str, float]:
+    """测量一种配置的各项指标，生成速度取repeat次中最快的一次
+
+    Raises:
+        ValueError: 当前配置无法生成任何题目
+    """
+    start = time.perf_counter()
+    generator = QuestionGenerator(difficulty, number_range, list(operators), seed=seed)
+    construct_s = time.perf_counter() - start
+
+    # 第一道题会构建合数表、别名表等预计算表，单独计时
+    start = time.perf_counter()
+    generator.generate_question()
+    first_question_s = time.perf_counter() - start
+    # 预热批量生成内核，之后的计时只反映稳定状态
+    generator.generate_batch(min(questions, 50))
+
+    # 逐题生成，同时统计重试次数
+    factory = generator.factory
+    stats = factory.enable_instrumentation()
+    single_s = batch_s = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(questions):
+            generator.generate_question()
+        single_s = min(single_s, time.perf_counter() - start)
+    counters = stats.snapshot()["counters"]
+    retries = sum(
+        amount for name, amount in counters.items() if name.startswith("retries.")
+    )
+
+    # 批量生成
+    stats.reset()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generator.generate_batch(questions)
+        batch_s = min(batch_s, time.perf_counter() - start)
+    fallback = stats.snapshot()["counters"].get("failures.batch", 0)
+    factory.disable_instrumentation()
+
+    # 内存峰值：重新构建工厂，包括预计算表的构建
+    tracemalloc.start()
+    try:
+        generator = QuestionGenerator(
+            difficulty, number_range, list(operators), seed=seed
+        )
+        generator.generate_batch(questions)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "construct_ms": construct_s * 1e3,
+        "first_question_ms": first_question_s * 1e3,
+        "single_qps": questions / single_s,
+        "batch_qps": questions / batch_s,
+        "peak_memory_kb": peak / 1024,
+        "retry_rate": retries / (questions * repeat),
+        "batch_fallback_rate": fallback / (questions * repeat),
+    }
+
+
+def run_matrix(questions: int, seed: int, repeat: int) -> Dict[str, dict]:
+    """测量全部配置，无法生成题目的配置记为skipped"""
+    results = {}
+    for difficulty, number_range, operators in itertools.product(
+        DifficultyLevel, NUMBER_RANGES, OPERATOR_SETS
+    ):
+        name = config_name(difficulty, number_range, operators)
+        try:
+            result = run_config(
+                difficulty, number_range, operators, questions, seed, repeat
+            )
+        except ValueError as e:
+            result = {"skipped": str(e)}
+            print(f"{name:40} 跳过：{e}")
+        else:
+            print(
+                f"{name:40} 构建 {result['construct_ms']:7.2f}ms"
+                f"  首题 {result['first_question_ms']:8.2f}ms"
+                f"  逐题 {result['single_qps']:9.0f}/s"
+                f"  批量 {result['batch_qps']:9.0f}/s"
+                f"  峰值 {result['peak_memory_kb']:9.0f}KB"
+                f"  重试率 {result['retry_rate']:.3f}"
+            )
+        results[name] = result
+    return results
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    tolerance: float,
+    speed_ratio: float = 1.0,
+) -> List[str]:
+    """与基线逐项比较，返回退步的描述
+
+    Args:
+        results: 本次的结果
+        baseline: 基线的结果
+        tolerance: 允许的相对退步幅度
+        speed_ratio: 本次与基线的校准耗时之比，每秒题目数按它换算后再比较
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or "skipped" in result or "skipped" in base:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            if metric.endswith("_qps"):
+                new *= speed_ratio
+            change = (new - old) / old * direction
+            if change < -tolerance:
+                regressions.append(
+                    f"{name} {metric}: {old:.1f} -> {new:.1f} ({change:+.1%})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="题目生成的基准测试")
+    parser.add_argument("--questions", type=int, default=500, help="每种配置的题目数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="计时的重复次数，取最快的一次"
+    )
+    parser.add_argument("--output", help="结果的JSON文件")
+    parser.add_argument("--baseline", help="作为基线的JSON文件，由--output生成")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="允许的相对退步幅度，默认0.2即20%%",
+    )
+    args = parser.parse_args(argv)
+
+    # 前后各校准一次，取平均，抵消运行过程中机器负载的变化
+    calibration = calibrate()
+    results = run_matrix(args.questions, args.seed, args.repeat)
+    calibration = (calibration + calibrate()) / 2
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": HAS_NUMPY,
+            "questions": args.questions,
+            "repeat": args.repeat,
+            "calibration_s": calibration,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        # 基线中没有校准数据时不做换算
+        base_calibration = baseline["meta"].get("calibration_s", calibration)
+        speed_ratio = calibration / base_calibration
+        print(f"\n本次与基线的校准耗时之比：{speed_ratio:.2f}")
+        regressions = compare(
+            results, baseline["results"], args.tolerance, speed_ratio
+        )
+        if regressions:
+            print(f"\n与基线相比有{len(regressions)}项退步：")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n与基线相比没有退步")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+题目长度的伸缩性基准
+
+按不同的操作数个数生成题目，测量每道题的耗时，并用对数坐标下的最小二乘
+拟合耗时随操作数个数增长的幂次。生成过程是线性的，幂次应接近1；
+超过--max-exponent时以非零状态退出，便于在持续集成中检查。
+
+运行方式：
+    python -m benchmarks.bench_scaling
+    python -m benchmarks.bench_scaling --counts 2 5 10 20 30 --questions 2000
+"""
+
+import argparse
+import math
+import sys
+import time
+from typing import List, Tuple
+
+from src.factories.concrete_factories import QuestionGenerator
+from src.models.question import DifficultyLevel, OperatorType
+
+
+def measure(
+    operand_count: int,
+    number_range: Tuple[int, int],
+    questions: int,
+    batch: bool,
+    seed: int,
+) -> float:
+    """测量生成一道operand_count个操作数的题目的平均耗时（秒）"""
+    generator = QuestionGenerator(
+        DifficultyLevel.HARD,
+        number_range,
+        list(OperatorType),
+        seed=seed,
+        operand_count=operand_count,
+    )
+    # 预热：构建合数表、别名表等预计算表，填充可行性缓存
+    generator.generate_batch(min(questions, 200))
+
+    start = time.perf_counter()
+    if batch:
+        generator.generate_batch(questions)
+    else:
+        for _ in range(questions):
+            generator.generate_question()
+    return (time.perf_counter() - start) / questions
+
+
+def scaling_exponent(counts: List[int], timings: List[float]) -> float:
+    """对log(耗时) = a * log(运算次数) + b做最小二乘拟合，返回a"""
+    xs = [math.log(count - 1) for count in counts]
+    ys = [math.log(timing) for timing in timings]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="题目长度的伸缩性基准")
+    parser.add_argument(
+        "--counts",
+        type=int,
+        nargs="+",
+        default=[2, 4, 8, 16, 30],
+        help="要测量的操作数个数",
+    )
+    parser.add_argument("--questions", type=int, default=1000, help="每组的题目数量")
+    parser.add_argument(
+        "--range", type=int, nargs=2, default=[-1000, 1000], help="数值范围"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument(
+        "--max-exponent",
+        type=float,
+        default=1.3,
+        help="允许的最大幂次，超过时以非零状态退出",
+    )
+    args = parser.parse_args(argv)
+
+    counts = sorted(set(args.counts))
+    if len(counts) < 2 or counts[0] < 2:
+        parser.error("至少需要两个不小于2的操作数个数")
+
+    failed = False
+    for batch in (False, True):
+        mode = "generate_batch" if batch else "generate_question"
+        timings = []
+        print(f"{mode}：")
+        for count in counts:
+            timing = measure(count, tuple(args.range), args.questions, batch, args.seed)
+            timings.append(timing)
+            print(
+                f"  {count:>4}个操作数  {timing * 1e6:10.1f}us/题"
+                f"  {timing * 1e6 / (count - 1):8.2f}us/运算"
+            )
+        exponent = scaling_exponent(counts, timings)
+        print(f"  耗时 ∝ 运算次数^{exponent:.2f}")
+        failed = failed or exponent > args.max_exponent
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
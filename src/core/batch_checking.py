@@ -0,0 +1,46 @@
+"""
+批量判题模块
+
+本模块为练习提供向量化的批量判题，主要功能：
+1. 按题目索引从正确答案数组中一次取出整批的正确答案
+2. 以与Question.check_answer相同的误差逐元素比较，得到正确与否的掩码
+
+核心函数：
+- check_answers：批量判题
+
+本模块依赖NumPy，未安装时Exercise退回逐题比较。
+"""
+
+from array import array
+from typing import Sequence
+
+import numpy as np
+
+from ..models.question import ANSWER_TOLERANCE
+
+
+def check_answers(
+    correct_answers: array,
+    question_indices: Sequence[int],
+    user_answers: Sequence[float],
+) -> np.ndarray:
+    """批量判题
+
+    Args:
+        correct_answers: 全部题目的正确答案，类型码为"d"的数组
+        question_indices: 每个答案对应的题目索引
+        user_answers: 用户答案，与question_indices一一对应
+
+    Returns:
+        np.ndarray: 布尔数组，表示每个答案是否正确
+
+    Raises:
+        ValueError: 题目索引越界
+    """
+    indices = np.asarray(question_indices, dtype=np.int64)
+    if indices.size and (indices.min() < 0 or indices.max() >= len(correct_answers)):
+        raise ValueError("题目索引越界")
+
+    expected = np.frombuffer(correct_answers, dtype=np.float64)[indices]
+    actual = np.asarray(user_answers, dtype=np.float64)
+    return np.abs(expected - actual) < ANSWER_TOLERANCE
@@ -0,0 +1,496 @@
+"""
+练习事件日志模块
+
+本模块把练习的状态变化记录到磁盘，进程崩溃后可以恢复练习，主要功能：
+1. 只追加的事件日志：生成题目、提交答案、更换计分策略和提交练习各记为一行JSON
+2. 批量同步：每条事件写入后立即flush到操作系统，进程崩溃不会丢失；
+   fsync累计一定条数或时间后才做一次，提交练习时立即同步
+3. 快照：每隔一定条数的事件把练习的完整状态写成紧凑的快照，并清空日志；
+   题目生成后不再变化，单独追加到题目文件，每次快照只写入新增的题目
+4. 恢复：读取最新的快照，只重放快照之后的事件
+
+核心类与函数：
+- ExerciseEventLog：事件日志，通过Exercise.attach_event_log与练习关联
+- recover_exercise：从日志目录恢复练习
+
+目录中有snapshot.json、questions.jsonl和events.jsonl三个文件。每条事件带有递增的序号，
+快照记录它包含的最后一个序号和题目数，因此写完快照、清空日志之前崩溃也不会重复重放，
+题目文件中超出快照题目数的部分也会被忽略。
+流式练习不保留题目和答题记录，不支持事件日志。
+只有内置的计分策略能保存到日志，使用其他策略的练习不能关联事件日志。
+"""
+
+import base64
+import itertools
+import json
+import os
+import sys
+import time
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
+
+from ..models.question import DifficultyLevel, OperatorType, Question
+from ..observers.exercise_observer import ExerciseStatus
+from ..strategies.concrete_strategies import (
+    AccuracyScoringStrategy,
+    TimedScoringStrategy,
+)
+from ..strategies.scoring_strategy import ScoreAccumulator, ScoringStrategy
+
+if TYPE_CHECKING:
+    from .exercise import Exercise
+
+SNAPSHOT_FILE = "snapshot.json"
+QUESTIONS_FILE = "questions.jsonl"
+EVENTS_FILE = "events.jsonl"
+
+
+class ExerciseEventLog:
+    """一个练习的事件日志"""
+
+    # 累计多少条未同步的事件后fsync
+    DEFAULT_SYNC_EVERY = 64
+    # 距上次同步超过多少秒后，下一条事件写入时fsync
+    DEFAULT_SYNC_INTERVAL = 1.0
+    # 每隔多少条事件写一次快照
+    DEFAULT_SNAPSHOT_EVERY = 1000
+
+    def __init__(
+        self,
+        directory: str,
+        sync_every: int = DEFAULT_SYNC_EVERY,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+    ):
+        """
+        Args:
+            directory: 日志目录，不存在时自动创建
+            sync_every: 累计多少条未同步的事件后fsync
+            sync_interval: 距上次同步超过多少秒后，下一条事件写入时fsync
+            snapshot_every: 每隔多少条事件写一次快照
+        """
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.exercise: Optional["Exercise"] = None
+        # 最近一条事件的序号
+        self.sequence = 0
+        self._events_since_snapshot = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # 题目文件及其中已写入的题目数，关联练习时创建
+        self._questions_file = None
+        self._saved_questions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(os.path.join(directory, EVENTS_FILE), "a", encoding="utf-8")
+
+    def attach(self, exercise: "Exercise", sequence: int = 0):
+        """开始记录练习的事件，并立即写一次快照
+
+        一般通过Exercise.attach_event_log调用。
+
+        Args:
+            exercise: 练习
+            sequence: 起始序号，恢复后继续记录时为已有的最后一个序号
+
+        Raises:
+            ValueError: 流式练习，或练习的计分策略无法保存到日志
+        """
+        if exercise.question_stream is not None:
+            raise ValueError("流式练习不支持事件日志")
+        self.check_strategy(exercise.scoring_strategy)
+        self.exercise = exercise
+        self.sequence = sequence
+        self._rewrite_questions()
+        self.snapshot()
+
+    def record_questions(self, questions: Sequence[Question]):
+        """记录新生成的题目"""
+        self._append(
+            {
+                "type": "questions",
+                "questions": [_question_to_list(question) for question in questions],
+            }
+        )
+
+    def record_answer(
+        self, question_index: int, user_answer: float, time_spent: int, is_correct: bool
+    ):
+        """记录一道题的答案"""
+        self._append(
+            {
+                "type": "answer",
+                "index": int(question_index),
+                "answer": float(user_answer),
+                "time": int(time_spent),
+                "correct": bool(is_correct),
+                "wall": time.time(),
+            }
+        )
+
+    def record_answers(
+        self,
+        indices: Sequence[int],
+        answers: Sequence[float],
+        times: Sequence[int],
+        correct: Sequence[bool],
+    ):
+        """记录一批答案"""
+        self._append(
+            {
+                "type": "answers",
+                "indices": [int(index) for index in indices],
+                "answers": [float(answer) for answer in answers],
+                "times": [int(spent) for spent in times],
+                "correct": [bool(value) for value in correct],
+                "wall": time.time(),
+            }
+        )
+
+    @staticmethod
+    def check_strategy(strategy: ScoringStrategy):
+        """检查计分策略能否保存到日志，恢复时能重建相同的策略
+
+        Raises:
+            ValueError: 不是内置的计分策略
+        """
+        _strategy_to_dict(strategy)
+
+    def record_strategy(self, strategy: ScoringStrategy):
+        """记录计分策略的更换"""
+        self._append({"type": "strategy", "strategy": _strategy_to_dict(strategy)})
+
+    def record_submitted(self, final_score: float):
+        """记录提交练习，并立即同步"""
+        self._append({"type": "submitted", "score": final_score})
+        self.sync()
+
+    def sync(self):
+        """把缓冲的事件写入磁盘并fsync"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def snapshot(self):
+        """写入练习的完整状态并清空日志
+
+        先同步日志并追加新增的题目，再原子地替换快照文件，最后清空日志。
+        """
+        self.sync()
+        questions = self.exercise.questions
+        if len(questions) > self._saved_questions:
+            self._questions_file.write(
+                _encode_questions(questions[self._saved_questions :])
+            )
+            self._questions_file.flush()
+            os.fsync(self._questions_file.fileno())
+            self._saved_questions = len(questions)
+
+        _write_atomically(
+            os.path.join(self.directory, SNAPSHOT_FILE),
+            json.dumps(_snapshot_state(self.exercise, self.sequence)),
+        )
+
+        self._file.truncate(0)
+        self._file.seek(0)
+        self._file.flush()
+        self._events_since_snapshot = 0
+
+    def close(self):
+        """同步并关闭日志，练习之后的事件不再记录"""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+        if self._questions_file is not None:
+            self._questions_file.close()
+        if self.exercise is not None and self.exercise.event_log is self:
+            self.exercise.event_log = None
+        self.exercise = None
+
+    def _rewrite_questions(self):
+        """用练习当前的全部题目原子地替换题目文件，之后的快照只追加新增的题目"""
+        if self._questions_file is not None:
+            self._questions_file.close()
+        path = os.path.join(self.directory, QUESTIONS_FILE)
+        _write_atomically(path, _encode_questions(self.exercise.questions))
+        self._saved_questions = len(self.exercise.questions)
+        self._questions_file = open(path, "a", encoding="utf-8")
+
+    def _append(self, event: Dict[str, Any]):
+        self.sequence += 1
+        event["seq"] = self.sequence
+        self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        # 每条事件都交给操作系统，进程崩溃时不丢失；只有fsync按批进行
+        self._file.flush()
+        self._unsynced += 1
+        self._events_since_snapshot += 1
+
+        if self._events_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+        elif (
+            self._unsynced >= self.sync_every
+            or time.monotonic() - self._last_sync >= self.sync_interval
+        ):
+            self.sync()
+
+
+def recover_exercise(
+    directory: str, resume: bool = True, **log_options
+) -> Optional["Exercise"]:
+    """从日志目录恢复练习
+
+    Args:
+        directory: 日志目录
+        resume: 是否在恢复后继续记录到同一目录
+        **log_options: 继续记录时传给ExerciseEventLog的参数
+
+    Returns:
+        Optional[Exercise]: 恢复的练习，目录中没有快照时返回None
+
+    Raises:
+        ValueError: 日志中的计分策略无法识别，或题目文件不完整
+    """
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        state = json.load(file)
+
+    questions = _read_questions(
+        os.path.join(directory, QUESTIONS_FILE), state["question_count"]
+    )
+    exercise = _restore_state(state, questions)
+    sequence = state["seq"]
+    for event in _read_events(os.path.join(directory, EVENTS_FILE)):
+        if event["seq"] <= sequence:
+            continue
+        _apply_event(exercise, event)
+        sequence = event["seq"]
+
+    if resume:
+        # 继续记录时立即写快照，重放过的事件合并进快照
+        exercise.attach_event_log(ExerciseEventLog(directory, **log_options), sequence)
+    return exercise
+
+
+def _read_questions(path: str, count: int) -> List[Question]:
+    """读取题目文件的前count道题，之后的部分属于未完成的快照，忽略
+
+    Raises:
+        ValueError: 题目文件中的题目少于count道
+    """
+    questions = []
+    if count:
+        with open(path, encoding="utf-8") as file:
+            for line in itertools.islice(file, count):
+                questions.append(_question_from_list(json.loads(line)))
+    if len(questions) < count:
+        raise ValueError(f"题目文件只有{len(questions)}道题，快照需要{count}道")
+    return questions
+
+
+def _encode_questions(questions: Sequence[Question]) -> str:
+    """把题目编码为题目文件中的行，每道题一行"""
+    return "".join(
+        json.dumps(_question_to_list(question), ensure_ascii=False) + "\n"
+        for question in questions
+    )
+
+
+def _write_atomically(path: str, content: str):
+    """写入临时文件并同步后替换path，再同步所在目录，使替换本身在崩溃后依然有效"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    _fsync_directory(os.path.dirname(path) or ".")
+
+
+def _fsync_directory(directory: str):
+    """同步目录项；不支持打开目录的平台（如Windows）上跳过"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _read_events(path: str) -> Iterator[Dict[str, Any]]:
+    """逐条读取事件，崩溃时写了一半的最后一行被忽略"""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                return
+            yield event
+
+
+def _apply_event(exercise: "Exercise", event: Dict[str, Any]):
+    """把一条事件应用到练习上，不再记录到日志"""
+    kind = event["type"]
+    log = exercise.answer_log
+    if kind == "questions":
+        questions = [_question_from_list(item) for item in event["questions"]]
+        exercise.questions.extend(questions)
+        exercise.question_keys.update(question.canonical_key for question in questions)
+        exercise.status = ExerciseStatus.IN_PROGRESS
+    elif kind == "answer":
+        index = event["index"]
+        log.append(
+            index,
+            event["answer"],
+            event["correct"],
+            event["time"],
+            event["wall"] - log.wall_offset,
+        )
+        exercise.score_accumulator.record(event["correct"], event["time"])
+        if not exercise.questions_shared:
+            exercise.questions[index].user_answer = event["answer"]
+    elif kind == "answers":
+        log.extend(
+            event["indices"],
+            event["answers"],
+            event["correct"],
+            event["times"],
+            event["wall"] - log.wall_offset,
+        )
+        exercise.score_accumulator.record_totals(
+            len(event["correct"]), sum(event["correct"]), sum(event["times"])
+        )
+        if not exercise.questions_shared:
+            for index, answer in zip(event["indices"], event["answers"]):
+                exercise.questions[index].user_answer = answer
+    elif kind == "strategy":
+        exercise.scoring_strategy = _strategy_from_dict(event["strategy"])
+    elif kind == "submitted":
+        exercise.status = ExerciseStatus.GRADED
+
+
+def _snapshot_state(exercise: "Exercise", sequence: int) -> Dict[str, Any]:
+    """练习除题目以外的完整状态，答题记录的各列以base64编码的二进制存储"""
+    log = exercise.answer_log
+    wall_times = array("d", (log.wall_offset + ts for ts in log.timestamps))
+    return {
+        "seq": sequence,
+        "byteorder": sys.byteorder,
+        "config": {
+            "difficulty": exercise.difficulty.name,
+            "number_range": list(exercise.number_range),
+            "operators": [operator.name for operator in exercise.operators],
+            "operand_count": exercise.operand_count,
+        },
+        "status": exercise.status.name,
+        "strategy": _strategy_to_dict(exercise.scoring_strategy),
+        "questions_shared": exercise.questions_shared,
+        "question_count": len(exercise.questions),
+        "answers": {
+            "question_indices": _encode(log.question_indices),
+            "user_answers": _encode(log.user_answers),
+            "correct": _encode(log.correct),
+            "times_spent": _encode(log.times_spent),
+            "wall_times": _encode(wall_times),
+        },
+    }
+
+
+def _restore_state(state: Dict[str, Any], questions: List[Question]) -> "Exercise":
+    """根据快照和题目文件中的题目重建练习"""
+    from .exercise import Exercise
+
+    config = state["config"]
+    exercise = Exercise(
+        DifficultyLevel[config["difficulty"]],
+        tuple(config["number_range"]),
+        [OperatorType[name] for name in config["operators"]],
+        operand_count=config["operand_count"],
+    )
+    exercise.status = ExerciseStatus[state["status"]]
+    exercise.scoring_strategy = _strategy_from_dict(state["strategy"])
+    exercise.questions_shared = state["questions_shared"]
+
+    exercise.questions.extend(questions)
+    exercise.question_keys.update(
+        question.canonical_key for question in exercise.questions
+    )
+
+    swap = state["byteorder"] != sys.byteorder
+    answers = state["answers"]
+    log = exercise.answer_log
+    for name in ("question_indices", "user_answers", "correct", "times_spent"):
+        _decode(getattr(log, name), answers[name], swap)
+    wall_times = _decode(array("d"), answers["wall_times"], swap)
+    log.timestamps.extend(wall - log.wall_offset for wall in wall_times)
+
+    exercise.score_accumulator = ScoreAccumulator.from_answers(log)
+    if not exercise.questions_shared:
+        for index, answer in zip(log.question_indices, log.user_answers):
+            exercise.questions[index].user_answer = answer
+    return exercise
+
+
+def _question_to_list(question: Question) -> List[Any]:
+    return [
+        question.content,
+        question.answer,
+        [operator.name for operator in question.operator_types],
+        question.canonical_key,
+    ]
+
+
+def _question_from_list(item: List[Any]) -> Question:
+    content, answer, operators, canonical_key = item
+    return Question(
+        content=content,
+        answer=answer,
+        operator_types=[OperatorType[name] for name in operators],
+        canonical_key=canonical_key,
+    )
+
+
+def _strategy_to_dict(strategy: ScoringStrategy) -> Dict[str, Any]:
+    """内置计分策略的参数，子类可能改变了计分方式，同样无法保存"""
+    if type(strategy) is TimedScoringStrategy:
+        return {
+            "type": "timed",
+            "time_weight": strategy.time_weight,
+            "accuracy_weight": strategy.accuracy_weight,
+        }
+    if type(strategy) is AccuracyScoringStrategy:
+        return {"type": "accuracy"}
+    raise ValueError(f"{type(strategy).__name__}无法保存到事件日志，恢复时会丢失")
+
+
+def _strategy_from_dict(data: Dict[str, Any]) -> ScoringStrategy:
+    """根据保存的参数重建计分策略，无法识别时抛出异常，而不是换用默认策略"""
+    kind = data.get("type") if isinstance(data, dict) else None
+    if kind == "timed":
+        return TimedScoringStrategy(data["time_weight"], data["accuracy_weight"])
+    if kind == "accuracy":
+        return AccuracyScoringStrategy()
+    raise ValueError(f"日志中的计分策略无法识别：{data!r}")
+
+
+def _encode(column: array) -> str:
+    return base64.b64encode(column.tobytes()).decode("ascii")
+
+
+def _decode(column: array, data: str, swap: bool) -> array:
+    """把base64编码的二进制追加到column，字节序不同时转换"""
+    values = array(column.typecode, base64.b64decode(data))
+    if swap:
+        values.byteswap()
+    column.extend(values)
+    return column
@@ -1,35 +1,120 @@
-from typing import List
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+)
+from array import array
+import operator
+from collections import OrderedDict, deque
 import random
 from datetime import datetime
-from ..models.question import Question, OperatorType, DifficultyLevel
+from ..models.question import (
+    ANSWER_TOLERANCE,
+    Question,
+    OperatorType,
+    DifficultyLevel,
+)
 from ..models.answer import Answer
+from ..models.answer_log import AnswerLog
 from ..factories.concrete_factories import QuestionGenerator
-from ..observers.exercise_observer import ExerciseObserver, ExerciseStatus
-from ..strategies.scoring_strategy import ScoringStrategy
-from ..strategies.concrete_strategies import (
-    AccuracyScoringStrategy,
-    TimedScoringStrategy,
+from ..factories.factory_cache import default_factory_cache
+from ..factories.parallel import (
+    generate_questions_parallel,
+    generate_questions_sharded,
 )
+from .prefetch import QuestionPrefetcher
+from ..observers.exercise_observer import ExerciseObserver, ExerciseStatus
+from ..observers.dispatcher import SYNC_DISPATCHER, SyncDispatcher
+from ..strategies.scoring_strategy import ScoreAccumulator, ScoringStrategy
+from ..strategies.concrete_strategies import AccuracyScoringStrategy
 import time
 
+if TYPE_CHECKING:
+    from .event_log import ExerciseEventLog
+
+# 检查是否安装了NumPy，批量判题的向量化实现依赖它
+HAS_NUMPY = False
+
+try:
+    from .batch_checking import check_answers
+
+    HAS_NUMPY = True
+except ImportError:
+    pass
+
 
 class Exercise:
+    # 流式练习中预先生成的题目个数
+    STREAM_LOOKAHEAD = 16
+    # 流式练习中保留的最近答题记录条数
+    RECENT_ANSWER_LIMIT = 100
+    # 流式练习中已出题但未作答的题目上限，超出时最早的题目视为跳过
+    OPEN_QUESTION_LIMIT = 100
+
     def __init__(
         self,
         difficulty: DifficultyLevel,
         number_range: tuple[int, int],
         operators: List[OperatorType],
+        operand_count: Optional[int] = None,
+        question_generator: Optional[QuestionGenerator] = None,
     ):
+        """
+        Args:
+            question_generator: 使用的问题生成器，为None时从工厂缓存获取一个新的；
+                可由相同配置的多个练习共用，但不能在多个线程中同时生成题目，
+                需要时使用LockedQuestionGenerator
+        """
         self.difficulty = difficulty
+        # 每道题的操作数个数，为None时由难度决定
+        self.operand_count = operand_count
         self.number_range = number_range
+        self.operators = operators
         self.status = ExerciseStatus.NOT_STARTED
         self.questions: List[Question] = []
-        self.answers: List[Answer] = []
+        # 已生成题目的规范形式，用于生成不重复的题目
+        self.question_keys: Set[str] = set()
+        # 按列存储的答题记录，answers是它的只读视图
+        self.answer_log = AnswerLog(self.questions)
+        # 题目正确答案的数组，与questions的前若干项对应，批量判题时补齐
+        self._correct_answers = array("d")
         self.observers: List[ExerciseObserver] = []
+        # 观察者通知的分发方式，默认在当前线程中同步通知
+        self.dispatcher: SyncDispatcher = SYNC_DISPATCHER
         self.scoring_strategy: ScoringStrategy = AccuracyScoringStrategy()
-        self.question_generator = QuestionGenerator(difficulty, number_range, operators)
+        # 已作答题目的汇总数据，作答时更新，用于随时计算当前分数
+        self.score_accumulator = ScoreAccumulator()
+        # 问题生成器是否由练习按自身配置创建，只有此时工作进程才能重建相同的生成器
+        self._config_generator = question_generator is None
+        # 相同配置的练习共用预热过的工厂，每个练习有独立的随机状态
+        if question_generator is None:
+            question_generator = default_factory_cache.get_generator(
+                difficulty, number_range, operators, operand_count=operand_count
+            )
+        self.question_generator = question_generator
+        # 题目是否与其他练习共用；共用时作答不修改题目的user_answer，
+        # 用户答案只记录在答题记录中
+        self.questions_shared = False
         self.last_answer_time = time.time()  # 添加这一行来跟踪上一次答题时间
 
+        # 流式练习的状态：题目按需生成，只保留未作答的题目和汇总数据
+        self.question_stream: Optional[Iterator[Question]] = None
+        self.open_questions: Dict[int, Question] = OrderedDict()
+        self.recent_answers: Deque[Answer] = deque(maxlen=self.RECENT_ANSWER_LIMIT)
+        self.next_question_index = 0
+
+        # 后台预取的状态：题目在生产者线程中生成，由collect_prefetched收取
+        self.prefetcher: Optional[QuestionPrefetcher] = None
+        # 事件日志，关联后练习的状态变化会记录到磁盘，用于崩溃后恢复
+        self.event_log: Optional["ExerciseEventLog"] = None
+
     def add_observer(self, observer: ExerciseObserver):
         self.observers.append(observer)
 
@@ -37,53 +122,351 @@ class Exercise:
         self.observers.remove(observer)
 
     def notify_observers(self):
-        for observer in self.observers:
-            observer.on_exercise_state_changed(self.status)
+        self.dispatcher.dispatch(self, tuple(self.observers), self.status)
+
+    def set_dispatcher(self, dispatcher: SyncDispatcher):
+        """设置观察者通知的分发方式，如AsyncDispatcher，可由多个练习共用"""
+        self.dispatcher = dispatcher
 
     def set_scoring_strategy(self, strategy: ScoringStrategy):
+        if self.question_stream is not None and not strategy.supports_totals:
+            raise ValueError(f"流式练习不能使用不支持按汇总数据计分的{type(strategy).__name__}")
+        if self.event_log is not None:
+            self.event_log.check_strategy(strategy)
         self.scoring_strategy = strategy
+        if self.event_log is not None:
+            self.event_log.record_strategy(strategy)
+
+    def attach_event_log(self, event_log: "ExerciseEventLog", sequence: int = 0):
+        """把练习的状态变化记录到事件日志，关联时立即写一次快照
+
+        Args:
+            event_log: 事件日志
+            sequence: 起始序号，由recover_exercise在恢复后继续记录时传入
+
+        Raises:
+            ValueError: 流式练习，或计分策略无法保存到日志
+        """
+        event_log.attach(self, sequence)
+        self.event_log = event_log
+
+    @property
+    def answers(self) -> AnswerLog:
+        """全部答题记录，按索引或迭代访问时构造Answer"""
+        return self.answer_log
+
+    @property
+    def answered_count(self) -> int:
+        return self.score_accumulator.answered_count
+
+    @property
+    def correct_count(self) -> int:
+        return self.score_accumulator.correct_count
+
+    @property
+    def total_time_spent(self) -> int:
+        return self.score_accumulator.total_time
+
+    @property
+    def current_score(self) -> float:
+        """按已作答的题目计算的当前分数，与练习结束时的计分方式相同"""
+        strategy = self.scoring_strategy
+        if strategy.supports_totals:
+            return strategy.score(self.score_accumulator, self.difficulty)
+        # 不支持按汇总数据计分的策略按全部答题记录计分，流式练习中不会出现
+        return strategy.calculate_score(self.answers, self.difficulty)
+
+    def generate_questions(
+        self,
+        count: int,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        unique: bool = False,
+    ):
+        """生成count道题
+
+        Args:
+            count: 题目数量
+            workers: 并行生成的进程数，为None时在当前进程中生成；
+                只能用于由练习自行创建问题生成器的情况
+            seed: 随机种子，指定后用练习的工厂按分片生成，结果与进程数无关、
+                可完全复现，且不改变问题生成器的随机状态
+            unique: 是否要求新题目互不重复、也不与已有题目重复；
+                此时总在当前进程中生成，workers被忽略
+
+        Raises:
+            ValueError: unique为True且当前配置的题目空间不足，
+                或在传入的问题生成器上指定了多个进程
+        """
+        parallel = workers is not None and workers != 1 and not unique
+        if parallel and not self._config_generator:
+            raise ValueError("传入的问题生成器无法在工作进程中重建，不能指定多个进程")
 
-    def generate_questions(self, count: int):
         self.status = ExerciseStatus.IN_PROGRESS
         self.notify_observers()
 
-        for _ in range(count):
-            question = self.question_generator.generate_question()
-            self.questions.append(question)
+        if unique:
+            generator = self.question_generator
+            if seed is not None:
+                # 在只属于本次调用的副本上设定种子，不影响共用该生成器的其他练习
+                generator = QuestionGenerator.from_factory(
+                    generator.factory.clone(seed)
+                )
+            questions = generator.generate_unique_batch(count, self.question_keys)
+        elif parallel:
+            questions = generate_questions_parallel(
+                self.difficulty,
+                self.number_range,
+                self.operators,
+                count,
+                seed=seed,
+                workers=workers,
+                operand_count=self.operand_count,
+            )
+        elif seed is not None:
+            questions = generate_questions_sharded(
+                self.question_generator.factory, count, seed=seed
+            )
+        else:
+            questions = self.question_generator.generate_batch(count)
+
+        self.questions.extend(questions)
+        self.question_keys.update(question.canonical_key for question in questions)
+        if self.event_log is not None and questions:
+            self.event_log.record_questions(questions)
+
+    def prefetch_questions(
+        self,
+        count: int,
+        on_available: Optional[Callable[[], None]] = None,
+    ) -> QuestionPrefetcher:
+        """在后台线程中生成count道题，不阻塞调用方
+
+        题目生成后不会直接加入questions，需由调用方在自己的线程中调用
+        collect_prefetched收取。预取期间不应再调用generate_questions。
+
+        Args:
+            count: 题目数量
+            on_available: 有新题目可收取或生成结束时的通知，在生产者线程中调用
+
+        Returns:
+            QuestionPrefetcher: 已启动的预取器，可用于查询进度或停止
+        """
+        self.stop_prefetch()
+        self.status = ExerciseStatus.IN_PROGRESS
+        self.notify_observers()
+
+        self.prefetcher = QuestionPrefetcher(
+            self.question_generator, count, on_available
+        )
+        self.prefetcher.start()
+        return self.prefetcher
+
+    def collect_prefetched(self) -> List[Question]:
+        """把后台已生成的题目加入questions
+
+        Returns:
+            List[Question]: 本次新加入的题目，没有时为空列表
+
+        Raises:
+            RuntimeError: 后台生成出错，原异常作为__cause__
+        """
+        if self.prefetcher is None:
+            return []
+
+        questions = self.prefetcher.drain()
+        self.questions.extend(questions)
+        self.question_keys.update(question.canonical_key for question in questions)
+        if self.event_log is not None and questions:
+            self.event_log.record_questions(questions)
+        if self.prefetcher.error is not None:
+            raise RuntimeError("后台生成题目失败") from self.prefetcher.error
+        return questions
+
+    def stop_prefetch(self):
+        """停止后台预取，未收取的题目被丢弃"""
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
+
+    def start_stream(self, lookahead: Optional[int] = None):
+        """开始流式练习，题目通过next_question逐个获取，数量不限
+
+        Args:
+            lookahead: 预先生成的题目个数，默认为STREAM_LOOKAHEAD
+
+        Raises:
+            ValueError: 练习已关联事件日志，或计分策略不支持按汇总数据计分
+        """
+        if self.event_log is not None:
+            raise ValueError("流式练习不支持事件日志")
+        if not self.scoring_strategy.supports_totals:
+            raise ValueError(
+                f"流式练习不能使用不支持按汇总数据计分的"
+                f"{type(self.scoring_strategy).__name__}"
+            )
+        self.question_stream = self.question_generator.stream(
+            self.STREAM_LOOKAHEAD if lookahead is None else lookahead
+        )
+        self.status = ExerciseStatus.IN_PROGRESS
+        self.notify_observers()
+
+    def next_question(self) -> Tuple[int, Question]:
+        """流式练习中获取下一道题
+
+        Returns:
+            Tuple[int, Question]: 题目索引和题目，作答时把索引传给submit_answer
+        """
+        if self.question_stream is None:
+            raise ValueError("练习未以流式模式开始")
+
+        index = self.next_question_index
+        self.next_question_index += 1
+        self.open_questions[index] = next(self.question_stream)
+        if len(self.open_questions) > self.OPEN_QUESTION_LIMIT:
+            self.open_questions.popitem(last=False)
+        return index, self.open_questions[index]
 
     def submit_answer(
         self, question_index: int, user_answer: float, time_spent: int
     ) -> bool:
+        if self.question_stream is not None:
+            return self._submit_stream_answer(question_index, user_answer, time_spent)
+
+        # 先把各值转换为答题记录各列的类型（如NumPy标量、Decimal），
+        # 转换失败时不修改任何状态，之后的判题、累计和事件日志都只使用转换后的值
+        question_index = operator.index(question_index)
         if question_index >= len(self.questions):
             raise ValueError("题目索引越界")
+        user_answer = float(user_answer)
+        time_spent = int(time_spent)
 
         question = self.questions[question_index]
+        is_correct = bool(question.is_correct(user_answer))
+        self.answer_log.append(question_index, user_answer, is_correct, time_spent)
+        if not self.questions_shared:
+            question.user_answer = user_answer
+        self.score_accumulator.record(is_correct, time_spent)
+        if self.event_log is not None:
+            log = self.answer_log
+            self.event_log.record_answer(
+                log.question_indices[-1],
+                log.user_answers[-1],
+                log.times_spent[-1],
+                bool(log.correct[-1]),
+            )
+
+        return is_correct
+
+    def submit_answers_batch(
+        self,
+        indices: Sequence[int],
+        answers: Sequence[float],
+        times: Sequence[int],
+    ) -> Sequence[bool]:
+        """一次提交一批答案，整批一起判题
+
+        判题的误差与Question.check_answer相同。同一题可以出现多次，
+        题目的user_answer取该题在本批中的最后一个答案。
+
+        Args:
+            indices: 每个答案对应的题目索引
+            answers: 用户答案
+            times: 每个答案的用时（秒）
+
+        Returns:
+            Sequence[bool]: 每个答案是否正确；安装NumPy时为布尔数组，否则为列表
+
+        Raises:
+            ValueError: 流式练习、各参数长度不一致或题目索引越界
+            TypeError: 题目索引、答案或用时的类型无效
+        """
+        if self.question_stream is not None:
+            raise ValueError("流式练习不支持批量提交")
+        if not len(indices) == len(answers) == len(times):
+            raise ValueError("题目索引、答案和用时的个数不一致")
+
+        # 先把整批数据转换为答题记录各列的类型，任何一个值无效时不修改任何状态
+        indices = array("q", map(operator.index, indices))
+        answers = array("d", map(float, answers))
+        times = array("q", map(int, times))
+
+        # 补齐新生成题目的正确答案
+        for question in self.questions[len(self._correct_answers) :]:
+            self._correct_answers.append(question.answer)
+
+        if HAS_NUMPY:
+            mask = check_answers(self._correct_answers, indices, answers)
+            correct = mask.tolist()
+        else:
+            if any(not 0 <= index < len(self.questions) for index in indices):
+                raise ValueError("题目索引越界")
+            correct = [
+                abs(self._correct_answers[index] - answer) < ANSWER_TOLERANCE
+                for index, answer in zip(indices, answers)
+            ]
+            mask = correct
+
+        if not self.questions_shared:
+            for index, answer in zip(indices, answers):
+                self.questions[index].user_answer = answer
+
+        self.answer_log.extend(indices, answers, correct, times)
+        self.score_accumulator.record_totals(len(correct), sum(correct), sum(times))
+        if self.event_log is not None:
+            self.event_log.record_answers(indices, answers, times, correct)
+
+        return mask
+
+    def _submit_stream_answer(
+        self, question_index: int, user_answer: float, time_spent: int
+    ) -> bool:
+        """流式练习的作答：题目作答后即释放，只累计汇总数据"""
+        question = self.open_questions.pop(question_index, None)
+        if question is None:
+            raise ValueError("题目不存在或已作答")
         question.user_answer = user_answer
 
         answer = Answer(
             question=question,
             submit_time=datetime.now(),
             time_spent=time_spent,
-            is_correct=question.check_answer(),  # 直接在创建Answer时确定是否正确
+            is_correct=question.check_answer(),
         )
-        self.answers.append(answer)
+        self.recent_answers.append(answer)
+        self.score_accumulator.add(answer)
 
         return answer.is_correct
 
     def submit_exercise(self) -> float:
+        if self.question_stream is not None:
+            return self._submit_stream_exercise()
+
         if len(self.answers) != len(self.questions):
             raise ValueError("还有题目未完成")
 
         self.status = ExerciseStatus.SUBMITTED
         self.notify_observers()
 
-        # 根据策略类型传递难度参数
-        if isinstance(self.scoring_strategy, TimedScoringStrategy):
-            final_score = self.scoring_strategy.calculate_score(
-                self.answers, self.difficulty
-            )
-        else:
-            final_score = self.scoring_strategy.calculate_score(self.answers)
+        final_score = self.current_score
+        if self.event_log is not None:
+            # 提交后练习不再变化，同步并关闭日志
+            self.event_log.record_submitted(final_score)
+            self.event_log.close()
+
+        self.status = ExerciseStatus.GRADED
+        self.notify_observers()
+
+        return final_score
+
+    def _submit_stream_exercise(self) -> float:
+        """结束流式练习，按已作答题目的汇总数据计分，未作答的题目不计入"""
+        self.status = ExerciseStatus.SUBMITTED
+        self.notify_observers()
+
+        final_score = self.current_score
+        self.question_stream = None
+        self.open_questions.clear()
 
         self.status = ExerciseStatus.GRADED
         self.notify_observers()
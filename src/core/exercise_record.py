@@ -1,7 +1,8 @@
 import json
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any, Optional, Sequence, overload
 from datetime import datetime
+from ..models.answer_log import AnswerLog
 
 
 @dataclass
@@ -13,18 +14,86 @@ class QuestionRecord:
     time_spent: int
 
 
+class QuestionRecords(Sequence[QuestionRecord]):
+    """题目记录的只读视图：先是手动添加的记录，再是答题记录中的各条
+
+    按索引或迭代访问时才构造QuestionRecord，长度和内容随答题记录实时变化。
+    添加记录请使用ExerciseRecord.add_question_record。
+    """
+
+    def __init__(self, manual: List[QuestionRecord], answer_log: Optional[AnswerLog]):
+        self._manual = manual
+        self._answer_log = answer_log
+
+    def __len__(self) -> int:
+        logged = 0 if self._answer_log is None else len(self._answer_log)
+        return len(self._manual) + logged
+
+    @overload
+    def __getitem__(self, index: int) -> QuestionRecord: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[QuestionRecord]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("题目记录索引越界")
+        return self._view(index)
+
+    def __iter__(self) -> Iterator[QuestionRecord]:
+        for i in range(len(self)):
+            yield self._view(i)
+
+    def append(self, record: QuestionRecord):
+        raise TypeError("题目记录是只读视图，请使用ExerciseRecord.add_question_record")
+
+    def _view(self, index: int) -> QuestionRecord:
+        if index < len(self._manual):
+            return self._manual[index]
+        log = self._answer_log
+        i = index - len(self._manual)
+        question = log.questions[log.question_indices[i]]
+        return QuestionRecord(
+            content=question.content,
+            user_answer=log.user_answers[i],
+            correct_answer=question.answer,
+            is_correct=bool(log.correct[i]),
+            time_spent=log.times_spent[i],
+        )
+
+
 class ExerciseRecord:
-    def __init__(self, difficulty: str, number_range: tuple, operator_types: List[str]):
+    def __init__(
+        self,
+        difficulty: str,
+        number_range: tuple,
+        operator_types: List[str],
+        answer_log: Optional[AnswerLog] = None,
+    ):
+        """
+        Args:
+            answer_log: 练习的答题记录，指定后题目记录由它按需生成，不再另存一份
+        """
         self.difficulty = difficulty
         self.number_range = number_range
         self.operator_types = operator_types
-        self.questions: List[QuestionRecord] = []
+        self.answer_log = answer_log
+        self._question_records: List[QuestionRecord] = []
         self.total_time = 0
         self.final_score = 0
         self.timestamp = datetime.now()
 
+    @property
+    def questions(self) -> QuestionRecords:
+        """全部题目记录的只读视图，构造视图不复制任何记录"""
+        return QuestionRecords(self._question_records, self.answer_log)
+
     def add_question_record(self, question: QuestionRecord):
-        self.questions.append(question)
+        self._question_records.append(question)
 
     def to_prompt_message(self) -> str:
         """转换为发送给AI的消息格式"""
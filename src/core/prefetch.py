@@ -0,0 +1,132 @@
+"""
+题目预取模块
+
+本模块在后台线程中生成题目，供界面等不能长时间阻塞的调用方使用，主要功能：
+1. 生产者线程逐批生成题目，放入有界队列；队列满时等待消费者取走
+2. 第一批只生成一道题，使第一道题尽快可用，之后按固定批量生成
+3. 每生成一批调用一次通知回调，消费者在自己的线程中取走题目
+4. 可随时停止，生成出错时记录异常并结束
+
+核心类：
+- QuestionPrefetcher：题目预取器
+
+通知回调在生产者线程中调用，不应直接操作界面；
+Qt界面中可传入信号的emit，由信号把通知转到主线程。
+"""
+
+import queue
+import threading
+from typing import Callable, List, Optional
+
+from ..factories.concrete_factories import QuestionGenerator
+from ..models.question import Question
+
+
+class QuestionPrefetcher:
+    """在后台线程中生成固定数量的题目
+
+    生成器只在生产者线程中使用，预取期间调用方不应再用它生成题目。
+    """
+
+    # 队列容量，生产者最多领先消费者这么多道题
+    DEFAULT_MAXSIZE = 64
+    # 第一批之后每批生成的题目数
+    DEFAULT_BATCH_SIZE = 16
+    # 队列满时检查停止标志的间隔（秒）
+    PUT_TIMEOUT = 0.1
+
+    def __init__(
+        self,
+        generator: QuestionGenerator,
+        count: int,
+        on_available: Optional[Callable[[], None]] = None,
+        maxsize: int = DEFAULT_MAXSIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        """
+        Args:
+            generator: 问题生成器
+            count: 要生成的题目总数
+            on_available: 每放入一批题目、以及生成结束时调用，在生产者线程中执行
+            maxsize: 队列容量，必须为正数
+            batch_size: 第一批之后每批生成的题目数，必须为正数
+        """
+        if maxsize <= 0 or batch_size <= 0:
+            raise ValueError("队列容量和批量必须为正数")
+        self.generator = generator
+        self.count = count
+        self.on_available = on_available
+        self.batch_size = min(batch_size, maxsize)
+        self.queue: "queue.Queue[Question]" = queue.Queue(maxsize)
+        self.stop_event = threading.Event()
+        self.finished = threading.Event()
+        # 生产者线程中发生的异常，生成正常结束时为None
+        self.error: Optional[BaseException] = None
+        self.produced = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动生产者线程"""
+        if self._thread is not None:
+            raise RuntimeError("预取已经开始")
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止生成，等待生产者线程结束，未取走的题目被丢弃
+
+        Args:
+            timeout: 等待的最长时间（秒），为None时一直等待
+        """
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def done(self) -> bool:
+        """生成已经结束，且题目都已被取走"""
+        return self.finished.is_set() and self.queue.empty()
+
+    def drain(self) -> List[Question]:
+        """取走队列中现有的全部题目，不会阻塞"""
+        questions = []
+        while True:
+            try:
+                questions.append(self.queue.get_nowait())
+            except queue.Empty:
+                return questions
+
+    def _produce(self):
+        """生产者线程：逐批生成题目并放入队列"""
+        batch_size = 1
+        try:
+            while self.produced < self.count and not self.stop_event.is_set():
+                batch = self.generator.generate_batch(
+                    min(batch_size, self.count - self.produced)
+                )
+                for question in batch:
+                    if not self._put(question):
+                        return
+                self.produced += len(batch)
+                batch_size = self.batch_size
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
+            self._notify()
+
+    def _put(self, question: Question) -> bool:
+        """把题目放入队列，队列满时等待；已停止时返回False"""
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(question, timeout=self.PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                # 消费者可能只在收到通知后取题，队列满时再提醒一次
+                self._notify()
+        return False
+
+    def _notify(self):
+        if self.on_available is not None and not self.stop_event.is_set():
+            self.on_available()
@@ -0,0 +1,266 @@
+"""
+练习会话管理模块
+
+本模块在一个进程中同时管理大量练习（会话），如全校同时进行的限时测验，主要功能：
+1. 相同配置的会话共用一个问题生成器，生成时按配置加锁，
+   包括之后对会话调用的generate_questions和prefetch_questions
+2. 内容相同的题目在所有会话间只保留一个Question对象
+3. 管理器的观察者会通知所有会话，所有会话共用一个通知分发器；
+   对单个会话添加的观察者只通知该会话
+4. 超过空闲时限未访问的会话自动过期
+5. 估算每个会话以及全部会话占用的内存
+
+核心类：
+- SessionManager：会话管理器
+
+会话中的题目可能被其他会话共用，作答时不修改题目的user_answer，
+用户答案只记录在各会话的答题记录中。
+"""
+
+import itertools
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from ..factories.concrete_factories import LockedQuestionGenerator
+from ..factories.factory_cache import FactoryCache, default_factory_cache
+from ..models.question import DifficultyLevel, OperatorType, Question
+from ..observers.dispatcher import SYNC_DISPATCHER, SyncDispatcher
+from ..observers.exercise_observer import ExerciseObserver
+from .exercise import Exercise
+
+
+class SessionManager:
+    """管理大量并发的练习会话，线程安全"""
+
+    # 默认的空闲时限（秒）
+    DEFAULT_IDLE_TIMEOUT = 30 * 60
+
+    def __init__(
+        self,
+        idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+        factory_cache: Optional[FactoryCache] = None,
+        dispatcher: SyncDispatcher = SYNC_DISPATCHER,
+    ):
+        """
+        Args:
+            idle_timeout: 空闲时限（秒），为None时会话不会过期
+            factory_cache: 获取问题生成器的工厂缓存，默认为default_factory_cache
+            dispatcher: 所有会话共用的通知分发器
+        """
+        self.idle_timeout = idle_timeout
+        self.factory_cache = factory_cache or default_factory_cache
+        self.dispatcher = dispatcher
+        # 通知所有会话的观察者，每个会话另有一个包含它们的列表
+        self.observers: List[ExerciseObserver] = []
+        self._sessions: Dict[Hashable, Exercise] = {}
+        # 会话最近一次被访问的单调时钟读数
+        self._last_active: Dict[Hashable, float] = {}
+        # 按配置共用的问题生成器，生成时持有各自的锁
+        self._generators: Dict[tuple, LockedQuestionGenerator] = {}
+        # 题目内容到Question对象的映射，不再被任何会话引用的题目自动移除
+        self._questions: "weakref.WeakValueDictionary[str, Question]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.expired = 0
+
+    def create_session(
+        self,
+        difficulty: DifficultyLevel,
+        number_range: Tuple[int, int],
+        operators: List[OperatorType],
+        question_count: int,
+        operand_count: Optional[int] = None,
+        session_id: Optional[Hashable] = None,
+    ) -> Hashable:
+        """创建一个会话并生成题目
+
+        Args:
+            difficulty: 难度级别
+            number_range: 数值范围
+            operators: 运算符
+            question_count: 题目数量
+            operand_count: 每道题的操作数个数，为None时由难度决定
+            session_id: 会话编号，为None时自动分配整数编号
+
+        Returns:
+            Hashable: 会话编号
+
+        Raises:
+            ValueError: 会话编号已存在，或当前配置无法生成任何题目
+        """
+        self.expire_idle()
+        generator = self._get_generator(
+            difficulty, number_range, operators, operand_count
+        )
+
+        exercise = Exercise(
+            difficulty,
+            number_range,
+            operators,
+            operand_count=operand_count,
+            question_generator=generator,
+        )
+        exercise.questions_shared = True
+        exercise.set_dispatcher(self.dispatcher)
+
+        exercise.generate_questions(question_count)
+        self._intern_questions(exercise)
+
+        with self._lock:
+            # 每个会话有自己的观察者列表，对会话添加观察者不影响其他会话
+            exercise.observers = list(self.observers)
+            if session_id is None:
+                session_id = next(self._ids)
+                while session_id in self._sessions:
+                    session_id = next(self._ids)
+            elif session_id in self._sessions:
+                raise ValueError(f"会话{session_id}已存在")
+            self._sessions[session_id] = exercise
+            self._last_active[session_id] = time.monotonic()
+        return session_id
+
+    def get_session(self, session_id: Hashable) -> Exercise:
+        """获取会话，同时刷新其最近访问时间
+
+        Raises:
+            KeyError: 会话不存在或已过期
+        """
+        with self._lock:
+            exercise = self._sessions[session_id]
+            self._last_active[session_id] = time.monotonic()
+            return exercise
+
+    def submit_answer(
+        self,
+        session_id: Hashable,
+        question_index: int,
+        user_answer: float,
+        time_spent: int,
+    ) -> bool:
+        """提交会话中一道题的答案，返回是否正确"""
+        return self.get_session(session_id).submit_answer(
+            question_index, user_answer, time_spent
+        )
+
+    def close_session(self, session_id: Hashable) -> Optional[Exercise]:
+        """移除会话，返回被移除的练习，会话不存在时返回None"""
+        with self._lock:
+            self._last_active.pop(session_id, None)
+            return self._sessions.pop(session_id, None)
+
+    def expire_idle(self, now: Optional[float] = None) -> List[Hashable]:
+        """移除超过空闲时限未访问的会话
+
+        Args:
+            now: 单调时钟的读数，默认为当前时刻
+
+        Returns:
+            List[Hashable]: 被移除的会话编号
+        """
+        if self.idle_timeout is None:
+            return []
+        deadline = (time.monotonic() if now is None else now) - self.idle_timeout
+        with self._lock:
+            expired = [
+                session_id
+                for session_id, last_active in self._last_active.items()
+                if last_active < deadline
+            ]
+            for session_id in expired:
+                del self._sessions[session_id]
+                del self._last_active[session_id]
+            self.expired += len(expired)
+        return expired
+
+    def add_observer(self, observer: ExerciseObserver):
+        """添加通知所有会话（包括之后创建的会话）的观察者"""
+        with self._lock:
+            self.observers.append(observer)
+            for exercise in self._sessions.values():
+                exercise.observers.append(observer)
+
+    def session_memory(self, session_id: Hashable) -> Dict[str, int]:
+        """估算会话独占的内存（字节），共用的题目、生成器和观察者不计入，
+        不刷新会话的访问时间
+
+        Returns:
+            Dict[str, int]: 各部分的字节数，total为合计
+
+        Raises:
+            KeyError: 会话不存在或已过期
+        """
+        with self._lock:
+            exercise = self._sessions[session_id]
+        return self._measure(exercise)
+
+    def memory_report(self) -> Dict[str, int]:
+        """全部会话的内存概况，不刷新会话的访问时间
+
+        Returns:
+            Dict[str, int]: 会话数、共用的生成器数、去重后的题目数、
+                会话独占内存的合计与平均值（字节）、累计过期的会话数
+        """
+        with self._lock:
+            exercises = list(self._sessions.values())
+        session_bytes = sum(self._measure(exercise)["total"] for exercise in exercises)
+        return {
+            "sessions": len(exercises),
+            "generators": len(self._generators),
+            "unique_questions": len(self._questions),
+            "session_bytes": session_bytes,
+            "bytes_per_session": session_bytes // max(len(exercises), 1),
+            "expired": self.expired,
+        }
+
+    @staticmethod
+    def _measure(exercise: Exercise) -> Dict[str, int]:
+        report = {
+            "exercise": sys.getsizeof(exercise) + sys.getsizeof(vars(exercise)),
+            "questions": sys.getsizeof(exercise.questions),
+            "question_keys": sys.getsizeof(exercise.question_keys),
+            "answer_log": exercise.answer_log.nbytes(),
+            "correct_answers": sys.getsizeof(exercise._correct_answers),
+        }
+        report["total"] = sum(report.values())
+        return report
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: Hashable) -> bool:
+        return session_id in self._sessions
+
+    def _get_generator(
+        self,
+        difficulty: DifficultyLevel,
+        number_range: Tuple[int, int],
+        operators: List[OperatorType],
+        operand_count: Optional[int],
+    ) -> LockedQuestionGenerator:
+        """获取相同配置共用的问题生成器"""
+        key = (difficulty, tuple(number_range), tuple(operators), operand_count)
+        with self._lock:
+            generator = self._generators.get(key)
+        if generator is None:
+            generator = LockedQuestionGenerator(
+                self.factory_cache.get_generator(
+                    difficulty, number_range, operators, operand_count=operand_count
+                )
+            )
+            with self._lock:
+                generator = self._generators.setdefault(key, generator)
+        return generator
+
+    def _intern_questions(self, exercise: Exercise):
+        """把会话的题目替换为内容相同的已有题目"""
+        with self._lock:
+            questions = exercise.questions
+            for i, question in enumerate(questions):
+                questions[i] = self._questions.setdefault(question.content, question)
+        # 规范形式也改为引用共用题目中的字符串
+        exercise.question_keys = {question.canonical_key for question in questions}
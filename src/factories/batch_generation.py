@@ -0,0 +1,376 @@
+"""
+批量题目生成模块
+
+本模块为算术题工厂提供向量化的批量生成内核，主要功能：
+1. 以NumPy数组一次性抽取整批题目的根结果、运算符和操作数拆分
+2. 对加、减、除法的拆分做逐元素的向量化计算，乘法沿用工厂的因数搜索
+3. 仅在最后一步把数组结果组装成Question对象
+4. 向量化拆分失败的行不重试，改由工厂按可行性表逐题生成
+
+核心类：
+- VectorizedBatchKernel：批量生成内核，与具体工厂绑定，复用其数值范围和运算符配置
+
+内核保持与QuestionFactory._generate_operands相同的范围和整除约束：
+所有节点的值都落在[min_num, max_num]内，乘法不使用±1作为因数，
+除法的商不为0或±1、除数的绝对值不小于2且被除数在范围内。
+"""
+
+from typing import List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from ..models.question import Question, OperatorType
+from ..models.arithmetic_tree import ArithmeticTree, OPERATOR_CODES, LEAF
+from .sampling import AliasSampler, UniformPool
+
+if TYPE_CHECKING:
+    from .concrete_factories import ArithmeticQuestionFactory
+
+
+# 运算符在数组中的编码与ArithmeticTree一致，LEAF表示叶节点（没有运算符）
+ADD = OPERATOR_CODES.index(OperatorType.ADDITION)
+SUB = OPERATOR_CODES.index(OperatorType.SUBTRACTION)
+MUL = OPERATOR_CODES.index(OperatorType.MULTIPLICATION)
+DIV = OPERATOR_CODES.index(OperatorType.DIVISION)
+
+
+class VectorizedBatchKernel:
+    """向量化批量生成内核
+
+    一批n道题的表达式树用形如(n, 节点数)的数组表示：
+    values存储各节点的值，operators存储运算符编码，lefts/rights存储子节点下标。
+    第s步扩展时新建的两个子节点下标固定为2s-1和2s，根节点下标为0。
+    """
+
+    def __init__(self, factory: "ArithmeticQuestionFactory"):
+        self.factory = factory
+        # 每批生成前由工厂的随机数生成器重新派生，见generate
+        self.rng = None
+        # 工厂允许的运算符编码
+        self.operator_codes = np.array(
+            [OPERATOR_CODES.index(op) for op in factory.operators], dtype=np.int8
+        )
+        # 可行性表判定能作为根的运算符编码
+        self.root_operator_codes = np.array(
+            [OPERATOR_CODES.index(op) for op in factory.feasibility.root_operators],
+            dtype=np.int8,
+        )
+
+    def generate(self, count: int) -> List[Question]:
+        """生成一批题目
+
+        Args:
+            count: 题目数量
+
+        Returns:
+            List[Question]: 生成的题目列表
+        """
+        if count <= 0:
+            return []
+
+        # 由工厂的随机数生成器派生本批的种子，工厂重设种子后结果可复现
+        self.rng = np.random.default_rng(self.factory.rng.getrandbits(64))
+
+        operand_count = self.factory._get_operand_count()
+        node_count = 2 * operand_count - 1
+        rows = np.arange(count)
+
+        values = np.zeros((count, node_count), dtype=np.int64)
+        operators = np.full((count, node_count), LEAF, dtype=np.int8)
+        lefts = np.full((count, node_count), -1, dtype=np.int32)
+        rights = np.full((count, node_count), -1, dtype=np.int32)
+        # 按扩展顺序记录每道题实际使用的运算符
+        used_operators = np.empty((count, operand_count - 1), dtype=np.int8)
+
+        stats = self.factory.stats
+        # 根节点：随机运算符和对应的合适结果
+        with stats.timer("batch.sample_result"):
+            operators[:, 0] = self._random_operators(count, self.root_operator_codes)
+            values[:, 0] = self._sample_results(operators[:, 0])
+        # 向量化拆分失败的行，最后改由工厂逐题生成
+        failed = np.zeros(count, dtype=bool)
+
+        # 未完成节点的下标，第s步开始时每行恰好有s个
+        incomplete = np.zeros((count, operand_count), dtype=np.int32)
+
+        with stats.timer("batch.split_operands"):
+            for step in range(1, operand_count):
+                if step == 1:
+                    # 根节点的运算符已经确定
+                    positions = np.zeros(count, dtype=np.int64)
+                    node_operators = operators[:, 0].copy()
+                else:
+                    # 只在还能拆分的未完成节点中选择，并在可行的运算符中选择一个
+                    candidates = self._operator_candidates(
+                        values[rows[:, None], incomplete[:, :step]]
+                    )
+                    expandable = candidates.any(axis=2)
+                    failed |= ~expandable.any(axis=1)
+                    positions = self._random_choice(expandable)
+                    choices = self._random_choice(candidates[rows, positions])
+                    node_operators = self.operator_codes[choices]
+
+                # 用末尾元素覆盖选中的节点（交换删除）
+                nodes = incomplete[rows, positions]
+                incomplete[rows, positions] = incomplete[:, step - 1]
+                node_values = values[rows, nodes]
+
+                left_values, right_values, ok = self._split(node_operators, node_values)
+                failed |= ~ok
+                operators[rows, nodes] = node_operators
+                used_operators[:, step - 1] = node_operators
+
+                left_index, right_index = 2 * step - 1, 2 * step
+                values[:, left_index] = left_values
+                values[:, right_index] = right_values
+                lefts[rows, nodes] = left_index
+                rights[rows, nodes] = right_index
+
+                # 新的子节点成为未完成节点
+                if step < operand_count - 1:
+                    incomplete[:, step - 1] = left_index
+                    incomplete[:, step] = right_index
+
+        with stats.timer("batch.build"):
+            questions = self._build_questions(
+                values, operators, lefts, rights, used_operators, failed
+            )
+        # 失败的行按可行性表逐题生成，不会再失败
+        fallback = np.flatnonzero(failed)
+        stats.count("questions", count - len(fallback))
+        stats.count("failures.batch", len(fallback))
+        for i in fallback:
+            questions[i] = self.factory.create_question()
+        return questions
+
+    def _random_operators(self, size: int, codes: np.ndarray) -> np.ndarray:
+        """从给定的运算符编码中随机选择size个"""
+        return codes[self.rng.integers(0, len(codes), size=size)]
+
+    def _random_choice(self, mask: np.ndarray) -> np.ndarray:
+        """在最后一维为True的位置中均匀选择一个，全为False时返回0"""
+        keys = self.rng.random(mask.shape)
+        keys[~mask] = -1.0
+        return keys.argmax(axis=-1)
+
+    def _operator_candidates(self, values: np.ndarray) -> np.ndarray:
+        """判断每个值能否用各个运算符拆分，对应FeasibilityTable.is_splittable
+
+        乘法只检查值是否为合数，合数的因数不在范围内时留给拆分时判断
+
+        Returns:
+            形如values.shape + (运算符个数,)的布尔数组
+        """
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        candidates = np.zeros(values.shape + (len(self.operator_codes),), dtype=bool)
+        for j, code in enumerate(self.operator_codes.tolist()):
+            if code == ADD:
+                candidates[..., j] = (values >= 2 * min_num) & (values <= 2 * max_num)
+            elif code == SUB:
+                candidates[..., j] = (values >= min_num - max_num) & (
+                    values <= max_num - min_num
+                )
+            elif code == MUL:
+                candidates[..., j] = self._maybe_composite(values)
+            elif code == DIV:
+                _, pos_count, _, neg_count = self._divisor_intervals(values)
+                candidates[..., j] = pos_count + neg_count > 0
+        return candidates
+
+    def _maybe_composite(self, values: np.ndarray) -> np.ndarray:
+        """值为0或合数；超出最小质因数表的值无法判断，一律视为可能"""
+        spf = np.frombuffer(self.factory._get_spf_table(), dtype=np.int32)
+        magnitude = np.abs(values)
+        inside = magnitude < len(spf)
+        composite = spf[np.where(inside, magnitude, 0)] != 0
+        return (values == 0) | composite | ~inside
+
+    def _sample_results(self, operators: np.ndarray) -> np.ndarray:
+        """为每个根运算符抽取合适的结果值，对应FeasibilityTable中根结果的抽取"""
+        results = np.zeros(len(operators), dtype=np.int64)
+
+        # 加法和减法：在可拆分的结果中均匀抽取
+        for code, operator in (
+            (ADD, OperatorType.ADDITION),
+            (SUB, OperatorType.SUBTRACTION),
+        ):
+            mask = operators == code
+            if mask.any():
+                interval = self.factory.feasibility.root_interval(operator)
+                results[mask] = self.rng.integers(
+                    interval.start, interval.stop, size=mask.sum()
+                )
+
+        # 乘法：在合数中均匀抽取
+        mask = operators == MUL
+        if mask.any():
+            sampler = self.factory._get_composite_sampler()
+            if not sampler:
+                raise ValueError("无法生成合适的操作数")
+            if isinstance(sampler, UniformPool):
+                pool = np.frombuffer(sampler.values, dtype=np.int64)
+                results[mask] = pool[self.rng.integers(0, len(pool), size=mask.sum())]
+            else:
+                # 超大范围下逐个拒绝采样
+                results[mask] = [
+                    sampler.sample(self.factory.rng) for _ in range(mask.sum())
+                ]
+
+        # 除法：按每个商对应的除数个数加权抽取，与工厂共用同一个抽样器
+        mask = operators == DIV
+        if mask.any():
+            sampler = self.factory._get_quotient_sampler()
+            if not sampler:
+                raise ValueError("无法生成合适的操作数")
+            if isinstance(sampler, AliasSampler):
+                values = np.frombuffer(sampler.values, dtype=np.int64)
+                thresholds = np.frombuffer(sampler.thresholds, dtype=np.int64)
+                aliases = np.frombuffer(sampler.aliases, dtype=np.int64)
+                size = mask.sum()
+                buckets = self.rng.integers(0, len(values), size=size)
+                keep = (
+                    self.rng.integers(0, sampler.total_weight, size=size)
+                    < thresholds[buckets]
+                )
+                results[mask] = values[np.where(keep, buckets, aliases[buckets])]
+            else:
+                results[mask] = [
+                    sampler.sample(self.factory.rng) for _ in range(mask.sum())
+                ]
+
+        return results
+
+    def _split(self, operators: np.ndarray, results: np.ndarray):
+        """向量化的操作数拆分，对应QuestionFactory._generate_operands
+
+        Returns:
+            (left, right, ok)：ok为False的行表示无法拆分
+        """
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        size = len(results)
+        left = np.zeros(size, dtype=np.int64)
+        right = np.zeros(size, dtype=np.int64)
+        ok = np.zeros(size, dtype=bool)
+
+        # 加法：a + b = result，left在[max(result-max, min), min(result-min, max)]内
+        mask = operators == ADD
+        if mask.any():
+            r = results[mask]
+            low = np.maximum(r - max_num, min_num)
+            high = np.minimum(r - min_num, max_num)
+            valid = low <= high
+            a = self._uniform(low, high, valid)
+            left[mask], right[mask], ok[mask] = a, r - a, valid
+
+        # 减法：a - b = result，left在[max(min, result+min), min(max, result+max)]内
+        mask = operators == SUB
+        if mask.any():
+            r = results[mask]
+            low = np.maximum(min_num, r + min_num)
+            high = np.minimum(max_num, r + max_num)
+            valid = low <= high
+            a = self._uniform(low, high, valid)
+            left[mask], right[mask], ok[mask] = a, a - r, valid
+
+        # 乘法：因数搜索难以向量化，逐个交给工厂处理
+        for i in np.flatnonzero(operators == MUL):
+            a, b = self.factory._generate_operands(
+                OperatorType.MULTIPLICATION, int(results[i])
+            )
+            if a is not None and b is not None:
+                left[i], right[i], ok[i] = a, b, True
+
+        # 除法：a ÷ b = result
+        mask = operators == DIV
+        if mask.any():
+            a, b, valid = self._split_division(results[mask])
+            left[mask], right[mask], ok[mask] = a, b, valid
+
+        return left, right, ok
+
+    def _divisor_intervals(self, results: np.ndarray):
+        """每个商对应的除数区间，区间内的除数都能使被除数落在范围内
+
+        与QuestionFactory._get_divisor_ranges相同，至多两段区间，
+        只保留使被除数也在范围内的部分
+
+        Returns:
+            (pos_low, pos_count, neg_low, neg_count)：两段区间的起点和长度
+        """
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        zeros = np.zeros(results.shape, dtype=np.int64)
+        # 商为0或±1时不生成；用2占位避免除零
+        usable = np.abs(results) >= 2
+        safe = np.where(usable, results, 2)
+
+        if min_num >= 0:
+            # 范围全为非负数：除数取[max(2, ceil(min/result)), floor(max/result)]
+            low = np.maximum(2, -(-min_num // safe))
+            count = np.maximum(max_num // safe - low + 1, 0)
+            return low, np.where(usable & (safe > 0), count, 0), zeros, zeros
+        if max_num <= 0:
+            # 全负数范围不可能满足要求
+            return zeros, zeros, zeros, zeros
+
+        # 范围跨越0：被除数的符号由除数决定，正负两部分各一段区间
+        magnitude = np.abs(safe)
+        pos_max_divisor = max_num // magnitude
+        neg_max_divisor = -min_num // magnitude
+        pos_count = np.where(usable, np.maximum(pos_max_divisor - 1, 0), 0)
+        neg_count = np.where(usable, np.maximum(neg_max_divisor - 1, 0), 0)
+        # 正数部分：正商对应正除数[2, pos_max]，负商对应负除数[-pos_max, -2]
+        pos_low = np.where(safe > 0, 2, -pos_max_divisor)
+        # 负数部分：负商对应正除数[2, neg_max]，正商对应负除数[-neg_max, -2]
+        neg_low = np.where(safe < 0, 2, -neg_max_divisor)
+        return pos_low, pos_count, neg_low, neg_count
+
+    def _split_division(self, results: np.ndarray):
+        """向量化的除法拆分：在使被除数落在范围内的除数中均匀抽取"""
+        pos_low, pos_count, neg_low, neg_count = self._divisor_intervals(results)
+        total = pos_count + neg_count
+        valid = total > 0
+        k = self._uniform(np.zeros(len(results), dtype=np.int64), total - 1, valid)
+        divisors = np.where(k < pos_count, pos_low + k, neg_low + k - pos_count)
+        return results * divisors, divisors, valid
+
+    def _uniform(self, low: np.ndarray, high: np.ndarray, valid: np.ndarray):
+        """在每行的[low, high]内均匀抽取整数，valid为False的行返回low"""
+        span = np.where(valid, high - low + 1, 1)
+        return low + self.rng.integers(0, span)
+
+    def _build_questions(
+        self, values, operators, lefts, rights, used_operators, failed
+    ) -> List[Optional[Question]]:
+        """把数组形式的表达式树组装成Question对象，失败的行对应None"""
+        questions = []
+        for (
+            row_values,
+            row_operators,
+            row_lefts,
+            row_rights,
+            row_used,
+            row_failed,
+        ) in zip(
+            values.tolist(),
+            operators.tolist(),
+            lefts.tolist(),
+            rights.tolist(),
+            used_operators.tolist(),
+            failed.tolist(),
+        ):
+            if row_failed:
+                questions.append(None)
+                continue
+            # 子节点的下标总是大于父节点，数组可以直接作为ArithmeticTree的存储
+            tree = ArithmeticTree.from_arrays(
+                row_values, row_operators, row_lefts, row_rights
+            )
+            questions.append(
+                Question(
+                    content=tree.get_arithmetic(),
+                    answer=tree.evaluate(),
+                    operator_types=[OPERATOR_CODES[code] for code in row_used],
+                    canonical_key=tree.canonical_key(),
+                )
+            )
+        return questions
@@ -8,105 +8,152 @@
 
 核心类：
 - ArithmeticQuestionFactory：算术题目工厂，负责生成具体的算术题目
+- UniformArithmeticQuestionFactory：在全部合法题目中均匀抽样的算术题目工厂
 - QuestionGenerator：工厂类的包装器，提供更简单的接口来生成题目
+- LockedQuestionGenerator：在锁内生成题目的包装器，供多个线程共用一个生成器
+
+安装了NumPy时，批量生成（generate_batch）使用向量化内核，否则逐题生成。
 """
 
 # 导入所需的库
-import random
-from typing import List
+import threading
+from typing import Iterator, List, Optional, Set
 from collections import deque
 from ..models.question import Question, OperatorType, DifficultyLevel
 from .question_factory import QuestionFactory
-from ..models.arithmetic_tree import ArithmeticNode
+from .expression_evaluator import evaluate_expression
+from .table_cache import PrecomputedTableCache
+from .expression_counts import ExpressionCounts
+
+# 检查是否安装了NumPy，批量生成的向量化内核依赖它
+HAS_NUMPY = False
+
+try:
+    from .batch_generation import VectorizedBatchKernel
+
+    HAS_NUMPY = True
+except ImportError:
+    pass
 
 
 class ArithmeticQuestionFactory(QuestionFactory):
+    # 批量生成内核，缓存了合数池和除法商的权重表，首次批量生成时创建
+    _batch_kernel = None
+
+    def clone(self, seed: Optional[int] = None) -> "ArithmeticQuestionFactory":
+        """复制一个配置相同的工厂，批量生成内核绑定了工厂的随机数，不共享"""
+        factory = super().clone(seed)
+        factory._batch_kernel = None
+        return factory
+
     def create_question(self) -> Question:
         """创建一个新的算术题
         根据工厂的配置（难度、数值范围、运算符）生成一个完整的算术表达式题目
+
+        运算符和操作数只在可行性表判定可行的选择中抽取，生成过程不需要重试
         """
-        # 获取根据难度确定的操作数个数
-        operand_count = self._get_operand_count()
-        # 用于存储所有未完成（需要继续处理）的节点
-        incomplete_nodes = []
+        feasibility = self.feasibility
+        stats = self.stats
+        # 还需要进行的运算次数
+        remaining = self._get_operand_count() - 1
 
-        # 随机选择初始运算符和生成合适的结果值
-        initial_operator = self._get_random_operator()
-        initial_result = self._get_suitable_result(initial_operator)
+        # 选择可行的根运算符和结果，保证能够容纳全部运算
+        with stats.timer("sample_result"):
+            initial_operator, initial_result = feasibility.choose_root()
 
-        # 创建算术树的根节点，使用初始结果值和运算符
-        root_node = ArithmeticNode(operand=initial_result, operator=initial_operator)
-        self.tree.root = root_node
-        incomplete_nodes.append(root_node)
+        # 创建算术树的根节点（下标为0），根运算符已经确定
+        tree = self.tree
+        tree.clear()
+        tree.add_leaf(initial_result)
+        # 待扩展节点的下标、容量（以该节点为根还能进行的运算次数）和已确定的运算符
+        incomplete_nodes = [0]
+        capacities = [remaining]
+        total_capacity = remaining
+        chosen_operator = {0: initial_operator}
 
-        count = 1  # 当前已处理的操作数计数
         operators = []  # 记录使用的运算符列表
-        check = False  # 用于Debug的标志（当前未使用）
-
-        # 继续生成节点，直到达到所需的操作数个数
-        while count < operand_count:
-            # 从未完成节点列表中随机选择一个节点进行处理
-            current_node = random.choice(incomplete_nodes)
-            incomplete_nodes.remove(current_node)  # 移除已选择的节点
-            operator = current_node.operator
-            operand = current_node.operand
-
-            # 为当前节点创建左右子节点
-            left_node = ArithmeticNode(0)
-            right_node = ArithmeticNode(0)
-            # 如果还需要继续添加操作数，则为新节点分配运算符
-            left_node.operator = (
-                self._get_random_operator() if count < operand_count - 1 else None
-            )
-            right_node.operator = (
-                self._get_random_operator() if count < operand_count - 1 else None
-            )
 
-            # 初始化左右操作数为None
-            left_num, right_num = None, None
-            retry_count = 0  # 重试计数器
-            max_retries = 10  # 最大重试次数
-
-            # 尝试生成合适的操作数
-            while (left_num is None or right_num is None) and retry_count < max_retries:
-                left_num, right_num = self._generate_operands(operator, operand)
-                if left_num is None or right_num is None:
-                    # 如果生成失败，重新选择运算符再试
-                    current_node.operator = self._get_random_operator()
-                    operator = current_node.operator
-                retry_count += 1
-
-            # 如果达到最大重试次数仍然失败，抛出异常
-            if retry_count >= max_retries:
-                raise ValueError("无法生成合适的操作数")
-
-            operators.append(operator)  # 记录使用的运算符
-
-            # 设置左右子节点的值
-            left_node.operand = left_num
-            right_node.operand = right_num
-            current_node.set_left_node(left_node)
-            current_node.set_right_node(right_node)
-
-            # 如果还需要继续生成节点，将新生成的有运算符的节点加入待处理列表
-            if count < operand_count - 1:
-                if left_node.operator is not None:
-                    incomplete_nodes.append(left_node)
-                if right_node.operator is not None:
-                    incomplete_nodes.append(right_node)
-
-            count += 1  # 更新操作数计数
+        # 继续扩展节点，直到达到所需的运算次数
+        with stats.timer("split_operands"):
+            while remaining > 0:
+                # 随机选择一个待扩展的节点，用末尾元素覆盖它（交换删除）
+                index = self.rng.randrange(len(incomplete_nodes))
+                current_node = incomplete_nodes[index]
+                capacity = capacities[index]
+                incomplete_nodes[index] = incomplete_nodes[-1]
+                capacities[index] = capacities[-1]
+                incomplete_nodes.pop()
+                capacities.pop()
+                remaining -= 1
 
+                # 其余节点容纳不下的运算，必须由当前节点的子节点承担
+                others = total_capacity - capacity
+                need = max(0, remaining - others)
+
+                operand = tree.operands[current_node]
+                operator = chosen_operator.pop(current_node, None)
+                if operator is None:
+                    operator = feasibility.choose_operator(operand, need)
+                operators.append(operator)  # 记录使用的运算符
+
+                # 在满足容量要求的拆分中抽取左右操作数
+                left_num, right_num = feasibility.choose_split(operator, operand, need)
+                children = tree.split(current_node, operator, left_num, right_num)
+
+                # 还能继续拆分的子节点成为待扩展节点
+                total_capacity = others
+                if remaining > 0:
+                    for child, child_operand in zip(children, (left_num, right_num)):
+                        child_capacity = feasibility.capacity(child_operand, remaining)
+                        if child_capacity > 0:
+                            incomplete_nodes.append(child)
+                            capacities.append(child_capacity)
+                            total_capacity += child_capacity
+
+        return self._finish_question(operators)
+
+    def _finish_question(self, operators: List[OperatorType]) -> Question:
+        """把self.tree中生成好的表达式树组装成Question对象"""
+        tree = self.tree
+        stats = self.stats
         # 生成算术表达式字符串
-        arithmetic = self.tree.get_arithmetic()
-        # 计算表达式结果
-        result = self._calculate_result(arithmetic)
+        with stats.timer("render"):
+            arithmetic = tree.get_arithmetic()
+        # 根节点的值就是表达式的结果，无需解析字符串
+        with stats.timer("evaluate"):
+            result = tree.evaluate()
+            canonical_key = tree.canonical_key()
+        stats.count("questions")
         # 创建并返回Question对象
-        return Question(content=arithmetic, answer=result, operator_types=operators)
+        return Question(
+            content=arithmetic,
+            answer=result,
+            operator_types=operators,
+            canonical_key=canonical_key,
+        )
+
+    def generate_batch(self, count: int) -> List[Question]:
+        """批量创建count道算术题
+
+        安装了NumPy时，整批题目的结果、运算符和操作数拆分以数组形式一次性抽取，
+        最后才组装成Question对象；否则退化为逐题调用create_question。
+
+        Args:
+            count: 题目数量
+
+        Returns:
+            List[Question]: 生成的题目列表
+        """
+        if not HAS_NUMPY:
+            return [self.create_question() for _ in range(count)]
+
+        if self._batch_kernel is None:
+            self._batch_kernel = VectorizedBatchKernel(self)
+        return self._batch_kernel.generate(count)
 
     def _calculate_result(self, expression: str) -> float:
-        """计算表达式的结果
-        注：实际应用中应该实现一个安全的表达式计算器
+        """计算表达式字符串的结果
+        生成题目时直接使用表达式树的值，本方法供只有字符串的调用方使用
 
         Args:
             expression (str): 要计算的表达式字符串
@@ -114,19 +161,81 @@ class ArithmeticQuestionFactory(QuestionFactory):
         Returns:
             float: 表达式的计算结果
         """
-        # 将除号替换为Python的除法运算符，然后使用eval计算
-        # 注意：这种方法不安全，实际应用中应该使用更安全的实现
-        return eval(expression.replace("÷", "/"))
+        # 使用安全的表达式计算器，不经过eval
+        return evaluate_expression(expression)
+
+
+class UniformArithmeticQuestionFactory(ArithmeticQuestionFactory):
+    """均匀抽样的算术题目工厂
+
+    ArithmeticQuestionFactory逐步随机选择节点、运算符和拆分方式，
+    不同题目被抽中的概率并不相同。本工厂先用动态规划统计每个子树的合法表达式个数，
+    再按个数自顶向下抽取，每棵合法的表达式树被抽中的概率都相同。
+    每道题的耗时与树的规模成正比，不需要拒绝或重试。
+
+    计数表的大小约为数值范围大小的平方，只适用于不太大的范围，
+    见ExpressionCounts.MAX_RANGE_SIZE。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 构建时即完成根节点的计数，范围过大时直接抛出异常
+        self.counts = ExpressionCounts(self)
+
+    def clone(self, seed: Optional[int] = None) -> "UniformArithmeticQuestionFactory":
+        """复制一个配置相同的工厂，共享计数表"""
+        factory = super().clone(seed)
+        factory.counts = self.counts.bind(factory)
+        return factory
+
+    def create_question(self) -> Question:
+        """均匀地抽取一道算术题"""
+        counts = self.counts
+        stats = self.stats
+        tree = self.tree
+        tree.clear()
+        with stats.timer("sample_result"):
+            tree.add_leaf(counts.root_sampler.sample(self.rng))
+
+        operators = []  # 记录使用的运算符列表
+        # 待扩展的节点下标及其子树包含的运算次数
+        pending = [(0, counts.depth)]
+        with stats.timer("split_operands"):
+            while pending:
+                index, k = pending.pop()
+                operator, left, right, left_k = counts.sample_split(
+                    k, tree.operands[index]
+                )
+                operators.append(operator)
+                left_index, right_index = tree.split(index, operator, left, right)
+                if k - 1 - left_k > 0:
+                    pending.append((right_index, k - 1 - left_k))
+                if left_k > 0:
+                    pending.append((left_index, left_k))
+
+        return self._finish_question(operators)
+
+    def generate_batch(self, count: int) -> List[Question]:
+        """批量创建count道算术题，向量化内核不满足均匀分布，逐题生成"""
+        return [self.create_question() for _ in range(count)]
 
 
 class QuestionGenerator:
     """问题生成器类，封装了工厂的创建和使用"""
 
+    # 生成不重复的题目时，连续这么多道题都重复即认为题目空间已耗尽
+    UNIQUE_STALL_LIMIT = 1000
+
     def __init__(
         self,
         difficulty: DifficultyLevel,
         number_range: tuple[int, int],
         operators: List[OperatorType],
+        lazy_threshold: Optional[int] = None,
+        table_cache: Optional[PrecomputedTableCache] = None,
+        seed: Optional[int] = None,
+        uniform: bool = False,
+        operand_count: Optional[int] = None,
     ):
         """初始化问题生成器
 
@@ -134,9 +243,34 @@ class QuestionGenerator:
             difficulty: 难度级别
             number_range: 数值范围的元组(最小值, 最大值)
             operators: 允许使用的运算符列表
+            lazy_threshold: 惰性阈值，范围超过它时不再预先构建合数表等，
+                默认为QuestionFactory.LAZY_RANGE_THRESHOLD
+            table_cache: 预计算表的磁盘缓存，默认为QuestionFactory.table_cache
+            seed: 随机种子，相同的种子和配置生成相同的题目序列
+            uniform: 是否在全部合法题目中均匀抽样，只适用于不太大的数值范围，
+                见UniformArithmeticQuestionFactory
+            operand_count: 每道题的操作数个数，默认由难度决定（2、3或4个）
         """
         # 创建具体的算术题工厂实例
-        self.factory = ArithmeticQuestionFactory(difficulty, number_range, operators)
+        factory_class = (
+            UniformArithmeticQuestionFactory if uniform else ArithmeticQuestionFactory
+        )
+        self.factory = factory_class(
+            difficulty,
+            number_range,
+            operators,
+            lazy_threshold,
+            table_cache,
+            seed,
+            operand_count,
+        )
+
+    @classmethod
+    def from_factory(cls, factory: ArithmeticQuestionFactory) -> "QuestionGenerator":
+        """包装一个已有的工厂，例如FactoryCache中复制出的工厂"""
+        generator = cls.__new__(cls)
+        generator.factory = factory
+        return generator
 
     def generate_question(self) -> Question:
         """生成一个新的问题
@@ -146,3 +280,106 @@ class QuestionGenerator:
         """
         # 通过工厂创建并返回一个新的问题
         return self.factory.create_question()
+
+    def generate_batch(self, count: int) -> List[Question]:
+        """批量生成count个问题
+
+        Args:
+            count: 问题数量
+
+        Returns:
+            List[Question]: 生成的问题列表
+        """
+        return self.factory.generate_batch(count)
+
+    def generate_unique_batch(
+        self, count: int, seen: Optional[Set[str]] = None
+    ) -> List[Question]:
+        """批量生成count个互不重复、也不与seen中的题目重复的问题
+
+        交换律和结合律下等价的题目（如"3 + 4"和"4 + 3"、"(1 + 2) + 3"和"1 + (2 + 3)"）
+        视为重复
+
+        Args:
+            count: 问题数量
+            seen: 已有题目的规范形式，本方法不修改它
+
+        Returns:
+            List[Question]: 生成的问题列表
+
+        Raises:
+            ValueError: 题目空间不足以容纳count道不重复的题目
+        """
+        seen = set() if seen is None else seen
+        bound = self.factory.expression_space_bound()
+        if len(seen) + count > bound:
+            raise ValueError(
+                f"当前配置最多只有{bound}道不同的题目，无法再生成{count}道不重复的题目"
+            )
+
+        questions = []
+        keys = set()
+        stale = 0
+        while len(questions) < count:
+            for question in self.generate_batch(count - len(questions)):
+                key = question.canonical_key
+                if key in seen or key in keys:
+                    stale += 1
+                    if stale >= self.UNIQUE_STALL_LIMIT:
+                        raise ValueError(
+                            f"连续{stale}道题都与已有题目重复，"
+                            f"当前配置的题目空间不足以生成{count}道不重复的题目"
+                        )
+                    continue
+                stale = 0
+                keys.add(key)
+                questions.append(question)
+        return questions
+
+    def stream(self, lookahead: int = 16) -> Iterator[Question]:
+        """无限地逐个产出问题，只预先生成有限个
+
+        缓冲区取空时才批量补充lookahead个问题，内存占用与已产出的数量无关
+
+        Args:
+            lookahead: 预先生成的问题个数上限
+
+        Returns:
+            Iterator[Question]: 问题的无限迭代器
+        """
+        if lookahead <= 0:
+            raise ValueError("预生成的问题个数必须为正数")
+
+        buffer = deque(maxlen=lookahead)
+        while True:
+            if not buffer:
+                buffer.extend(self.generate_batch(lookahead))
+            yield buffer.popleft()
+
+
+class LockedQuestionGenerator(QuestionGenerator):
+    """在锁内生成题目的问题生成器，可由多个线程中的练习共用
+
+    generate_question和generate_batch在锁内执行，不重复的批量生成和流式生成
+    都经由generate_batch，每一批题目在锁内一次生成。按种子生成时练习使用工厂的副本，
+    不需要加锁。
+    """
+
+    def __init__(
+        self, generator: QuestionGenerator, lock: Optional[threading.Lock] = None
+    ):
+        """
+        Args:
+            generator: 被共用的问题生成器
+            lock: 保护生成器的锁，默认新建一个
+        """
+        self.factory = generator.factory
+        self.lock = threading.Lock() if lock is None else lock
+
+    def generate_question(self) -> Question:
+        with self.lock:
+            return super().generate_question()
+
+    def generate_batch(self, count: int) -> List[Question]:
+        with self.lock:
+            return super().generate_batch(count)
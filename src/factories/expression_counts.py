@@ -0,0 +1,154 @@
+"""
+表达式计数模块
+
+本模块统计每个结果值下合法表达式树的个数，并据此均匀抽取题目，主要功能：
+1. 动态规划计算N(k, v)：恰好包含k次运算、值为v的合法表达式树的个数
+2. 按子树的个数为权重，自顶向下抽取运算符、拆分方式和左右子树的运算次数
+3. 每棵合法的表达式树被抽中的概率都相同，抽样不需要拒绝和重试
+
+核心类：
+- ExpressionCounts：与具体工厂绑定的计数表和抽样表
+
+合法的表达式树与工厂的拆分规则一致：根节点的值在数值范围内，
+每个非叶节点的左右子节点是FeasibilityTable.iter_splits给出的操作数对之一。
+结构不同的树可能渲染成相同的字符串（如"1 + 2 + 3"），它们按不同的树计数。
+
+递推关系：N(0, v) = 1，
+N(k, v) = Σ_运算符 Σ_(l, r) Σ_{i=0}^{k-1} N(i, l) * N(k - 1 - i, r)。
+计数的代价约为数值范围大小的平方，只适用于不太大的范围。
+"""
+
+import copy
+from functools import lru_cache
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+from ..models.question import OperatorType
+from .sampling import AliasSampler
+
+if TYPE_CHECKING:
+    from .question_factory import QuestionFactory
+
+
+class ExpressionCounts:
+    """合法表达式树的计数表
+
+    N(k, v)在首次需要时计算并缓存；每个(k, v)的抽样表在首次抽样时构建，
+    把全部(运算符, 操作数对)按其子树个数加权，放进同一张别名表。
+    """
+
+    # 允许的数值范围大小（包含的整数个数）上限
+    MAX_RANGE_SIZE = 500
+    # 按(k, v)缓存的抽样表的条目数上限
+    TABLE_CACHE_SIZE = 4096
+    # 别名表使用64位整数存储权重，题目总数不能超过它
+    MAX_TOTAL = (1 << 63) - 1
+
+    def __init__(self, factory: "QuestionFactory"):
+        """
+        Args:
+            factory: 题目工厂，提供数值范围、运算符和可行性表
+
+        Raises:
+            ValueError: 数值范围过大，或题目总数超出别名表能表示的范围
+        """
+        size = factory.max_num - factory.min_num + 1
+        if size > self.MAX_RANGE_SIZE:
+            raise ValueError(
+                f"均匀抽样只支持不超过{self.MAX_RANGE_SIZE}个整数的数值范围，"
+                f"当前范围包含{size}个"
+            )
+
+        self.factory = factory
+        self.feasibility = factory.feasibility
+        self.depth = factory._get_operand_count() - 1
+        self.operators: Tuple[OperatorType, ...] = tuple(
+            dict.fromkeys(factory.operators)
+        )
+        self._counts: Dict[Tuple[int, int], int] = {}
+        self._split_sampler = lru_cache(maxsize=self.TABLE_CACHE_SIZE)(
+            self._build_split_sampler
+        )
+
+        # 根节点：按以各个值为根的表达式树个数加权
+        root_counts = [
+            (value, self.count(self.depth, value))
+            for value in range(factory.min_num, factory.max_num + 1)
+        ]
+        # 题目总数
+        self.total = sum(count for _, count in root_counts)
+        if self.total > self.MAX_TOTAL:
+            raise ValueError("当前配置的题目总数过多，无法均匀抽样")
+        self.root_sampler = AliasSampler(root_counts)
+
+    def bind(self, factory: "QuestionFactory") -> "ExpressionCounts":
+        """返回绑定到另一个工厂的副本，共享计数表和抽样表，抽样时使用factory的随机数"""
+        counts = copy.copy(self)
+        counts.factory = factory
+        return counts
+
+    def count(self, k: int, value: int) -> int:
+        """恰好包含k次运算、值为value的合法表达式树的个数"""
+        if k == 0:
+            return 1
+        key = (k, value)
+        total = self._counts.get(key)
+        if total is None:
+            total = 0
+            for operator in self.operators:
+                if not self.feasibility.is_splittable(operator, value):
+                    continue
+                for left, right in self.feasibility.iter_splits(operator, value):
+                    total += self._pair_count(k, left, right)
+            self._counts[key] = total
+        return total
+
+    def _pair_count(self, k: int, left: int, right: int) -> int:
+        """左右子节点为left、right，共包含k次运算（含当前节点）的树的个数"""
+        count = self.count
+        return sum(count(i, left) * count(k - 1 - i, right) for i in range(k))
+
+    def _build_split_sampler(
+        self, k: int, value: int
+    ) -> Tuple[AliasSampler, Tuple[Tuple[OperatorType, int], ...]]:
+        """构建(k, value)的抽样表
+
+        Returns:
+            别名表和各运算符在其中的起始位置；别名表的候选值是拼接后的位置，
+            运算符op的第j个操作数对的位置是op的起始位置加j
+        """
+        weights: List[Tuple[int, int]] = []
+        offsets = []
+        for operator in self.operators:
+            if not self.feasibility.is_splittable(operator, value):
+                continue
+            offsets.append((operator, len(weights)))
+            for left, right in self.feasibility.iter_splits(operator, value):
+                weights.append((len(weights), self._pair_count(k, left, right)))
+        return AliasSampler(weights), tuple(offsets)
+
+    def sample_split(self, k: int, value: int) -> Tuple[OperatorType, int, int, int]:
+        """按子树个数加权抽取value的运算符、操作数对和左子树的运算次数
+
+        Args:
+            k: 以value为根的子树包含的运算次数，不小于1
+            value: 节点的值，需满足count(k, value) > 0
+
+        Returns:
+            (运算符, 左操作数, 右操作数, 左子树的运算次数)
+        """
+        rng = self.factory.rng
+        sampler, offsets = self._split_sampler(k, value)
+        position = sampler.sample(rng)
+        for operator, start in reversed(offsets):
+            if position >= start:
+                break
+        left, right = self.feasibility.split_at(operator, value, position - start)
+
+        # 在左右子树的运算次数分配中按个数加权抽取
+        count = self.count
+        target = rng.randrange(self._pair_count(k, left, right))
+        for i in range(k):
+            target -= count(i, left) * count(k - 1 - i, right)
+            if target < 0:
+                return operator, left, right, i
+        raise AssertionError("计数表不一致")
@@ -0,0 +1,117 @@
+"""
+安全表达式计算模块
+
+本模块提供一个不依赖eval的四则运算表达式计算器，主要功能：
+1. 将表达式字符串切分为数字、运算符和括号
+2. 使用调度场算法按运算符优先级计算结果
+3. 只接受数字、+ - * / ÷ × 和括号，其余输入一律视为非法
+
+核心函数：
+- evaluate_expression：计算表达式字符串的值
+"""
+
+import re
+from fractions import Fraction
+from typing import List, Union
+
+# 数字、运算符和括号的词法规则，空白字符被跳过
+_TOKEN_PATTERN = re.compile(r"\s*(?:(\d+(?:\.\d*)?|\.\d+)|(.))")
+
+# 二元运算符的优先级
+_PRIORITIES = {"+": 1, "-": 1, "*": 2, "/": 2}
+
+# 一元负号的标记，优先级高于所有二元运算符
+_NEGATE = "neg"
+
+# 其他常见写法统一为Python风格的运算符
+_ALIASES = {"÷": "/", "×": "*"}
+
+
+def evaluate_expression(expression: str) -> Union[int, float]:
+    """安全地计算四则运算表达式
+
+    计算过程使用分数保证精确，结果为整数时返回int，否则返回float
+
+    Args:
+        expression: 表达式字符串，如"3 + (-2) * 4 ÷ 2"
+
+    Returns:
+        Union[int, float]: 表达式的计算结果
+
+    Raises:
+        ValueError: 表达式包含非法字符或语法错误
+        ZeroDivisionError: 表达式中出现除以0
+    """
+    values: List[Fraction] = []
+    operators: List[str] = []
+    # 当前位置是否期待一个操作数（用于区分负号和减号）
+    expect_operand = True
+
+    for number, symbol in _TOKEN_PATTERN.findall(expression.strip()):
+        if number:
+            if not expect_operand:
+                raise ValueError(f"表达式语法错误：{expression}")
+            values.append(Fraction(number))
+            expect_operand = False
+            continue
+
+        symbol = _ALIASES.get(symbol, symbol)
+        if symbol == "(":
+            if not expect_operand:
+                raise ValueError(f"表达式语法错误：{expression}")
+            operators.append(symbol)
+        elif symbol == ")":
+            if expect_operand:
+                raise ValueError(f"表达式语法错误：{expression}")
+            while operators and operators[-1] != "(":
+                _apply(operators.pop(), values)
+            if not operators:
+                raise ValueError(f"括号不匹配：{expression}")
+            operators.pop()
+        elif symbol in _PRIORITIES:
+            if expect_operand:
+                # 操作数位置上的负号是一元运算符，正号直接忽略
+                if symbol == "-":
+                    operators.append(_NEGATE)
+                elif symbol != "+":
+                    raise ValueError(f"表达式语法错误：{expression}")
+                continue
+            # 左结合：先计算栈顶优先级不低于当前运算符的运算
+            while operators and operators[-1] != "(" and (
+                operators[-1] == _NEGATE
+                or _PRIORITIES[operators[-1]] >= _PRIORITIES[symbol]
+            ):
+                _apply(operators.pop(), values)
+            operators.append(symbol)
+            expect_operand = True
+        else:
+            raise ValueError(f"表达式包含非法字符：{symbol!r}")
+
+    if expect_operand:
+        raise ValueError(f"表达式语法错误：{expression}")
+    while operators:
+        operator = operators.pop()
+        if operator == "(":
+            raise ValueError(f"括号不匹配：{expression}")
+        _apply(operator, values)
+
+    result = values.pop()
+    return int(result) if result.denominator == 1 else float(result)
+
+
+def _apply(operator: str, values: List[Fraction]):
+    """从操作数栈中取出操作数，计算后将结果压回栈中"""
+    if operator == _NEGATE:
+        values.append(-values.pop())
+        return
+
+    right = values.pop()
+    left = values.pop()
+    if operator == "+":
+        values.append(left + right)
+    elif operator == "-":
+        values.append(left - right)
+    elif operator == "*":
+        values.append(left * right)
+    else:
+        values.append(left / right)
@@ -0,0 +1,152 @@
+"""
+题目工厂缓存模块
+
+本模块按配置缓存已经构建好的题目工厂，主要功能：
+1. 以(难度, 数值范围, 运算符, ...)为键，保存预热过的原型工厂
+2. 每次获取时从原型复制一个新工厂：共享预计算表，随机状态相互独立
+3. 容量有限，超出时淘汰最久未使用的配置
+4. 线程安全，并统计命中、未命中和淘汰次数
+
+核心类：
+- FactoryCache：工厂缓存
+- FactoryCacheInfo：缓存的统计数据
+
+模块级的default_factory_cache供Exercise等调用方共用。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from ..models.question import OperatorType, DifficultyLevel
+from .concrete_factories import (
+    ArithmeticQuestionFactory,
+    QuestionGenerator,
+    UniformArithmeticQuestionFactory,
+)
+from .table_cache import PrecomputedTableCache
+
+
+class FactoryCacheInfo(NamedTuple):
+    """工厂缓存的统计数据，与functools.lru_cache的cache_info类似"""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class FactoryCache:
+    """按配置缓存原型工厂的LRU缓存
+
+    原型工厂只用于复制，从不直接生成题目，因此多个线程可以同时从缓存获取工厂；
+    复制出的工厂各自持有随机数生成器，只应在一个线程中使用。
+    """
+
+    # 默认缓存的配置个数
+    DEFAULT_MAXSIZE = 32
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Args:
+            maxsize: 缓存的配置个数上限，必须为正数
+        """
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须为正数")
+        self.maxsize = maxsize
+        self._factories: "OrderedDict[tuple, ArithmeticQuestionFactory]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_factory(
+        self,
+        difficulty: DifficultyLevel,
+        number_range: Tuple[int, int],
+        operators: List[OperatorType],
+        lazy_threshold: Optional[int] = None,
+        table_cache: Optional[PrecomputedTableCache] = None,
+        seed: Optional[int] = None,
+        uniform: bool = False,
+        operand_count: Optional[int] = None,
+    ) -> ArithmeticQuestionFactory:
+        """获取一个指定配置的新工厂，参数的含义与QuestionGenerator相同
+
+        Returns:
+            ArithmeticQuestionFactory: 从原型复制出的工厂，有独立的随机状态
+
+        Raises:
+            ValueError: 当前配置无法生成任何题目，此时不会缓存任何内容
+        """
+        key = (
+            difficulty,
+            tuple(number_range),
+            tuple(operators),
+            lazy_threshold,
+            None if table_cache is None else table_cache.directory,
+            uniform,
+            operand_count,
+        )
+
+        with self._lock:
+            prototype = self._factories.get(key)
+            if prototype is not None:
+                self._factories.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if prototype is None:
+            # 在锁外构建，构建较慢的配置不会阻塞其他配置的命中
+            factory_class = (
+                UniformArithmeticQuestionFactory
+                if uniform
+                else ArithmeticQuestionFactory
+            )
+            prototype = factory_class(
+                difficulty,
+                tuple(number_range),
+                list(operators),
+                lazy_threshold,
+                table_cache,
+                operand_count=operand_count,
+            )
+            prototype.warm_up()
+            with self._lock:
+                # 其他线程可能同时构建了同一配置，保留先放入的一个
+                prototype = self._factories.setdefault(key, prototype)
+                self._factories.move_to_end(key)
+                while len(self._factories) > self.maxsize:
+                    self._factories.popitem(last=False)
+                    self.evictions += 1
+
+        return prototype.clone(seed)
+
+    def get_generator(self, *args, **kwargs) -> QuestionGenerator:
+        """获取一个指定配置的新问题生成器，参数与get_factory相同"""
+        return QuestionGenerator.from_factory(self.get_factory(*args, **kwargs))
+
+    def cache_info(self) -> FactoryCacheInfo:
+        """返回缓存的统计数据"""
+        with self._lock:
+            return FactoryCacheInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                self.maxsize,
+                len(self._factories),
+            )
+
+    def clear(self):
+        """清空缓存和统计数据"""
+        with self._lock:
+            self._factories.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+# 进程内共用的工厂缓存
+default_factory_cache = FactoryCache()
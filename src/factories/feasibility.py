@@ -0,0 +1,364 @@
+"""
+可行性预计算模块
+
+本模块为题目工厂判断哪些(运算符, 结果)能够在数值范围内拆分，主要功能：
+1. 以闭式判断加、减、除法能否拆分，乘法借助工厂缓存的因数表
+2. 计算每个值最多还能容纳多少次拆分（容量），保证生成过程不会走进死路
+3. 只在可行的根运算符、根结果、运算符和拆分方式中抽样，生成过程无需重试
+
+核心类：
+- FeasibilityTable：与具体工厂绑定的可行性表，结果按值缓存
+
+一个值的容量是以它为根的子树最多能包含的运算次数（不超过所需的次数）。
+容量为c的值可以恰好容纳0到c之间的任意次数的运算：
+选出使容量最大的拆分后，把剩余的次数分配给左右子节点即可。
+因此只要待扩展节点的容量之和不小于剩余的运算次数，生成就一定能够完成。
+"""
+
+import copy
+from array import array
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple, TYPE_CHECKING
+
+from ..models.question import OperatorType
+from .sampling import AliasSampler, UniformPool
+
+if TYPE_CHECKING:
+    from .question_factory import QuestionFactory
+
+
+class FeasibilityTable:
+    """可行性表
+
+    构建时为每个运算符寻找一个可行的根结果，一个都找不到的运算符不会被选为根运算符；
+    所有运算符都不可行时，说明当前配置无法生成任何题目，直接抛出异常。
+    """
+
+    # 按值缓存的可行运算符和容量的条目数上限
+    CACHE_SIZE = 1 << 16
+    # 超大范围下寻找可行根结果时的抽样次数
+    WITNESS_SAMPLES = 64
+
+    def __init__(self, factory: "QuestionFactory"):
+        """
+        Args:
+            factory: 题目工厂，提供数值范围、运算符和拆分方法
+
+        Raises:
+            ValueError: 当前配置下没有任何可行的题目
+        """
+        self.factory = factory
+        # 每道题需要的运算次数
+        self.depth = factory._get_operand_count() - 1
+        # 计算容量时先尝试判断代价低的运算符，乘法需要因数分解，放在最后
+        self._operators_by_cost = sorted(
+            dict.fromkeys(factory.operators),
+            key=lambda op: op == OperatorType.MULTIPLICATION,
+        )
+        self.capacity = lru_cache(maxsize=self.CACHE_SIZE)(self._find_capacity)
+        self.split_capacity = lru_cache(maxsize=self.CACHE_SIZE)(
+            self._find_split_capacity
+        )
+        # 只包含可行根结果的抽样器，仅在直接抽样失败时构建
+        self._root_samplers = {}
+
+        self.root_operators: Tuple[OperatorType, ...] = tuple(
+            op for op in dict.fromkeys(factory.operators) if self._has_root(op)
+        )
+        if not self.root_operators:
+            raise ValueError("当前的数值范围和运算符无法生成任何题目")
+
+    def bind(self, factory: "QuestionFactory") -> "FeasibilityTable":
+        """返回绑定到另一个工厂的副本
+
+        副本与本表共享全部缓存（它们只取决于数值范围和运算符），
+        抽样时使用factory的随机数生成器；factory须与原工厂的配置相同
+        """
+        table = copy.copy(self)
+        table.factory = factory
+        return table
+
+    def is_splittable(self, operator: OperatorType, value: int) -> bool:
+        """判断value能否用operator拆分成两个合法的操作数"""
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        if operator == OperatorType.ADDITION:
+            # left在[max(value - max, min), min(value - min, max)]内
+            return 2 * min_num <= value <= 2 * max_num
+        if operator == OperatorType.SUBTRACTION:
+            # left在[max(min, value + min), min(max, value + max)]内
+            return min_num - max_num <= value <= max_num - min_num
+        if operator == OperatorType.MULTIPLICATION:
+            return value == 0 or bool(self.factory._multiplication_factors(value))
+        if operator == OperatorType.DIVISION:
+            return any(self._valid_divisors(value))
+        return False
+
+    def _valid_divisors(self, value: int) -> Tuple[range, ...]:
+        """商为value时，使被除数也在范围内的全部除数
+
+        与QuestionFactory._generate_operands的除数区间一致，
+        value本身可以在范围之外（例如作为除数出现的2）
+        """
+        if abs(value) < 2:
+            return ()
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        # min_num <= value * b <= max_num对应的b的区间
+        if value > 0:
+            low, high = -(-min_num // value), max_num // value
+        else:
+            low, high = -(-max_num // value), min_num // value
+        return tuple(
+            range(max(r.start, low), min(r.stop, high + 1))
+            for r in self.factory._get_divisor_ranges(value)
+        )
+
+    def iter_splits(
+        self, operator: OperatorType, value: int
+    ) -> Iterator[Tuple[int, int]]:
+        """按顺序遍历用operator拆分value的全部合法操作数对"""
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        if operator == OperatorType.ADDITION:
+            low = max(value - max_num, min_num)
+            high = min(value - min_num, max_num)
+            for left in range(low, high + 1):
+                yield left, value - left
+        elif operator == OperatorType.SUBTRACTION:
+            low = max(min_num, value + min_num)
+            high = min(max_num, value + max_num)
+            for left in range(low, high + 1):
+                yield left, left - value
+        elif operator == OperatorType.MULTIPLICATION:
+            if value == 0:
+                for left in range(min_num, max_num + 1):
+                    yield left, 0
+            else:
+                for left in self.factory._multiplication_factors(value):
+                    yield left, value // left
+        elif operator == OperatorType.DIVISION:
+            for divisor_range in self._valid_divisors(value):
+                for divisor in divisor_range:
+                    yield value * divisor, divisor
+
+    def split_count(self, operator: OperatorType, value: int) -> int:
+        """用operator拆分value的合法操作数对的个数，与iter_splits一致"""
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        if operator == OperatorType.ADDITION:
+            low = max(value - max_num, min_num)
+            high = min(value - min_num, max_num)
+            return max(0, high - low + 1)
+        if operator == OperatorType.SUBTRACTION:
+            low = max(min_num, value + min_num)
+            high = min(max_num, value + max_num)
+            return max(0, high - low + 1)
+        if operator == OperatorType.MULTIPLICATION:
+            if value == 0:
+                return max_num - min_num + 1
+            return len(self.factory._multiplication_factors(value))
+        if operator == OperatorType.DIVISION:
+            return sum(len(r) for r in self._valid_divisors(value))
+        return 0
+
+    def split_at(
+        self, operator: OperatorType, value: int, index: int
+    ) -> Tuple[int, int]:
+        """iter_splits(operator, value)中的第index个操作数对，无需遍历"""
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        if operator == OperatorType.ADDITION:
+            left = max(value - max_num, min_num) + index
+            return left, value - left
+        if operator == OperatorType.SUBTRACTION:
+            left = max(min_num, value + min_num) + index
+            return left, left - value
+        if operator == OperatorType.MULTIPLICATION:
+            if value == 0:
+                return min_num + index, 0
+            left = self.factory._multiplication_factors(value)[index]
+            return left, value // left
+        for divisor_range in self._valid_divisors(value):
+            if index < len(divisor_range):
+                divisor = divisor_range[index]
+                return value * divisor, divisor
+            index -= len(divisor_range)
+        raise IndexError(index)
+
+    def _find_capacity(self, value: int, limit: int) -> int:
+        """以value为根的子树最多能包含的运算次数，不超过limit"""
+        best = 0
+        if limit <= 0:
+            return best
+        for operator in self._operators_by_cost:
+            best = max(best, self.split_capacity(operator, value, limit))
+            if best == limit:
+                break
+        return best
+
+    def _find_split_capacity(
+        self, operator: OperatorType, value: int, limit: int
+    ) -> int:
+        """用operator拆分value时子树最多能包含的运算次数，不超过limit"""
+        best = 0
+        if limit <= 0 or not self.is_splittable(operator, value):
+            return best
+        for left, right in self.iter_splits(operator, value):
+            left_capacity = self.capacity(left, limit - 1)
+            right_capacity = self.capacity(right, limit - 1 - left_capacity)
+            best = max(best, 1 + left_capacity + right_capacity)
+            if best == limit:
+                break
+        return best
+
+    def _split_capacity_at_least(self, left: int, right: int, need: int) -> bool:
+        """左右子节点的容量之和是否不小于need"""
+        left_capacity = self.capacity(left, need)
+        return left_capacity + self.capacity(right, need - left_capacity) >= need
+
+    def choose_operator(self, value: int, need: int) -> OperatorType:
+        """为value随机选择一个运算符，拆分后子节点还能容纳need次运算
+
+        按随机顺序检查运算符并返回第一个满足条件的，等价于在满足条件的运算符中
+        均匀抽取，但通常不必对每个运算符都做判断。调用方需保证value的容量不小于need + 1
+        """
+        operators = list(self.factory.operators)
+        self.factory.rng.shuffle(operators)
+        for operator in operators:
+            if self.split_capacity(operator, value, need + 1) == need + 1:
+                return operator
+        raise ValueError(f"无法拆分{value}")
+
+    def choose_split(
+        self, operator: OperatorType, value: int, need: int
+    ) -> Tuple[int, int]:
+        """在容量之和不小于need的拆分中均匀抽取一个
+
+        先按工厂原有的方式抽取一次，不满足条件时再在全部满足条件的拆分中抽取，
+        两步合起来恰好是满足条件的拆分上的均匀分布
+        """
+        left, right = self.factory._generate_operands(operator, value)
+        if left is not None and (
+            need == 0 or self._split_capacity_at_least(left, right, need)
+        ):
+            return left, right
+
+        stats = self.factory.stats
+        stats.count("retries.split")
+        candidates = [
+            (left, right)
+            for left, right in self.iter_splits(operator, value)
+            if self._split_capacity_at_least(left, right, need)
+        ]
+        stats.observe("candidates.split_fallback", len(candidates))
+        return self.factory.rng.choice(candidates)
+
+    def choose_root(self) -> Tuple[OperatorType, int]:
+        """随机选择根运算符和根结果，保证能够完成整道题的生成"""
+        operator = self.factory.rng.choice(self.root_operators)
+        value = self._sample_root_candidate(operator)
+        if value is not None and self._is_root(operator, value):
+            return operator, value
+
+        self.factory.stats.count("retries.root")
+        sampler = self._get_root_sampler(operator)
+        if sampler is not None:
+            return operator, sampler.sample(self.factory.rng)
+
+        # 超大范围下不预先构建候选表，可行的根结果占绝大多数，抽到为止
+        while True:
+            value = self._sample_root_candidate(operator)
+            if value is not None and self._is_root(operator, value):
+                return operator, value
+
+    def _is_root(self, operator: OperatorType, value: int) -> bool:
+        """value用operator拆分后能否容纳整道题的运算"""
+        return self.split_capacity(operator, value, self.depth) == self.depth
+
+    def root_interval(self, operator: OperatorType) -> range:
+        """加减法可拆分的结果与数值范围的交集"""
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        if operator == OperatorType.ADDITION:
+            low, high = 2 * min_num, 2 * max_num
+        else:
+            low, high = min_num - max_num, max_num - min_num
+        return range(max(low, min_num), min(high, max_num) + 1)
+
+    def _sample_root_candidate(self, operator: OperatorType) -> Optional[int]:
+        """按工厂原有的分布抽取一个根结果，加减法只在可拆分的区间内抽取"""
+        if operator in (OperatorType.ADDITION, OperatorType.SUBTRACTION):
+            interval = self.root_interval(operator)
+            if not interval:
+                return None
+            return interval[self.factory.rng.randrange(len(interval))]
+        return self.factory._get_suitable_result(operator)
+
+    def _iter_root_candidates(
+        self, operator: OperatorType
+    ) -> Iterator[Tuple[int, int]]:
+        """按顺序遍历全部根结果及其权重，仅用于未启用惰性模式的范围"""
+        if operator in (OperatorType.ADDITION, OperatorType.SUBTRACTION):
+            for value in self.root_interval(operator):
+                yield value, 1
+        elif operator == OperatorType.MULTIPLICATION:
+            for value in self.factory.iter_composite_numbers():
+                yield value, 1
+        elif operator == OperatorType.DIVISION:
+            yield from self.factory._iter_quotient_weights()
+
+    def _has_root(self, operator: OperatorType) -> bool:
+        """是否存在可行的根结果
+
+        未启用惰性模式时逐个检查全部候选；超大范围下改为有限次抽样
+        """
+        if (
+            operator == OperatorType.MULTIPLICATION
+            and not self._multiplication_possible()
+        ):
+            return False
+
+        if self.factory.lazy:
+            for _ in range(self.WITNESS_SAMPLES):
+                value = self._sample_root_candidate(operator)
+                if value is None:
+                    return False
+                if self._is_root(operator, value):
+                    return True
+            return False
+
+        return any(
+            weight > 0 and self._is_root(operator, value)
+            for value, weight in self._iter_root_candidates(operator)
+        )
+
+    def _multiplication_possible(self) -> bool:
+        """粗略排除不可能出现乘法的范围，避免逐个检查大量合数"""
+        min_num, max_num = self.factory.min_num, self.factory.max_num
+        # 全为负数时乘积为正，不在范围内
+        if max_num < 0:
+            return False
+        # 全为正数时因数不小于max(min_num, 2)，乘积不小于其平方
+        if min_num > 0:
+            return max(min_num, 2) ** 2 <= max_num
+        return True
+
+    def _get_root_sampler(self, operator: OperatorType):
+        """只包含可行根结果的抽样器，权重与原有分布一致；惰性模式下返回None"""
+        if self.factory.lazy:
+            return None
+        if operator not in self._root_samplers:
+            if operator == OperatorType.DIVISION:
+                sampler = AliasSampler(
+                    (value, weight)
+                    for value, weight in self._iter_root_candidates(operator)
+                    if weight > 0 and self._is_root(operator, value)
+                )
+            else:
+                sampler = UniformPool(
+                    array(
+                        "q",
+                        (
+                            value
+                            for value, _ in self._iter_root_candidates(operator)
+                            if self._is_root(operator, value)
+                        ),
+                    )
+                )
+            self._root_samplers[operator] = sampler
+        return self._root_samplers[operator]
@@ -0,0 +1,162 @@
+"""
+题目生成的性能统计模块
+
+本模块为题目工厂提供结构化的性能统计接口，主要功能：
+1. 按阶段计时：结果抽样、操作数拆分、渲染和求值等
+2. 计数器：记录重试、失败等事件的次数
+3. 直方图：按2的幂分桶记录候选集合的大小
+4. 导出为普通字典的快照，便于打印或序列化
+
+核心类：
+- GenerationStats：启用时使用的统计对象
+- NullStats：未启用时使用的空实现，所有方法都不做任何事
+
+工厂默认使用共享的NULL_STATS，热路径上只多一次空方法调用；
+调用QuestionFactory.enable_instrumentation后才开始统计。
+"""
+
+import time
+from typing import Dict, List
+
+
+class _StageTimer:
+    """单个阶段的计时器，作为上下文管理器使用，不可嵌套使用同一阶段"""
+
+    __slots__ = ("count", "total_ns", "max_ns", "_start")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter_ns() - self._start
+        self.count += 1
+        self.total_ns += elapsed
+        if elapsed > self.max_ns:
+            self.max_ns = elapsed
+        return False
+
+
+class _NullTimer:
+    """什么也不做的计时器"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullStats:
+    """未启用统计时的空实现"""
+
+    enabled = False
+
+    def timer(self, stage: str) -> _NullTimer:
+        return _NULL_TIMER
+
+    def count(self, name: str, amount: int = 1):
+        pass
+
+    def observe(self, name: str, value: int):
+        pass
+
+    def reset(self):
+        pass
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {"timers": {}, "counters": {}, "histograms": {}}
+
+
+# 所有未启用统计的工厂共享的空实现
+NULL_STATS = NullStats()
+
+
+class GenerationStats(NullStats):
+    """题目生成的统计数据"""
+
+    enabled = True
+
+    def __init__(self):
+        self._timers: Dict[str, _StageTimer] = {}
+        self._counters: Dict[str, int] = {}
+        # 直方图的第i个桶统计bit_length为i的值，即0、1、2-3、4-7、……
+        self._histograms: Dict[str, List[int]] = {}
+
+    def timer(self, stage: str) -> _StageTimer:
+        """返回阶段stage的计时器
+
+        Args:
+            stage: 阶段名，如"sample_result"
+
+        Returns:
+            上下文管理器，with块的耗时计入该阶段
+        """
+        timer = self._timers.get(stage)
+        if timer is None:
+            timer = self._timers[stage] = _StageTimer()
+        return timer
+
+    def count(self, name: str, amount: int = 1):
+        """计数器name增加amount"""
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: int):
+        """在直方图name中记录一个非负整数"""
+        buckets = self._histograms.get(name)
+        if buckets is None:
+            buckets = self._histograms[name] = []
+        bucket = value.bit_length()
+        if bucket >= len(buckets):
+            buckets.extend([0] * (bucket + 1 - len(buckets)))
+        buckets[bucket] += 1
+
+    def reset(self):
+        """清空全部统计数据"""
+        self._timers.clear()
+        self._counters.clear()
+        self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """导出统计数据
+
+        Returns:
+            Dict[str, dict]: 包含三部分：
+                timers：阶段名到{count, total_s, mean_us, max_us}的映射
+                counters：计数器名到次数的映射
+                histograms：直方图名到{桶的上限: 次数}的映射，
+                    桶的上限为0、1、3、7、……，只包含非空的桶
+        """
+        timers = {
+            stage: {
+                "count": timer.count,
+                "total_s": timer.total_ns / 1e9,
+                "mean_us": timer.total_ns / timer.count / 1e3 if timer.count else 0.0,
+                "max_us": timer.max_ns / 1e3,
+            }
+            for stage, timer in self._timers.items()
+        }
+        histograms = {
+            name: {
+                (1 << bucket) - 1: frequency
+                for bucket, frequency in enumerate(buckets)
+                if frequency
+            }
+            for name, buckets in self._histograms.items()
+        }
+        return {
+            "timers": timers,
+            "counters": dict(self._counters),
+            "histograms": histograms,
+        }
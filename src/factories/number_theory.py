@@ -0,0 +1,151 @@
+"""
+数论工具模块
+
+本模块提供题目生成所需的整数分解工具，主要功能：
+1. 筛法构建最小质因数（SPF）表
+2. 借助SPF表在O(log n)时间内完成质因数分解
+3. 由质因数分解枚举全部正因数
+4. 确定性Miller-Rabin素性测试，用于无法建表的超大范围
+
+核心函数：
+- smallest_prime_factors：构建0到limit的最小质因数表
+- factorize：质因数分解，超出表的范围时退化为试除法
+- divisors：枚举正因数
+- is_prime：素性测试
+"""
+
+from array import array
+from typing import List, Tuple, Sequence
+
+
+def smallest_prime_factors(limit: int) -> array:
+    """构建最小质因数表
+
+    表中第i项是合数i的最小质因数；0、1和质数对应的项为0，
+    这样筛法只需处理合数，质数无需逐个回填
+
+    Args:
+        limit: 表的上限（包含）
+
+    Returns:
+        array: 长度为limit + 1的整数数组
+    """
+    limit = max(limit, 1)
+    # 合数的最小质因数不超过sqrt(limit)，32位整数足够
+    spf = array("i", bytes(array("i").itemsize * (limit + 1)))
+    root = int(limit**0.5)
+
+    # 先用小范围的埃氏筛找出不超过sqrt(limit)的质数
+    is_prime = bytearray([1]) * (root + 1)
+    small_primes = []
+    for i in range(2, root + 1):
+        if is_prime[i]:
+            small_primes.append(i)
+            is_prime[i * i :: i] = bytes(len(range(i * i, root + 1, i)))
+
+    # 从大到小用切片赋值标记倍数，较小的质因数最后写入并覆盖较大的
+    for p in reversed(small_primes):
+        count = len(range(p * p, limit + 1, p))
+        spf[p * p :: p] = array("i", [p]) * count
+
+    return spf
+
+
+def factorize(n: int, spf: Sequence[int]) -> List[Tuple[int, int]]:
+    """利用最小质因数表对|n|做质因数分解
+
+    Args:
+        n: 待分解的整数
+        spf: smallest_prime_factors构建的表，|n|超出表的上限时使用试除法
+
+    Returns:
+        List[Tuple[int, int]]: 按质因数从小到大排列的(质因数, 指数)列表
+    """
+    n = abs(n)
+    if n >= len(spf):
+        return _trial_factorize(n)
+
+    factors = []
+    while n > 1:
+        # 表中为0说明剩下的n本身是质数
+        p = spf[n] or n
+        exponent = 0
+        while n % p == 0:
+            n //= p
+            exponent += 1
+        factors.append((p, exponent))
+    return factors
+
+
+def _trial_factorize(n: int) -> List[Tuple[int, int]]:
+    """试除法质因数分解，用于超出最小质因数表范围的数"""
+    factors = []
+    p = 2
+    while p * p <= n:
+        if n % p == 0:
+            exponent = 0
+            while n % p == 0:
+                n //= p
+                exponent += 1
+            factors.append((p, exponent))
+        # 2之后只需尝试奇数
+        p += 1 if p == 2 else 2
+    if n > 1:
+        factors.append((n, 1))
+    return factors
+
+
+def divisors(factors: List[Tuple[int, int]]) -> List[int]:
+    """由质因数分解枚举全部正因数（无序）
+
+    Args:
+        factors: factorize返回的(质因数, 指数)列表
+
+    Returns:
+        List[int]: 全部正因数，包括1和数本身
+    """
+    result = [1]
+    for p, exponent in factors:
+        result = [d * p**k for d in result for k in range(exponent + 1)]
+    return result
+
+
+# Miller-Rabin测试使用的底数，对小于3.3 * 10^24的整数结果是确定的
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
+def is_prime(n: int) -> bool:
+    """判断n是否为质数
+
+    使用固定底数的Miller-Rabin测试，对小于3.3 * 10^24的n结果是确定的
+
+    Args:
+        n: 待判断的整数
+
+    Returns:
+        bool: n是否为质数
+    """
+    if n < 2:
+        return False
+    for p in _MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+
+    # 将n - 1写成d * 2^s，d为奇数
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for a in _MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            # a是n为合数的证据
+            return False
+    return True
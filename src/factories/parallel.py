@@ -0,0 +1,170 @@
+"""
+并行批量生成模块
+
+本模块把大批量的题目生成请求拆分到多个进程中执行，主要功能：
+1. 把count道题按固定大小切分为若干分片，用进程池并行生成
+2. 每个分片的随机种子由主种子和分片序号派生，与进程数无关
+3. 工作进程按配置复用题目生成器，预计算表只在每个进程中构建一次
+
+核心函数：
+- generate_questions_parallel：并行生成题目，相同的主种子得到相同的结果
+- generate_questions_sharded：用给定的工厂在当前进程中按相同的分片生成
+- shard_seed：由主种子和分片序号派生分片的随机种子
+
+分片的大小和种子只取决于count、shard_size和主种子，
+因此无论使用多少个进程（包括不使用进程池），生成的题目序列都完全相同。
+"""
+
+import hashlib
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ..models.question import Question, OperatorType, DifficultyLevel
+from .concrete_factories import ArithmeticQuestionFactory, QuestionGenerator
+from .table_cache import PrecomputedTableCache
+
+# 每个分片的题目数量
+DEFAULT_SHARD_SIZE = 1000
+
+# 工作进程内按配置缓存的题目生成器
+_worker_generators: Dict[tuple, QuestionGenerator] = {}
+
+
+def shard_seed(seed: int, index: int) -> int:
+    """由主种子和分片序号派生分片的随机种子
+
+    Args:
+        seed: 主种子
+        index: 分片序号
+
+    Returns:
+        int: 64位的分片种子
+    """
+    digest = hashlib.sha256(f"{seed}:{index}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def generate_questions_parallel(
+    difficulty: DifficultyLevel,
+    number_range: Tuple[int, int],
+    operators: List[OperatorType],
+    count: int,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    lazy_threshold: Optional[int] = None,
+    table_cache: Optional[PrecomputedTableCache] = None,
+    operand_count: Optional[int] = None,
+) -> List[Question]:
+    """用进程池并行生成count道题
+
+    Args:
+        difficulty: 难度级别
+        number_range: 数值范围的元组(最小值, 最大值)
+        operators: 允许使用的运算符列表
+        count: 题目数量
+        seed: 主种子，默认由全局random派生
+        workers: 进程数，默认为CPU核数；为1时在当前进程中生成
+        shard_size: 每个分片的题目数量，改变它会改变生成的结果
+        lazy_threshold: 惰性阈值，见QuestionFactory
+        table_cache: 预计算表的磁盘缓存，工作进程各自映射缓存文件
+        operand_count: 每道题的操作数个数，默认由难度决定
+
+    Returns:
+        List[Question]: 按分片顺序拼接的题目列表
+    """
+    if shard_size <= 0:
+        raise ValueError("分片大小必须为正数")
+    if count <= 0:
+        return []
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    config = (
+        difficulty,
+        tuple(number_range),
+        tuple(operators),
+        lazy_threshold,
+        table_cache,
+        operand_count,
+    )
+    shards = [
+        (config, shard_seed(seed, index), min(shard_size, count - start))
+        for index, start in enumerate(range(0, count, shard_size))
+    ]
+
+    if workers == 1 or len(shards) == 1:
+        results = map(_generate_shard, shards)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_generate_shard, shards))
+
+    questions = []
+    for shard in results:
+        questions.extend(shard)
+    return questions
+
+
+def generate_questions_sharded(
+    factory: ArithmeticQuestionFactory,
+    count: int,
+    seed: Optional[int] = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> List[Question]:
+    """用给定的工厂在当前进程中按分片生成count道题
+
+    每个分片使用factory.clone(分片种子)，不改变factory自身的随机状态。
+    工厂的配置与generate_questions_parallel的参数相同时，两者的结果完全相同；
+    工厂可以是均匀抽样等generate_questions_parallel无法在工作进程中重建的工厂。
+
+    Args:
+        factory: 题目工厂，只读取其配置和预计算结果
+        count: 题目数量
+        seed: 主种子，默认由全局random派生
+        shard_size: 每个分片的题目数量，改变它会改变生成的结果
+
+    Returns:
+        List[Question]: 按分片顺序拼接的题目列表
+    """
+    if shard_size <= 0:
+        raise ValueError("分片大小必须为正数")
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    questions = []
+    for index, start in enumerate(range(0, max(count, 0), shard_size)):
+        shard = factory.clone(shard_seed(seed, index))
+        questions.extend(shard.generate_batch(min(shard_size, count - start)))
+    return questions
+
+
+def _generate_shard(shard: tuple) -> List[Question]:
+    """生成一个分片的题目，在工作进程中执行"""
+    config, seed, size = shard
+    (
+        difficulty,
+        number_range,
+        operators,
+        lazy_threshold,
+        table_cache,
+        operand_count,
+    ) = config
+
+    key = (difficulty, number_range, operators, lazy_threshold, operand_count)
+    if table_cache is not None:
+        key += (table_cache.directory,)
+    generator = _worker_generators.get(key)
+    if generator is None:
+        generator = QuestionGenerator(
+            difficulty,
+            number_range,
+            list(operators),
+            lazy_threshold,
+            table_cache,
+            operand_count=operand_count,
+        )
+        _worker_generators[key] = generator
+
+    generator.factory.reseed(seed)
+    return generator.generate_batch(size)
@@ -11,35 +11,139 @@
 """
 
 from abc import ABC, abstractmethod
+import copy
 import random
 import itertools
-from typing import List, Tuple, Optional
+from array import array
+from functools import lru_cache
+from typing import FrozenSet, List, Tuple, Optional, Iterator, Callable, Sequence
 from ..models.question import Question, OperatorType, DifficultyLevel
-from ..models.arithmetic_tree import ArithmeticTree, ArithmeticNode
+from ..models.arithmetic_tree import ArithmeticTree
+from .sampling import (
+    AliasSampler,
+    UniformPool,
+    LazyCompositeSampler,
+    LazyQuotientSampler,
+)
+from .number_theory import smallest_prime_factors, factorize, divisors
+from .table_cache import PrecomputedTableCache
+from .feasibility import FeasibilityTable
+from .instrumentation import GenerationStats, NULL_STATS
 
 
 class QuestionFactory(ABC):
+    # 乘法候选因数缓存的容量（按乘积计）
+    FACTOR_CACHE_SIZE = 4096
+    # 默认的惰性阈值：数值的绝对值或候选商的个数超过它时，改用拒绝采样
+    LAZY_RANGE_THRESHOLD = 10**5
+    # 预计算表的磁盘缓存，为None时每个工厂各自计算；可在类上统一设置
+    table_cache: Optional[PrecomputedTableCache] = None
+
     def __init__(
         self,
         difficulty: DifficultyLevel,
         number_range: tuple[int, int],
         operators: List[OperatorType],
+        lazy_threshold: Optional[int] = None,
+        table_cache: Optional[PrecomputedTableCache] = None,
+        seed: Optional[int] = None,
+        operand_count: Optional[int] = None,
     ):
+        if operand_count is not None and operand_count < 2:
+            raise ValueError("每道题至少需要2个操作数")
         self.difficulty = difficulty
+        # 每道题的操作数个数，为None时由难度决定
+        self.operand_count = operand_count
         self.min_num = number_range[0]
         self.max_num = number_range[1]
         self.operators = operators
-        # 存储范围内的合数
-        self.composite_numbers = self._get_composite_numbers()
-        print(self.composite_numbers)
+        # 工厂独立的随机数生成器；未指定种子时由全局random派生，random.seed仍可复现结果
+        self.rng = random.Random(random.getrandbits(64) if seed is None else seed)
+        self.lazy_threshold = (
+            self.LAZY_RANGE_THRESHOLD if lazy_threshold is None else lazy_threshold
+        )
+        # 范围超过阈值时不再预先构建合数表，工厂构建的代价与范围大小无关
+        self.lazy = max(abs(self.min_num), abs(self.max_num)) > self.lazy_threshold
+        if table_cache is not None:
+            self.table_cache = table_cache
+        # 最小质因数表，用于合数判断和乘法的因数分解，首次需要时构建
+        self._spf_table: Optional[Sequence[int]] = None
+        # 按乘积缓存乘法的候选因数，容量有限，最久未用的先淘汰
+        self._multiplication_factors = lru_cache(maxsize=self.FACTOR_CACHE_SIZE)(
+            self._find_multiplication_factors
+        )
+        # 乘法结果（合数）和除法商的抽样器，首次需要时构建
+        self._composite_sampler = None
+        self._quotient_sampler = None
+        # 合数集合，只在访问composite_numbers时构建，题目生成本身不需要它
+        self._composite_numbers: Optional[FrozenSet[int]] = None
         self.tree = ArithmeticTree()
+        # 性能统计，默认为空实现，见enable_instrumentation
+        self.stats = NULL_STATS
+        # 可行的(运算符, 结果)，构建时即检查配置能否生成题目
+        self.feasibility = FeasibilityTable(self)
 
     @abstractmethod
     def create_question(self) -> Question:
         pass
 
+    def clone(self, seed: Optional[int] = None) -> "QuestionFactory":
+        """复制一个配置相同的工厂
+
+        副本与本工厂共享最小质因数表、因数缓存、抽样器和可行性表等预计算结果，
+        但有独立的随机数生成器、表达式树和性能统计，可以在其他线程中使用
+
+        Args:
+            seed: 副本的随机种子，默认由全局random派生
+
+        Returns:
+            QuestionFactory: 新的工厂
+        """
+        factory = copy.copy(self)
+        factory.rng = random.Random(random.getrandbits(64) if seed is None else seed)
+        factory.tree = ArithmeticTree()
+        factory.stats = NULL_STATS
+        factory.feasibility = self.feasibility.bind(factory)
+        return factory
+
+    def warm_up(self):
+        """预先构建当前运算符需要的预计算表和抽样器，之后clone出的工厂都能直接共享"""
+        if OperatorType.MULTIPLICATION in self.operators:
+            self._get_spf_table()
+            self._get_composite_sampler()
+        if OperatorType.DIVISION in self.operators:
+            self._get_quotient_sampler()
+
+    def reseed(self, seed: int):
+        """重新设定随机种子，已构建的预计算表和缓存不受影响
+
+        Args:
+            seed: 新的随机种子
+        """
+        self.rng.seed(seed)
+
+    def enable_instrumentation(self) -> GenerationStats:
+        """开始统计各阶段的耗时、重试次数和候选集合的大小
+
+        Returns:
+            GenerationStats: 统计对象，已启用时返回原有的对象
+        """
+        if not self.stats.enabled:
+            self.stats = GenerationStats()
+        return self.stats
+
+    def disable_instrumentation(self):
+        """停止统计，已有的统计数据被丢弃"""
+        self.stats = NULL_STATS
+
+    def instrumentation_snapshot(self) -> dict:
+        """导出当前的统计数据，未启用时各部分为空，格式见GenerationStats.snapshot"""
+        return self.stats.snapshot()
+
     def _get_operand_count(self) -> int:
-        """根据难度确定操作数个数"""
+        """确定操作数个数：指定了operand_count时使用它，否则根据难度确定"""
+        if self.operand_count is not None:
+            return self.operand_count
         if self.difficulty == DifficultyLevel.EASY:
             return 2
         elif self.difficulty == DifficultyLevel.MEDIUM:
@@ -47,9 +151,47 @@ class QuestionFactory(ABC):
         else:
             return 4
 
+    def expression_space_bound(self) -> int:
+        """估计不同题目个数的上界
+
+        把所有叶节点的取值都放宽到同一个区间，并忽略中间结果的范围约束，
+        对每种树形和运算符组合计数，只把交换左右子树得到的表达式视为相同；
+        规范形式还会合并结合律下等价的表达式，因此结果只会偏大
+
+        Returns:
+            int: 不同题目个数的上界
+        """
+        low, high = self.min_num, self.max_num
+        if OperatorType.DIVISION in self.operators:
+            # 除数可能落在范围之外，但绝对值不超过范围内的最大绝对值
+            max_abs = max(abs(low), abs(high))
+            low = min(low, 2 if low >= 0 else -max_abs)
+            high = max(high, max_abs)
+
+        commutative = sum(
+            op in (OperatorType.ADDITION, OperatorType.MULTIPLICATION)
+            for op in self.operators
+        )
+        others = len(self.operators) - commutative
+
+        # counts[k]：k个操作数的不同表达式个数的上界
+        counts = [0, high - low + 1]
+        for k in range(2, self._get_operand_count() + 1):
+            total = 0
+            for i in range(1, k // 2 + 1):
+                j = k - i
+                if i == j:
+                    # 左右子树规模相同时，满足交换律的运算只计无序对
+                    total += commutative * counts[i] * (counts[i] + 1) // 2
+                    total += others * counts[i] * counts[i]
+                else:
+                    total += (commutative + 2 * others) * counts[i] * counts[j]
+            counts.append(total)
+        return counts[-1]
+
     def _get_random_operator(self) -> OperatorType:
         """随机选择运算符"""
-        return random.choice(self.operators)
+        return self.rng.choice(self.operators)
 
     def _get_suitable_result(self, operator: OperatorType) -> Optional[int]:
         """根据运算符类型生成合适的结果值
@@ -60,87 +202,157 @@ class QuestionFactory(ABC):
         Returns:
             Optional[int]: 合适的结果值，如果无法生成则返回None
         """
-        from math import floor, ceil  # 导入向下取整和向上取整函数
-        
         min_num, max_num = self.min_num, self.max_num  # 获取数值范围的上下限
         
         # 处理加法和减法：直接从允许范围内随机选择一个数
         if operator in (OperatorType.ADDITION, OperatorType.SUBTRACTION):
-            return random.randint(min_num, max_num)
+            return self.rng.randint(min_num, max_num)
         
-        # 处理乘法：从预先计算好的合数集合中随机选择一个数
+        # 处理乘法：在范围内的合数中随机选择一个数
         elif operator == OperatorType.MULTIPLICATION:
-            if not self.composite_numbers:  # 如果合数集合为空
+            sampler = self._get_composite_sampler()
+            if not sampler:  # 如果范围内没有合数
                 return None
-            return random.choice(list(self.composite_numbers))
+            return sampler.sample(self.rng)
         
-        # 处理除法：需要特别处理以确保结果是整数
+        # 处理除法：按每个商对应的可选除数个数加权抽取，确保结果是整数
         elif operator == OperatorType.DIVISION:
-            # 情况1：范围全为非负数
-            if min_num >= 0:
-                candidates = []
-                
-                # 对于每个可能的商n
-                for n in range(max(2, min_num), floor(max_num / 2) + 1):
-                    # 计算使得a÷b=n的可能的除数b的范围
-                    lower = max(2, ceil(min_num / n))  # b的下限
-                    upper = floor(max_num / n)         # b的上限
-                    
-                    if upper >= lower:  # 如果范围有效
-                        count = upper - lower + 1      # 计算这个范围内整数的个数
-                        candidates.extend([n] * count)  # 将n添加count次到候选列表
-
-            # 情况2：范围全为非正数
-            elif max_num <= 0:
-                candidates = []
-                
-                # 对于每个可能的商n
-                for n in range(ceil(min_num / 2), min(-1, max_num + 1)):
-                    # 计算使得a÷b=n的可能的除数b的范围
-                    lower = max(2, ceil(max_num / n))  # b的下限
-                    upper = floor(min_num / n)         # b的上限
-                    
-                    if upper >= lower:  # 如果范围有效
-                        count = upper - lower + 1      # 计算这个范围内整数的个数
-                        candidates.extend([n] * count)  # 将n添加count次到候选列表
-
-            # 情况3：范围跨越0（包含正负数）
-            else:
-                candidates = []
-                
-                # 遍历所有可能的商：包括正数范围和负数范围
-                for n in itertools.chain(
-                    range(2, floor(max_num / 2) + 1),        # 正数范围
-                    range(ceil(min_num / 2), -1)             # 负数范围
-                ):
-                    # 对于任意n，计算可能的除数个数
-                    count = 0
-                    n_abs = abs(n)  # 商的绝对值
-                    
-                    # 处理max_num部分（正数部分）
-                    upper_max = floor(abs(max_num) / n_abs)
-                    if upper_max >= 2:
-                        count += upper_max - 1  # 减1是因为从2开始
-                        
-                    # 处理min_num部分（负数部分）
-                    upper_min = floor(abs(min_num) / n_abs)
-                    if upper_min >= 2:
-                        count += upper_min - 1
-                        
-                    if count > 0:
-                        candidates.extend([n] * count)  # 将n添加count次到候选列表
-
-            print(f"candidates: {candidates}")  # 打印候选商的列表（用于调试）
-
+            sampler = self._get_quotient_sampler()
             # 如果没有找到合适的候选值
-            if not candidates:
+            if not sampler:
                 return None
-
-            # 从候选值中随机选择一个
-            return random.choice(candidates)
+            return sampler.sample(self.rng)
 
         return None  # 对于未知的运算符返回None
 
+    def _get_composite_sampler(self):
+        """获取乘法结果（合数）的抽样器，每个工厂只构建一次
+
+        范围不超过惰性阈值时预先列出所有合数；否则每次均匀抽取并用
+        Miller-Rabin测试拒绝质数，不需要筛法
+        """
+        if self._composite_sampler is None:
+            if self.lazy:
+                self._composite_sampler = LazyCompositeSampler(
+                    self.min_num, self.max_num
+                )
+            else:
+                self._composite_sampler = UniformPool(
+                    self._cached_table(
+                        "composites",
+                        "q",
+                        lambda: array("q", self.iter_composite_numbers()),
+                    )
+                )
+        return self._composite_sampler
+
+    def _get_quotient_sampler(self):
+        """获取除法商的抽样器，每个工厂只构建一次
+
+        候选商不超过惰性阈值时构建别名表；否则用拒绝采样，
+        两者抽样的分布相同
+        """
+        if self._quotient_sampler is None:
+            ranges = self._get_quotient_ranges()
+            if sum(len(r) for r in ranges) <= self.lazy_threshold:
+                if self.table_cache is None:
+                    self._quotient_sampler = AliasSampler(self._iter_quotient_weights())
+                else:
+                    self._quotient_sampler = AliasSampler.from_table(
+                        self._cached_table(
+                            "quotient_alias",
+                            "q",
+                            lambda: AliasSampler(
+                                self._iter_quotient_weights()
+                            ).to_table(),
+                        )
+                    )
+            else:
+                magnitudes = [abs(n) for r in ranges if r for n in (r[0], r[-1])]
+                min_num, max_num = self.min_num, self.max_num
+                self._quotient_sampler = LazyQuotientSampler(
+                    self._quotient_weight,
+                    low=min(magnitudes),
+                    high=max(magnitudes),
+                    signs=tuple(1 if r[0] > 0 else -1 for r in ranges if r),
+                    # 范围跨越0时权重来自正负两部分
+                    scale=abs(min_num) + abs(max_num)
+                    if min_num < 0 < max_num
+                    else max(abs(min_num), abs(max_num)),
+                )
+        return self._quotient_sampler
+
+    def _get_quotient_ranges(self) -> List[range]:
+        """返回除法所有可能的商所在的区间"""
+        min_num, max_num = self.min_num, self.max_num
+
+        # 情况1：范围全为非负数，商在[max(2, min_num), floor(max_num / 2)]内
+        if min_num >= 0:
+            return [range(max(2, min_num), max_num // 2 + 1)]
+
+        # 情况2：范围全为非正数，商在[ceil(min_num / 2), min(-2, max_num)]内
+        elif max_num <= 0:
+            return [range(-(-min_num // 2), min(-1, max_num + 1))]
+
+        # 情况3：范围跨越0（包含正负数），包括正数和负数两个区间
+        return [range(2, max_num // 2 + 1), range(-(-min_num // 2), -1)]
+
+    def _quotient_weight(self, n: int) -> int:
+        """计算商n的权重
+
+        商n的权重是使a÷b=n成立的可选除数b的个数，
+        即按每个除数各算一种题目时，商为n的题目数
+
+        Args:
+            n: 商
+
+        Returns:
+            int: 权重，为0表示该商不可能出现
+        """
+        if not any(n in r for r in self._get_quotient_ranges()):
+            return 0
+
+        min_num, max_num = self.min_num, self.max_num
+
+        # 情况1：范围全为非负数
+        if min_num >= 0:
+            # 计算使得a÷b=n的可能的除数b的范围
+            lower = max(2, -(-min_num // n))  # b的下限，即ceil(min_num / n)
+            upper = max_num // n              # b的上限，即floor(max_num / n)
+            return max(0, upper - lower + 1)
+
+        # 情况2：范围全为非正数
+        elif max_num <= 0:
+            # 计算使得a÷b=n的可能的除数b的范围
+            lower = max(2, -(-max_num // n))  # b的下限，即ceil(max_num / n)
+            upper = min_num // n              # b的上限，即floor(min_num / n)
+            return max(0, upper - lower + 1)
+
+        # 情况3：范围跨越0（包含正负数）
+        count = 0
+        n_abs = abs(n)  # 商的绝对值
+
+        # 处理max_num部分（正数部分），减1是因为从2开始
+        upper_max = abs(max_num) // n_abs
+        if upper_max >= 2:
+            count += upper_max - 1
+
+        # 处理min_num部分（负数部分）
+        upper_min = abs(min_num) // n_abs
+        if upper_min >= 2:
+            count += upper_min - 1
+
+        return count
+
+    def _iter_quotient_weights(self) -> Iterator[Tuple[int, int]]:
+        """遍历除法所有可能的商及其权重
+
+        Yields:
+            Tuple[int, int]: (商, 权重)，权重为0表示该商没有可选除数
+        """
+        for n in itertools.chain(*self._get_quotient_ranges()):
+            yield n, self._quotient_weight(n)
+
     def _generate_operands(
         self, operator: OperatorType, result: int
     ) -> Tuple[Optional[int], Optional[int]]:
@@ -154,8 +366,6 @@ class QuestionFactory(ABC):
             Tuple[Optional[int], Optional[int]]: 操作数对(left, right)，
             如果无法生成合适的操作数则返回(None, None)
         """
-        from math import floor, ceil  # 导入数学函数：向下取整和向上取整
-        
         min_num, max_num = self.min_num, self.max_num  # 获取数值范围的上下限
 
         # 处理加法：a + b = result
@@ -170,12 +380,13 @@ class QuestionFactory(ABC):
             #   - max_num：left不能大于允许的最大值
             left_max = min(result - min_num, max_num)
 
+            self.stats.observe("candidates.addition", max(0, left_max - left_min + 1))
             # 检查范围是否有效（最小值应该小于等于最大值）
             if left_min > left_max:
                 return None, None
 
             # 在有效范围内随机选择left值
-            left = random.randint(left_min, left_max)
+            left = self.rng.randint(left_min, left_max)
             # 根据left计算对应的right值
             right = result - left
             return left, right
@@ -192,12 +403,15 @@ class QuestionFactory(ABC):
             #   - result + max_num：确保right不会超过max_num
             left_max = min(max_num, result + max_num)
 
+            self.stats.observe(
+                "candidates.subtraction", max(0, left_max - left_min + 1)
+            )
             # 检查范围是否有效
             if left_min > left_max:
                 return None, None
 
             # 在有效范围内随机选择left值
-            left = random.randint(left_min, left_max)
+            left = self.rng.randint(left_min, left_max)
             # 根据left计算对应的right值
             right = left - result
             return left, right
@@ -207,30 +421,18 @@ class QuestionFactory(ABC):
             # 特殊处理：如果结果为0
             if result == 0:
                 # 一个因数为0，另一个随机选择
-                return random.randint(min_num, max_num), 0
+                return self.rng.randint(min_num, max_num), 0
                 
-            # 在[-|result|+1, |result|-1]范围内寻找因数，排除±1
-            factors = []
-            # 确定搜索范围的起止点
-            search_start = max(-abs(result) + 1, min_num)
-            search_end = min(abs(result) - 1, max_num)
-            
-            # 遍历可能的因数
-            for i in range(search_start, search_end + 1):
-                # 排除0和±1
-                if i in {-1, 0, 1}:
-                    continue
-                # 检查i是否是result的因数，且对应的另一个因数在范围内
-                if (result % i == 0 and 
-                    min_num <= result // i <= max_num):
-                    factors.append(i)
-                    
+            # 由质因数分解枚举的、两个因数都在范围内的候选因数（已缓存）
+            factors = self._multiplication_factors(result)
+            self.stats.observe("candidates.multiplication", len(factors))
+
             # 如果没有找到合适的因数
             if not factors:
                 return None, None
                 
             # 随机选择一个因数作为left
-            left = random.choice(factors)
+            left = self.rng.choice(factors)
             return left, result // left
 
         # 处理除法：a ÷ b = result
@@ -239,51 +441,21 @@ class QuestionFactory(ABC):
             if result == 0 or abs(result) == 1:
                 return None, None
 
-            possible_divisors = []  # 存储可能的除数
-
-            # 情况1：范围全为非负数
-            if min_num >= 0:
-                # 计算可能的最大除数
-                max_divisor = floor(max_num / result)
-                # 如果最大除数至少为2
-                if max_divisor >= 2:
-                    # 将所有可能的除数加入列表
-                    possible_divisors.extend(range(2, max_divisor + 1))
+            # 可能的除数所在的区间，不展开成列表
+            divisor_ranges = self._get_divisor_ranges(result)
 
-            # 情况2：范围全为非正数
-            elif max_num <= 0:
-                # 全负数范围不可能满足要求
-                return None, None
-
-            # 情况3：范围跨越0（包含正负数）
-            else:
-                # 计算正负两部分的最大除数（不考虑符号）
-                pos_max_divisor = floor(abs(max_num / result))
-                neg_max_divisor = floor(abs(min_num / result))
-
-                # 处理正数部分
-                if pos_max_divisor >= 2:
-                    if result > 0:
-                        # 正商对应正除数
-                        possible_divisors.extend(range(2, pos_max_divisor + 1))
-                    else:
-                        # 负商对应负除数
-                        possible_divisors.extend(range(-pos_max_divisor, -1))
-
-                # 处理负数部分
-                if neg_max_divisor >= 2:
-                    if result < 0:
-                        # 负商对应正除数
-                        possible_divisors.extend(range(2, neg_max_divisor + 1))
-                    else:
-                        # 正商对应负除数
-                        possible_divisors.extend(range(-neg_max_divisor, -1))
-
-            if not possible_divisors:  # 如果没有找到合适的除数
+            # 在所有区间中均匀选择一个除数
+            total = sum(len(r) for r in divisor_ranges)
+            self.stats.observe("candidates.division", total)
+            if total == 0:  # 如果没有找到合适的除数
                 return None, None
+            index = self.rng.randrange(total)
+            for divisor_range in divisor_ranges:
+                if index < len(divisor_range):
+                    right = divisor_range[index]
+                    break
+                index -= len(divisor_range)
 
-            # 随机选择一个除数
-            right = random.choice(possible_divisors)
             # 计算被除数
             left = result * right
 
@@ -295,49 +467,142 @@ class QuestionFactory(ABC):
 
         return None, None  # 对于未知的运算符返回None
 
-    def _sieve_of_eratosthenes(self, n: int) -> set[int]:
-        """埃拉托斯特尼筛法，找出n以内的所有素数"""
-        # 初始化标记数组，默认所有数都是素数
-        is_prime = [True] * (n + 1)
-        is_prime[0] = is_prime[1] = False
+    def _get_divisor_ranges(self, result: int) -> List[range]:
+        """返回商为result时可能的除数所在的区间
 
-        # 从2开始遍历到sqrt(n)
-        for i in range(2, int(n**0.5) + 1):
-            if is_prime[i]:
-                # 将i的所有倍数标记为非素数
-                for j in range(i * i, n + 1, i):
-                    is_prime[j] = False
+        区间内的除数b使result * b的符号正确，但result * b不一定在范围内
 
-        # 返回所有素数
-        return {i for i in range(2, n + 1) if is_prime[i]}
+        Args:
+            result: 商，不为0或±1
 
-    def _get_composite_numbers(self) -> set[int]:
-        """获取数值范围内的所有合数"""
+        Returns:
+            List[range]: 除数区间，没有可能的除数时为空列表
+        """
         min_num, max_num = self.min_num, self.max_num
-        max_abs = max(abs(min_num), abs(max_num))
-        primes = self._sieve_of_eratosthenes(max_abs)
-        result = set()
+        divisor_ranges = []
 
-        # 添加正数范围
-        if max_num > 0:
-            result.update(
-                set(range(1 if min_num <= 0 else min_num, max_num + 1))
-                - primes
-                - {0, 1}
+        # 情况1：范围全为非负数
+        if min_num >= 0:
+            # 计算可能的最大除数
+            max_divisor = max_num // result
+            # 所有不小于2的除数
+            divisor_ranges.append(range(2, max_divisor + 1))
+
+        # 情况2：范围全为非正数，全负数范围不可能满足要求
+        elif max_num <= 0:
+            pass
+
+        # 情况3：范围跨越0（包含正负数）
+        else:
+            # 计算正负两部分的最大除数（不考虑符号）
+            pos_max_divisor = abs(max_num) // abs(result)
+            neg_max_divisor = abs(min_num) // abs(result)
+
+            # 处理正数部分：正商对应正除数，负商对应负除数
+            if result > 0:
+                divisor_ranges.append(range(2, pos_max_divisor + 1))
+            else:
+                divisor_ranges.append(range(-pos_max_divisor, -1))
+
+            # 处理负数部分：负商对应正除数，正商对应负除数
+            if result < 0:
+                divisor_ranges.append(range(2, neg_max_divisor + 1))
+            else:
+                divisor_ranges.append(range(-neg_max_divisor, -1))
+
+        return divisor_ranges
+
+    def _get_spf_table(self) -> Sequence[int]:
+        """获取最小质因数表，每个工厂只构建一次
+
+        表覆盖数值范围，但不超过惰性阈值；超出表的数分解时使用试除法
+        """
+        if self._spf_table is None:
+            max_abs = max(abs(self.min_num), abs(self.max_num))
+            self._spf_table = self._cached_table(
+                "spf",
+                "i",
+                lambda: smallest_prime_factors(min(max_abs, self.lazy_threshold)),
             )
+        return self._spf_table
+
+    def _cached_table(
+        self, name: str, typecode: str, build: Callable[[], array]
+    ) -> Sequence[int]:
+        """通过磁盘缓存获取预计算表，未配置缓存时直接构建
+
+        Args:
+            name: 表名
+            typecode: 表的数组类型码
+            build: 构建表的函数
+
+        Returns:
+            Sequence[int]: 预计算表
+        """
+        if self.table_cache is None:
+            return build()
+        key = self.table_cache.config_key(
+            (self.min_num, self.max_num), self.operators, self.lazy_threshold
+        )
+        return self.table_cache.get_or_build(key, name, typecode, build)
+
+    def _find_multiplication_factors(self, result: int) -> Tuple[int, ...]:
+        """找出所有满足a * b = result且a、b都在范围内的因数a
+
+        由result的质因数分解枚举正因数d，再分别检查±d，
+        耗时与因数个数成正比，而不是与|result|成正比
 
-        # 添加负数范围
+        Args:
+            result: 乘积，不为0
+
+        Returns:
+            Tuple[int, ...]: 从小到大排列的因数a，不包括0和±1
+        """
+        min_num, max_num = self.min_num, self.max_num
+        magnitude = abs(result)
+        factors = []
+
+        for d in divisors(factorize(magnitude, self._get_spf_table())):
+            # 排除±1以及对应另一个因数为±1的±|result|
+            if d == 1 or d == magnitude:
+                continue
+            for a in (d, -d):
+                # 检查a和对应的另一个因数是否都在范围内
+                if min_num <= a <= max_num and min_num <= result // a <= max_num:
+                    factors.append(a)
+
+        factors.sort()
+        return tuple(factors)
+
+    @property
+    def composite_numbers(self) -> FrozenSet[int]:
+        """数值范围内的全部合数（范围包含0时也包括0），首次访问时构建
+
+        集合大小与范围成正比，宽范围下代价很高；题目生成使用抽样器，
+        不会构建它。需要逐个遍历时使用iter_composite_numbers。
+        """
+        if self._composite_numbers is None:
+            self._composite_numbers = frozenset(self.iter_composite_numbers())
+        return self._composite_numbers
+
+    def iter_composite_numbers(self) -> Iterator[int]:
+        """从小到大遍历数值范围内的所有合数（范围包含0时也包括0）"""
+        min_num, max_num = self.min_num, self.max_num
+        # 最小质因数表中非0的项恰好对应合数
+        spf = self._get_spf_table()
+
+        # 负数范围
         if min_num < 0:
-            result.update(
-                {
-                    -x
-                    for x in range(1 if max_num >= 0 else -max_num, -min_num + 1)
-                    if x not in primes and x != 1
-                }
-            )
+            for x in range(-min_num, max(4, -max_num) - 1, -1):
+                if spf[x]:
+                    yield -x
 
         # 如果范围包含0，添加0
         if min_num <= 0 <= max_num:
-            result.add(0)
+            yield 0
 
-        return result
+        # 正数范围
+        if max_num > 0:
+            for x in range(max(4, min_num), max_num + 1):
+                if spf[x]:
+                    yield x
@@ -0,0 +1,204 @@
+"""
+加权抽样模块
+
+本模块提供题目生成中用到的离散分布抽样工具，主要功能：
+1. 预先把带权重的候选值整理成别名表（Walker/Vose alias method）
+2. 每次抽样只需两次均匀随机数，时间和内存都是常数
+3. 对超大数值范围，用拒绝采样代替预先构建的候选表，构建代价与范围大小无关
+
+核心类：
+- AliasSampler：别名表抽样器，构建一次后可反复抽样
+- UniformPool：在预先构建的候选值中均匀抽样
+- LazyCompositeSampler：在范围内均匀抽取合数，不预先构建合数表
+- LazyQuotientSampler：按权重抽取除法的商，不预先构建别名表
+
+别名表全部使用整数运算构建和抽样，抽样分布与按权重展开的候选列表完全一致。
+"""
+
+import math
+import random
+import itertools
+from array import array
+from typing import Callable, Iterable, Sequence, Tuple
+
+from .number_theory import is_prime
+
+
+class AliasSampler:
+    """别名表抽样器
+
+    对n个候选值，把总权重W均分到n个桶中，每个桶至多容纳两个候选值：
+    桶i以thresholds[i] / W的概率返回values[i]，否则返回values[aliases[i]]。
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[int, int]]):
+        """根据(候选值, 权重)对构建别名表，权重为0的候选值被忽略
+
+        Args:
+            pairs: (候选值, 正整数权重)的可迭代对象
+        """
+        self.values = array("q")
+        weights = array("q")
+        for value, weight in pairs:
+            if weight > 0:
+                self.values.append(value)
+                weights.append(weight)
+
+        # 总权重，同时也是每个桶的容量
+        self.total_weight = sum(weights)
+        self.thresholds = array("q", bytes(8 * len(weights)))
+        self.aliases = array("q", range(len(weights)))
+
+        # 将权重放大n倍后，每个桶的容量恰好是总权重
+        count = len(weights)
+        scaled = [weight * count for weight in weights]
+        small = [i for i, weight in enumerate(scaled) if weight < self.total_weight]
+        large = [i for i, weight in enumerate(scaled) if weight >= self.total_weight]
+
+        # 每次用一个大桶填满一个小桶的剩余容量
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.thresholds[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] -= self.total_weight - scaled[less]
+            if scaled[more] < self.total_weight:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # 剩下的桶恰好装满，只会返回自己
+        for i in itertools.chain(small, large):
+            self.thresholds[i] = self.total_weight
+
+    @classmethod
+    def from_table(cls, table: Sequence[int]) -> "AliasSampler":
+        """从to_table生成的扁平表恢复抽样器，不复制数据
+
+        Args:
+            table: to_table的结果，或其映射到内存的只读视图
+        """
+        sampler = cls.__new__(cls)
+        count = (len(table) - 1) // 3
+        sampler.total_weight = table[0]
+        sampler.values = table[1 : 1 + count]
+        sampler.thresholds = table[1 + count : 1 + 2 * count]
+        sampler.aliases = table[1 + 2 * count :]
+        return sampler
+
+    def to_table(self) -> array:
+        """把别名表展平为一个整数数组：[总权重, 候选值..., 阈值..., 别名...]"""
+        return (
+            array("q", [self.total_weight]) + self.values + self.thresholds + self.aliases
+        )
+
+    def __len__(self) -> int:
+        """候选值的个数"""
+        return len(self.values)
+
+    def sample(self, rng=random) -> int:
+        """按权重抽取一个候选值
+
+        Args:
+            rng: 随机数来源，需提供randrange方法，默认为random模块
+
+        Returns:
+            int: 抽中的候选值
+        """
+        i = rng.randrange(len(self.values))
+        if rng.randrange(self.total_weight) < self.thresholds[i]:
+            return self.values[i]
+        return self.values[self.aliases[i]]
+
+
+class UniformPool:
+    """在预先构建的候选值中均匀抽样"""
+
+    def __init__(self, values: Sequence[int]):
+        """
+        Args:
+            values: 候选值，可以是array或映射到内存的只读视图
+        """
+        self.values = values
+
+    def __len__(self) -> int:
+        """候选值的个数"""
+        return len(self.values)
+
+    def sample(self, rng=random) -> int:
+        """均匀抽取一个候选值"""
+        return self.values[rng.randrange(len(self.values))]
+
+
+class LazyCompositeSampler:
+    """在[min_num, max_num]内均匀抽取合数（范围包含0时也可能抽到0）
+
+    每次在整个范围内均匀抽取一个整数，不是合数就重新抽取。
+    范围足够大时合数占绝大多数，期望抽取次数接近1。
+    """
+
+    def __init__(self, min_num: int, max_num: int):
+        self.min_num = min_num
+        self.max_num = max_num
+
+    def __bool__(self) -> bool:
+        """超大范围内总有合数可选"""
+        return True
+
+    def sample(self, rng=random) -> int:
+        """均匀抽取一个合数"""
+        while True:
+            x = rng.randint(self.min_num, self.max_num)
+            if x == 0 or (abs(x) >= 4 and not is_prime(abs(x))):
+                return x
+
+
+class LazyQuotientSampler:
+    """按权重抽取除法的商，权重函数满足weight(n) <= scale / |n|
+
+    先按密度1/x在[low, high + 1)上抽取商的绝对值m（向下取整），
+    再随机确定符号，最后以weight(n) / (1.5 * scale * ln(1 + 1/m))的概率接受。
+    由于ln(1 + 1/m) >= 1/(m + 1)且m >= 2，接受概率不超过1，
+    接受的商服从与权重成正比的分布。
+    """
+
+    def __init__(
+        self,
+        weight: Callable[[int], int],
+        low: int,
+        high: int,
+        signs: Sequence[int],
+        scale: int,
+    ):
+        """
+        Args:
+            weight: 商的权重函数，不可能的商返回0
+            low: 商的绝对值的下限，不小于2
+            high: 商的绝对值的上限
+            signs: 商可能的符号，(1,)、(-1,)或(1, -1)
+            scale: 权重上界的系数
+        """
+        self.weight = weight
+        self.low = low
+        self.high = high
+        self.signs = signs
+        self.scale = scale
+        # 1/x密度在[low, high + 1)上的对数跨度
+        self._log_span = math.log((high + 1) / low)
+
+    def __bool__(self) -> bool:
+        """商的取值区间是否非空"""
+        return self.low <= self.high
+
+    def sample(self, rng=random) -> int:
+        """按权重抽取一个商"""
+        while True:
+            magnitude = min(
+                int(self.low * math.exp(rng.random() * self._log_span)), self.high
+            )
+            n = magnitude * self.signs[rng.randrange(len(self.signs))]
+            weight = self.weight(n)
+            if weight > 0 and rng.random() * 1.5 * self.scale * math.log1p(
+                1 / magnitude
+            ) < weight:
+                return n
@@ -0,0 +1,138 @@
+"""
+预计算表缓存模块
+
+本模块把题目工厂按数值范围预先计算的表持久化到磁盘，主要功能：
+1. 以(最小值, 最大值, 运算符)为键，为每种配置分配独立的缓存目录
+2. 每张表保存为原始的二进制整数数组，读取时通过mmap映射，不做反序列化
+3. 多个进程映射同一个文件时共享操作系统的页缓存
+
+核心类：
+- PrecomputedTableCache：磁盘缓存，负责表的读取、构建和原子写入
+
+缓存的表包括合数表、除法商的别名表和最小质因数表，
+它们只取决于数值范围（以及惰性阈值），与难度和随机状态无关。
+"""
+
+import hashlib
+import mmap
+import os
+import sys
+import tempfile
+from array import array
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from ..models.question import OperatorType
+
+# 缓存格式的版本号，表的布局变化时递增，使旧的缓存自动失效
+CACHE_FORMAT_VERSION = 1
+
+# 未指定缓存目录时使用的环境变量
+CACHE_DIR_ENV = "MATH_EXERCISE_CACHE_DIR"
+
+
+class PrecomputedTableCache:
+    """预计算表的磁盘缓存
+
+    目录结构：<directory>/<配置的哈希>/<表名>.<类型码>.bin，
+    文件内容是本机字节序的整数数组。
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: 缓存目录，默认取环境变量MATH_EXERCISE_CACHE_DIR，
+                未设置时为~/.cache/math_exercise
+        """
+        if directory is None:
+            directory = os.environ.get(CACHE_DIR_ENV) or os.path.join(
+                os.path.expanduser("~"), ".cache", "math_exercise"
+            )
+        self.directory = directory
+        # 已映射的表，同一进程内的多个工厂共用同一份映射
+        self._tables: Dict[str, Sequence[int]] = {}
+
+    def __getstate__(self):
+        """跨进程传递时只传目录，映射由各进程重新建立"""
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def config_key(
+        self,
+        number_range: Tuple[int, int],
+        operators: Sequence[OperatorType],
+        lazy_threshold: int,
+    ) -> str:
+        """计算一种配置的缓存键
+
+        Args:
+            number_range: 数值范围
+            operators: 运算符列表，与顺序无关
+            lazy_threshold: 惰性阈值，会影响构建哪些表以及最小质因数表的大小
+
+        Returns:
+            str: 配置的十六进制哈希
+        """
+        text = "|".join(
+            [
+                f"v{CACHE_FORMAT_VERSION}",
+                sys.byteorder,
+                f"{number_range[0]},{number_range[1]}",
+                "".join(sorted(op.value for op in operators)),
+                str(lazy_threshold),
+            ]
+        )
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get_or_build(
+        self, key: str, name: str, typecode: str, build: Callable[[], array]
+    ) -> Sequence[int]:
+        """读取一张表，缓存中没有时构建并写入缓存
+
+        Args:
+            key: config_key返回的缓存键
+            name: 表名
+            typecode: 数组的类型码，如"q"
+            build: 构建表的函数，返回对应类型码的array
+
+        Returns:
+            Sequence[int]: 映射到内存的只读表；表为空时返回空array
+        """
+        path = os.path.join(self.directory, key, f"{name}.{typecode}.bin")
+
+        table = self._tables.get(path)
+        if table is None:
+            table = self._load(path, typecode)
+        if table is None:
+            table = build()
+            self._store(path, table)
+        self._tables[path] = table
+        return table
+
+    def _load(self, path: str, typecode: str) -> Optional[Sequence[int]]:
+        """以只读方式映射缓存文件，文件不存在时返回None"""
+        try:
+            with open(path, "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                # 空文件无法映射
+                if size == 0:
+                    return array(typecode)
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        return memoryview(mapping).cast(typecode)
+
+    def _store(self, path: str, table: array):
+        """先写入临时文件再原子替换，并发写入时读者不会看到不完整的文件"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                table.tofile(file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -0,0 +1,173 @@
+"""
+答题记录模块
+
+本模块按列存储一次练习的全部答题记录，主要功能：
+1. 每条记录的题目索引、用户答案、是否正确、用时和提交时刻各存于一个定长数组
+2. 按索引或迭代访问时临时构造Answer，作为列数据的只读视图
+3. 正确题数、总用时等汇总直接在整列上归约，不逐条构造对象
+
+核心类：
+- AnswerLog：按列存储的答题记录
+
+每条记录约占30字节，而一个Answer对象连同datetime需要数百字节，
+适合一次练习包含数万道题的长时间训练。
+"""
+
+import operator
+import time
+from array import array
+from datetime import datetime
+from typing import Iterator, List, Optional, Sequence, overload
+
+from .answer import Answer
+from .question import Question
+
+
+class AnswerLog(Sequence[Answer]):
+    """按列存储的答题记录，题目按索引引用练习的题目列表"""
+
+    def __init__(self, questions: List[Question]):
+        """
+        Args:
+            questions: 练习的题目列表，只保存引用，之后追加的题目同样可以引用
+        """
+        self.questions = questions
+        self.question_indices = array("q")
+        self.user_answers = array("d")
+        self.correct = array("b")
+        self.times_spent = array("q")
+        # 单调时钟的读数（秒），不受系统时间调整的影响
+        self.timestamps = array("d")
+        # 单调时钟读数对应的系统时间的偏移，用于换算提交时刻
+        self.wall_offset = time.time() - time.monotonic()
+
+    def append(
+        self,
+        question_index: int,
+        user_answer: float,
+        is_correct: bool,
+        time_spent: int,
+        timestamp: Optional[float] = None,
+    ) -> int:
+        """追加一条记录，各值在写入任何一列之前完成转换，转换失败时不留下部分记录
+
+        Args:
+            question_index: 题目在题目列表中的索引
+            user_answer: 用户答案
+            is_correct: 是否正确
+            time_spent: 用时（秒），不足一秒的部分舍去
+            timestamp: 单调时钟的读数，默认为当前时刻
+
+        Returns:
+            int: 新记录的索引
+
+        Raises:
+            TypeError, ValueError: 某个值无法转换为对应列的类型
+        """
+        question_index = operator.index(question_index)
+        user_answer = float(user_answer)
+        is_correct = bool(is_correct)
+        time_spent = int(time_spent)
+        timestamp = time.monotonic() if timestamp is None else float(timestamp)
+
+        self.question_indices.append(question_index)
+        self.user_answers.append(user_answer)
+        self.correct.append(is_correct)
+        self.times_spent.append(time_spent)
+        self.timestamps.append(timestamp)
+        return len(self.correct) - 1
+
+    def extend(
+        self,
+        question_indices: Sequence[int],
+        user_answers: Sequence[float],
+        correct: Sequence[bool],
+        times_spent: Sequence[int],
+        timestamp: Optional[float] = None,
+    ):
+        """追加一批记录，各参数一一对应，整批记录的提交时刻相同
+
+        与append相同，整批数据先转换为各列的类型，任何一个值转换失败时不写入任何记录。
+
+        Args:
+            timestamp: 单调时钟的读数，默认为当前时刻
+
+        Raises:
+            ValueError: 各列的长度不一致
+            TypeError: 某个值无法转换为对应列的类型
+        """
+        count = len(question_indices)
+        if not len(user_answers) == len(correct) == len(times_spent) == count:
+            raise ValueError("各列的长度不一致")
+        new_indices = array("q", map(operator.index, question_indices))
+        new_answers = array("d", map(float, user_answers))
+        new_correct = array("b", map(bool, correct))
+        new_times = array("q", map(int, times_spent))
+        now = time.monotonic() if timestamp is None else float(timestamp)
+
+        self.question_indices.extend(new_indices)
+        self.user_answers.extend(new_answers)
+        self.correct.extend(new_correct)
+        self.times_spent.extend(new_times)
+        self.timestamps.extend([now] * count)
+
+    def clear(self):
+        for column in self._columns():
+            del column[:]
+
+    def __len__(self) -> int:
+        return len(self.correct)
+
+    @overload
+    def __getitem__(self, index: int) -> Answer: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Answer]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("答题记录索引越界")
+        return self._view(index)
+
+    def __iter__(self) -> Iterator[Answer]:
+        for i in range(len(self)):
+            yield self._view(i)
+
+    def submit_time(self, index: int) -> datetime:
+        """第index条记录的提交时刻"""
+        return datetime.fromtimestamp(self.wall_offset + self.timestamps[index])
+
+    def correct_count(self) -> int:
+        """答对的题目数"""
+        return sum(self.correct)
+
+    def total_time(self) -> int:
+        """总用时（秒）"""
+        return sum(self.times_spent)
+
+    def nbytes(self) -> int:
+        """列数据占用的字节数"""
+        return sum(
+            column.buffer_info()[1] * column.itemsize for column in self._columns()
+        )
+
+    def _columns(self):
+        return (
+            self.question_indices,
+            self.user_answers,
+            self.correct,
+            self.times_spent,
+            self.timestamps,
+        )
+
+    def _view(self, index: int) -> Answer:
+        return Answer(
+            question=self.questions[self.question_indices[index]],
+            submit_time=self.submit_time(index),
+            time_spent=self.times_spent[index],
+            is_correct=bool(self.correct[index]),
+        )
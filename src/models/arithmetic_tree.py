@@ -1,23 +1,66 @@
 """
 本模块实现了算术表达式的树形表示：
 1. ArithmeticNode: 表达式树的节点类
-   - 存储操作数、运算符和树形结构
+   - 存储操作数、运算符和左右子节点
    - 每个节点的操作数是其子树计算的结果
+   - 使用__slots__，没有父节点引用，不会产生循环引用
 2. ArithmeticTree: 表达式树类
-   - 实现了表达式的存储和转换
-   - 处理运算符优先级和括号
-   - 通过中序遍历生成完整表达式
+   - 以平行数组存储节点的操作数、运算符编码和子节点下标
+   - 借助模块级的优先级和括号查找表处理运算符优先级和括号
+   - 不使用递归和父节点引用，一次遍历把记号写入同一个缓冲区
+   - 同一次遍历可以输出字符串、记号列表或LaTeX代码
+   - 直接从树中读取表达式的值，无需重新解析字符串
+   - 生成交换律下唯一的规范形式，用于题目去重
+   - 通过to_node和load_node与ArithmeticNode组成的链式结构互相转换，
+     转换得到的是副本，修改它不会影响原来的树
 
 该模块为题目生成提供了核心的数据结构支持，
 确保生成的表达式结构正确、运算符优先级恰当。
 """
 
+from array import array
 from dataclasses import dataclass  # 导入dataclass装饰器，用于创建数据类
-from typing import Optional  # 导入Optional类型，用于表示可选值
+from typing import List, Optional, Sequence, Tuple  # 导入类型提示所需的类
 from .question import OperatorType  # 从同目录下的question模块导入OperatorType枚举类
 
+# 满足交换律的运算符，规范形式中左右子树的顺序无关
+COMMUTATIVE_OPERATORS = (OperatorType.ADDITION, OperatorType.MULTIPLICATION)
 
-@dataclass  # 使用dataclass装饰器，自动生成__init__等基本方法
+# 运算符在数组中的编码，即在本元组中的下标；-1表示叶节点（没有运算符）
+OPERATOR_CODES = tuple(OperatorType)
+LEAF = -1
+
+# 运算符优先级，乘除高于加减
+OPERATOR_PRIORITIES = {
+    OperatorType.ADDITION: 1,  # 加法优先级为1
+    OperatorType.SUBTRACTION: 1,  # 减法优先级为1
+    OperatorType.MULTIPLICATION: 2,  # 乘法优先级为2
+    OperatorType.DIVISION: 2,  # 除法优先级为2
+}
+
+# 渲染的输出格式
+RENDER_TEXT = "text"  # 普通字符串，如"(3 + 4) * 5"
+RENDER_TOKENS = "tokens"  # 记号列表，如["(", "3", "+", "4", ")", "*", "5"]
+RENDER_LATEX = "latex"  # LaTeX代码，如"(3 + 4) \times 5"
+
+# 各输出格式下的记号：前面按运算符编码排列，最后两项是左右括号
+RENDER_SYMBOLS = {
+    RENDER_TEXT: tuple(f" {op.value} " for op in OPERATOR_CODES) + ("(", ")"),
+    RENDER_TOKENS: tuple(op.value for op in OPERATOR_CODES) + ("(", ")"),
+    RENDER_LATEX: tuple(
+        {
+            OperatorType.ADDITION: " + ",
+            OperatorType.SUBTRACTION: " - ",
+            OperatorType.MULTIPLICATION: r" \times ",
+            OperatorType.DIVISION: r" \div ",
+        }[op]
+        for op in OPERATOR_CODES
+    )
+    + ("(", ")"),
+}
+
+
+@dataclass(slots=True)  # 使用dataclass装饰器，自动生成__init__等基本方法
 class ArithmeticNode:
     """算术表达式树的节点类
 
@@ -25,24 +68,20 @@ class ArithmeticNode:
     1. operand: 该节点代表的子树的计算结果
     2. operator: 用于计算当前节点的运算符（如果是非叶节点）
     3. left_node和right_node: 左右子节点
-    4. parent_node: 父节点的引用，用于处理运算符优先级
     """
 
     operand: int  # 存储该节点的计算结果值
     operator: Optional[OperatorType] = None  # 当前节点的运算符，叶节点为None
     left_node: Optional["ArithmeticNode"] = None  # 左子节点
     right_node: Optional["ArithmeticNode"] = None  # 右子节点
-    parent_node: Optional["ArithmeticNode"] = None  # 父节点引用
 
     def set_left_node(self, node: "ArithmeticNode"):
-        """设置左子节点，同时建立父子关系"""
-        node.parent_node = self  # 设置子节点的父节点引用
-        self.left_node = node  # 设置当前节点的左子节点引用
+        """设置左子节点"""
+        self.left_node = node
 
     def set_right_node(self, node: "ArithmeticNode"):
-        """设置右子节点，同时建立父子关系"""
-        node.parent_node = self  # 设置子节点的父节点引用
-        self.right_node = node  # 设置当前节点的右子节点引用
+        """设置右子节点"""
+        self.right_node = node
 
 
 class ArithmeticTree:
@@ -52,71 +91,260 @@ class ArithmeticTree:
     1. 每个节点存储的operand是该节点下子树的计算结果
     2. 非叶节点的operand是对其左右子节点operand进行operator运算的结果
     3. 叶节点直接存储输入的数值，没有operator
+
+    节点以下标表示，根节点的下标为0，子节点的下标总是大于父节点，
+    因此按下标从大到小处理节点时，子节点总是先于父节点完成。
     """
 
     def __init__(self):
         """初始化空的表达式树"""
-        self.root = None
+        self.operands = array("q")  # 各节点的值
+        self.operators = array("b")  # 各节点的运算符编码，叶节点为LEAF
+        self.lefts = array("i")  # 左子节点的下标，叶节点为-1
+        self.rights = array("i")  # 右子节点的下标，叶节点为-1
+
+    @classmethod
+    def from_arrays(
+        cls,
+        operands: Sequence[int],
+        operators: Sequence[int],
+        lefts: Sequence[int],
+        rights: Sequence[int],
+    ) -> "ArithmeticTree":
+        """由平行数组构建表达式树，子节点的下标必须大于父节点
+
+        Args:
+            operands: 各节点的值
+            operators: 各节点的运算符编码，叶节点为LEAF
+            lefts: 左子节点的下标，叶节点为-1
+            rights: 右子节点的下标，叶节点为-1
+        """
+        tree = cls()
+        tree.operands.extend(operands)
+        tree.operators.extend(operators)
+        tree.lefts.extend(lefts)
+        tree.rights.extend(rights)
+        return tree
+
+    def clear(self):
+        """清空表达式树"""
+        del self.operands[:]
+        del self.operators[:]
+        del self.lefts[:]
+        del self.rights[:]
 
     def is_empty(self):
         """判断树是否为空"""
-        return self.root is None
+        return len(self.operands) == 0
+
+    def add_leaf(self, operand: int) -> int:
+        """添加一个叶节点
+
+        Args:
+            operand: 节点的值
+
+        Returns:
+            int: 新节点的下标
+        """
+        self.operands.append(operand)
+        self.operators.append(LEAF)
+        self.lefts.append(-1)
+        self.rights.append(-1)
+        return len(self.operands) - 1
+
+    def split(
+        self, index: int, operator: OperatorType, left: int, right: int
+    ) -> Tuple[int, int]:
+        """把叶节点拆分为operator运算，并添加两个值分别为left、right的子节点
+
+        Args:
+            index: 被拆分的叶节点的下标
+            operator: 运算符
+            left: 左子节点的值
+            right: 右子节点的值
+
+        Returns:
+            Tuple[int, int]: 左右子节点的下标
+        """
+        left_index = self.add_leaf(left)
+        right_index = self.add_leaf(right)
+        self.operators[index] = OPERATOR_CODES.index(operator)
+        self.lefts[index] = left_index
+        self.rights[index] = right_index
+        return left_index, right_index
+
+    def to_node(self) -> ArithmeticNode:
+        """转换为ArithmeticNode组成的树，返回根节点"""
+        if self.is_empty():
+            raise ValueError("表达式树为空")
+        nodes = [
+            ArithmeticNode(operand, OPERATOR_CODES[code] if code != LEAF else None)
+            for operand, code in zip(self.operands, self.operators)
+        ]
+        for node, left, right in zip(nodes, self.lefts, self.rights):
+            if left >= 0:
+                node.left_node = nodes[left]
+                node.right_node = nodes[right]
+        return nodes[0]
+
+    def load_node(self, node: ArithmeticNode):
+        """把以node为根的ArithmeticNode树追加到空树中"""
+        if not self.is_empty():
+            raise ValueError("只能向空的表达式树中载入节点")
+        # 先序遍历分配下标，保证子节点的下标大于父节点
+        self.add_leaf(node.operand)
+        stack = [(node, 0)]
+        while stack:
+            current, index = stack.pop()
+            if current.left_node is None and current.right_node is None:
+                continue
+            left_index, right_index = self.split(
+                index,
+                current.operator,
+                current.left_node.operand,
+                current.right_node.operand,
+            )
+            stack.append((current.right_node, right_index))
+            stack.append((current.left_node, left_index))
+
+    def evaluate(self) -> int:
+        """返回整个表达式的值
+
+        每个节点的operand就是其子树的计算结果，因此根节点的operand即为答案，
+        不需要渲染成字符串后再解析计算
+        """
+        if self.is_empty():
+            raise ValueError("表达式树为空")
+        return self.operands[0]
+
+    def canonical_key(self) -> str:
+        """返回表达式的规范形式
+
+        连续的同一种加法或乘法先展平为一组操作数，再按字典序排列，
+        因此"3 + 4"和"4 + 3"、"(2 + 3) + 4"和"2 + (3 + 4)"都得到相同的结果；
+        其余部分与表达式结构一一对应，可直接作为哈希键判断题目是否重复。
+        非叶节点总是带括号，避免歧义
+        """
+        if self.is_empty():
+            raise ValueError("表达式树为空")
+
+        keys: List[str] = [""] * len(self.operands)
+        # 加法和乘法节点展平后的操作数，子节点与父节点运算符相同时并入父节点
+        terms: List[Optional[List[str]]] = [None] * len(self.operands)
+        for i in range(len(self.operands) - 1, -1, -1):
+            code = self.operators[i]
+            if code == LEAF:
+                keys[i] = str(self.operands[i])
+                continue
+            operator = OPERATOR_CODES[code]
+            left, right = self.lefts[i], self.rights[i]
+            if operator not in COMMUTATIVE_OPERATORS:
+                keys[i] = f"({keys[left]}{operator.value}{keys[right]})"
+                continue
+            flattened = []
+            for child in (left, right):
+                if self.operators[child] == code:
+                    flattened.extend(terms[child])
+                else:
+                    flattened.append(keys[child])
+            flattened.sort()
+            terms[i] = flattened
+            keys[i] = "(" + operator.value.join(flattened) + ")"
+        return keys[0]
 
     def get_arithmetic(self) -> str:
-        """生成表示整个算术表达式的字符串，通过中序遍历实现"""
-        return self._inorder(self.root)
+        """生成表示整个算术表达式的字符串，如"(3 + 4) * 5"
+
+        负数操作数加括号，并根据运算符优先级规则给需要的子表达式加括号
+        """
+        return self.render(RENDER_TEXT)
+
+    def get_tokens(self) -> List[str]:
+        """生成表达式的记号列表，如["(", "3", "+", "4", ")", "*", "5"]"""
+        return self.render(RENDER_TOKENS)
+
+    def get_latex(self) -> str:
+        r"""生成表达式的LaTeX代码，如(3 + 4) \times 5"""
+        return self.render(RENDER_LATEX)
 
-    def _inorder(self, node: ArithmeticNode) -> str:
-        """递归进行中序遍历，生成带正确括号的表达式字符串
+    def render(self, target: str = RENDER_TEXT):
+        """按指定的输出格式渲染整个表达式
 
-        算法：
-        1. 对于叶节点，直接返回其操作数
-        2. 对于非叶节点，递归处理左子树、当前运算符、右子树
-        3. 根据运算符优先级规则添加必要的括号
+        一次非递归的中序遍历把记号依次写入同一个缓冲区，不为每个节点生成中间字符串；
+        括号由模块级的查找表决定，渲染过程中不再调用_needs_parentheses
 
         Args:
-            node: 当前处理的节点
+            target: 输出格式，RENDER_TEXT、RENDER_TOKENS或RENDER_LATEX
 
         Returns:
-            表示当前子树对应算术表达式的字符串
+            RENDER_TOKENS返回记号列表，其余格式返回字符串
         """
-        # 空节点返回空字符串
-        if node is None:
-            return ""
-
-        # 叶节点：如果是负数加括号，否则直接转字符串
-        if node.left_node is None and node.right_node is None:
-            return f"({node.operand})" if node.operand < 0 else str(node.operand)
-
-        # 递归生成左子树表达式
-        left = self._inorder(node.left_node)
-        # 获取当前节点的运算符
-        operator = node.operator.value
-        # 递归生成右子树表达式
-        right = self._inorder(node.right_node)
-
-        # 判断是否需要给当前表达式加括号
-        needs_parentheses = node.parent_node is not None and self._needs_parentheses(
-            node.operator, node.parent_node.operator
-        )
+        symbols = RENDER_SYMBOLS[target]
+        buffer: List[str] = []
+        if not self.is_empty():
+            self._emit(buffer, symbols)
+        if target == RENDER_TOKENS:
+            return buffer
+        return "".join(buffer)
+
+    def _emit(self, buffer: List[str], symbols: Tuple[str, ...]):
+        """把表达式的记号按顺序追加到buffer
 
-        # 根据需要返回带括号或不带括号的表达式
-        if needs_parentheses:
-            return f"({left} {operator} {right})"
-        return f"{left} {operator} {right}"
+        栈中的整数是待渲染的节点下标，字符串是待输出的记号；
+        按与输出相反的顺序入栈，出栈顺序即为中序
+        """
+        operands, operators = self.operands, self.operators
+        lefts, rights = self.lefts, self.rights
+        open_paren, close_paren = symbols[-2], symbols[-1]
+        append = buffer.append
+        stack: List = [0]
+        pop, push = stack.pop, stack.append
+        while stack:
+            item = pop()
+            if item.__class__ is str:
+                append(item)
+                continue
+            code = operators[item]
+            if code == LEAF:
+                operand = operands[item]
+                if operand < 0:
+                    append(open_paren)
+                    append(str(operand))
+                    append(close_paren)
+                else:
+                    append(str(operand))
+                continue
 
+            left, right = lefts[item], rights[item]
+            right_wrapped = PARENTHESES_TABLE[1][operators[right]][code]
+            left_wrapped = PARENTHESES_TABLE[0][operators[left]][code]
+            if right_wrapped:
+                push(close_paren)
+            push(right)
+            if right_wrapped:
+                push(open_paren)
+            push(symbols[code])
+            if left_wrapped:
+                push(close_paren)
+            push(left)
+            if left_wrapped:
+                push(open_paren)
+
+    @staticmethod
     def _needs_parentheses(
-        self, current_op: OperatorType, parent_op: OperatorType
+        current_op: OperatorType, parent_op: OperatorType, is_right: bool = False
     ) -> bool:
         """判断当前运算是否需要括号以保持正确的计算顺序
 
         规则：
         1. 当前运算符优先级低于父运算符时需要括号
         2. 同级运算符中，减法和除法需要括号（因为不满足结合律）
+        3. 同级运算中，作为减法或除法的右操作数时需要括号
 
         Args:
             current_op: 当前运算符
             parent_op: 父节点的运算符
+            is_right: 当前节点是否为父节点的右子节点
 
         Returns:
             bool: 是否需要括号
@@ -124,13 +352,7 @@ class ArithmeticTree:
         if current_op is None or parent_op is None:
             return False
 
-        # 定义运算符优先级
-        priorities = {
-            OperatorType.ADDITION: 1,  # 加法优先级为1
-            OperatorType.SUBTRACTION: 1,  # 减法优先级为1
-            OperatorType.MULTIPLICATION: 2,  # 乘法优先级为2
-            OperatorType.DIVISION: 2,  # 除法优先级为2
-        }
+        priorities = OPERATOR_PRIORITIES
 
         # 当前运算符优先级低于父运算符时需要括号
         # 如：(a + b) * c
@@ -143,5 +365,26 @@ class ArithmeticTree:
         if priorities[current_op] == priorities[parent_op]:
             if current_op in (OperatorType.SUBTRACTION, OperatorType.DIVISION):
                 return True
+            # 如：a - (b + c)，因为a - b + c结果不同
+            # 如：a ÷ (b * c)，因为a ÷ b * c结果不同
+            if is_right and parent_op in (
+                OperatorType.SUBTRACTION,
+                OperatorType.DIVISION,
+            ):
+                return True
 
         return False
+
+
+# 子表达式是否需要括号的查找表：PARENTHESES_TABLE[是否为右子节点][子节点编码][父节点编码]，
+# 子节点编码为LEAF（-1）时取到最后一行，叶节点不需要括号
+PARENTHESES_TABLE = tuple(
+    tuple(
+        tuple(
+            ArithmeticTree._needs_parentheses(child, parent, is_right)
+            for parent in OPERATOR_CODES
+        )
+        for child in OPERATOR_CODES + (None,)
+    )
+    for is_right in (False, True)
+)
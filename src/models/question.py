@@ -14,6 +14,10 @@ from enum import Enum  # 导入Enum用于创建枚举类
 from typing import Optional, List  # 导入类型提示所需的类
 
 
+# 判断答案是否正确时允许的误差
+ANSWER_TOLERANCE = 0.001
+
+
 class DifficultyLevel(Enum):
     """题目难度级别的枚举类"""
 
@@ -40,12 +44,14 @@ class Question:
         answer: 正确答案
         operator_types: 题目中包含的运算符类型列表
         user_answer: 用户的答案，可选
+        canonical_key: 表达式树的规范形式，交换律和结合律下等价的题目相同，用于题目去重
     """
 
     content: str  # 题目内容，如"2 + 3 * 4"
     answer: float  # 正确答案
     operator_types: List[OperatorType]  # 题目中使用的运算符列表
     user_answer: Optional[float] = None  # 用户答案，初始为None
+    canonical_key: Optional[str] = None  # 规范形式，如"(2+(3*4))"
 
     def check_answer(self) -> bool:
         """检查用户答案是否正确
@@ -55,4 +61,8 @@ class Question:
         Returns:
             bool: 用户答案是否正确
         """
-        return abs(self.answer - self.user_answer) < 0.001
+        return self.is_correct(self.user_answer)
+
+    def is_correct(self, user_answer: float) -> bool:
+        """检查给定的答案是否正确，不修改题目，误差范围与check_answer相同"""
+        return abs(self.answer - user_answer) < ANSWER_TOLERANCE
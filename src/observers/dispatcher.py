@@ -0,0 +1,192 @@
+"""
+观察者通知的分发模块
+
+本模块决定练习状态变化时如何通知观察者，主要功能：
+1. 同步分发：在调用方线程中依次通知，与原来的行为相同
+2. 异步分发：事件放入有界队列，由后台线程通知，调用方不被慢的观察者阻塞
+3. 合并：同一练习对同一观察者尚未送达的事件只保留最新的状态
+4. 背压：队列满时按策略阻塞调用方、丢弃最早的事件或丢弃新事件
+
+核心类：
+- SyncDispatcher：同步分发器
+- AsyncDispatcher：异步分发器
+- BackpressurePolicy：队列满时的处理策略
+
+观察者的接口不变，异步分发时on_exercise_state_changed在后台线程中调用。
+"""
+
+import threading
+from collections import OrderedDict
+from enum import Enum
+from itertools import count
+from typing import Iterable, Optional
+
+from .exercise_observer import ExerciseObserver, ExerciseStatus
+
+
+class BackpressurePolicy(Enum):
+    """队列满时的处理策略"""
+
+    BLOCK = "block"  # 阻塞调用方，直到队列有空位；后台线程自身的分发不阻塞
+    DROP_OLDEST = "drop_oldest"  # 丢弃最早的未送达事件
+    DROP_NEWEST = "drop_newest"  # 丢弃新事件
+
+
+class SyncDispatcher:
+    """在调用方线程中依次通知观察者"""
+
+    def dispatch(
+        self,
+        source: object,
+        observers: Iterable[ExerciseObserver],
+        status: ExerciseStatus,
+    ):
+        """通知观察者
+
+        Args:
+            source: 发出事件的练习
+            observers: 要通知的观察者
+            status: 新状态
+        """
+        for observer in observers:
+            observer.on_exercise_state_changed(status)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已分发的事件全部送达，同步分发时总是已经送达"""
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        pass
+
+
+# 默认使用的同步分发器
+SYNC_DISPATCHER = SyncDispatcher()
+
+
+class AsyncDispatcher(SyncDispatcher):
+    """在后台线程中通知观察者
+
+    观察者的on_exercise_state_changed在分发器的后台线程中调用，而不是在调用方线程中。
+    观察者抛出的异常不会影响其他事件的送达，只计入errors并保存在last_error中。
+    观察者在回调中再次分发事件时（例如修改了练习的状态），即使队列已满、策略为BLOCK，
+    事件也直接入队而不等待，因为只有后台线程自己能腾出空位。
+    """
+
+    # 默认的队列容量
+    DEFAULT_MAXSIZE = 1024
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+        coalesce: bool = True,
+    ):
+        """
+        Args:
+            maxsize: 队列中未送达事件的上限，必须为正数
+            policy: 队列满时的处理策略
+            coalesce: 是否合并同一练习对同一观察者的未送达事件
+        """
+        if maxsize <= 0:
+            raise ValueError("队列容量必须为正数")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.coalesce = coalesce
+        # 键为(练习, 观察者)的id，不合并时为递增的序号；值为(观察者, 状态, 练习)，
+        # 保存练习的引用使其id在事件送达前不被复用
+        self._pending: "OrderedDict[object, tuple]" = OrderedDict()
+        self._sequence = count()
+        self._condition = threading.Condition()
+        self._delivering = False
+        self._closed = False
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._deliver, daemon=True)
+        self._thread.start()
+
+    def dispatch(
+        self,
+        source: object,
+        observers: Iterable[ExerciseObserver],
+        status: ExerciseStatus,
+    ):
+        """把事件放入队列，队列满时按背压策略处理，在后台线程中调用时不阻塞
+
+        Raises:
+            RuntimeError: 分发器已关闭
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("分发器已关闭")
+            for observer in observers:
+                self._enqueue(source, observer, status)
+            self._condition.notify_all()
+
+    def _enqueue(self, source: object, observer: ExerciseObserver, status):
+        if self.coalesce:
+            key = (id(source), id(observer))
+            if key in self._pending:
+                # 保留原来的位置，只更新为最新的状态
+                self._pending[key] = (observer, status, source)
+                self.coalesced += 1
+                return
+        else:
+            key = next(self._sequence)
+
+        if len(self._pending) >= self.maxsize:
+            if self.policy is BackpressurePolicy.DROP_NEWEST:
+                self.dropped += 1
+                return
+            if self.policy is BackpressurePolicy.DROP_OLDEST:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            elif threading.current_thread() is not self._thread:
+                self._condition.notify_all()
+                while len(self._pending) >= self.maxsize and not self._closed:
+                    self._condition.wait()
+        self._pending[key] = (observer, status, source)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待队列中的事件全部送达
+
+        Returns:
+            bool: 是否在超时前全部送达
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._delivering, timeout
+            )
+
+    def close(self, timeout: Optional[float] = None):
+        """送达剩余的事件后停止后台线程，之后不能再分发事件"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _deliver(self):
+        """后台线程：逐个取出事件并通知观察者"""
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                _, (observer, status, _) = self._pending.popitem(last=False)
+                self._delivering = True
+                # 唤醒因队列满而等待的调用方
+                self._condition.notify_all()
+
+            try:
+                observer.on_exercise_state_changed(status)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+
+            with self._condition:
+                self._delivering = False
+                self.delivered += 1
+                self._condition.notify_all()
@@ -1,10 +1,24 @@
 from typing import List, Optional
-from .scoring_strategy import ScoringStrategy
+from .scoring_strategy import HAS_NUMPY, ScoreAccumulator, ScoringStrategy
 from ..models.answer import Answer
 from ..models.question import DifficultyLevel
 
+if HAS_NUMPY:
+    import numpy as np
+
+    from .cohort_scoring import DIFFICULTY_CODES, CohortTotals
+
 
 class TimedScoringStrategy(ScoringStrategy):
+    supports_totals = True
+
+    # 各难度每道题的基准时间（秒）
+    BASE_TIMES = {
+        DifficultyLevel.EASY: 30,  # 简单题平均30秒
+        DifficultyLevel.MEDIUM: 45,  # 中等题平均45秒
+        DifficultyLevel.HARD: 60,  # 困难题平均60秒
+    }
+
     def __init__(self, time_weight: float = 0.3, accuracy_weight: float = 0.7):
         if not (0 < time_weight < 1 and 0 < accuracy_weight < 1):
             raise ValueError("权重必须在0到1之间")
@@ -23,22 +37,26 @@ class TimedScoringStrategy(ScoringStrategy):
         if difficulty is None:
             raise ValueError("TimedScoringStrategy需要difficulty参数")
 
-        # 计算正确率分数
-        correct_count = sum(1 for answer in answers if answer.is_correct)
-        accuracy_score = correct_count / len(answers) * 100
+        return self.score(ScoreAccumulator.from_answers(answers), difficulty)
 
-        # 根据难度和题目数量计算基准时间（秒）
-        base_times = {
-            DifficultyLevel.EASY: 30,  # 简单题平均30秒
-            DifficultyLevel.MEDIUM: 45,  # 中等题平均45秒
-            DifficultyLevel.HARD: 60,  # 困难题平均60秒
-        }
+    def calculate_score_from_totals(
+        self,
+        answered_count: int,
+        correct_count: int,
+        total_time: int,
+        difficulty: Optional[DifficultyLevel] = None,
+    ) -> float:
+        if answered_count == 0:
+            return 0.0
+
+        if difficulty is None:
+            raise ValueError("TimedScoringStrategy需要difficulty参数")
 
-        base_time_per_question = base_times[difficulty]
-        total_base_time = base_time_per_question * len(answers)
+        # 计算正确率分数
+        accuracy_score = correct_count / answered_count * 100
 
-        # 计算实际用时
-        total_time = sum(answer.time_spent for answer in answers)
+        # 根据难度和题目数量计算基准时间（秒）
+        total_base_time = self.BASE_TIMES[difficulty] * answered_count
 
         # 计算时间分数
         if total_time <= total_base_time:
@@ -54,13 +72,50 @@ class TimedScoringStrategy(ScoringStrategy):
 
         return round(final_score, 2)
 
+    def score_cohort(self, totals: "CohortTotals") -> "np.ndarray":
+        if totals.difficulty_counts is None:
+            raise ValueError("TimedScoringStrategy需要difficulties参数")
+
+        # 与calculate_score_from_totals逐项对应的向量运算
+        accuracy_scores = totals.correct_counts / totals.answered_counts * 100
+
+        base_times = np.array([self.BASE_TIMES[level] for level in DIFFICULTY_CODES])
+        total_base_times = totals.difficulty_counts @ base_times
+
+        overtime_ratios = (totals.total_times - total_base_times) / total_base_times
+        time_scores = np.where(
+            totals.total_times <= total_base_times,
+            100.0,
+            np.clip(100 - overtime_ratios * 100, 0, 100),
+        )
+
+        return (
+            accuracy_scores * self.accuracy_weight + time_scores * self.time_weight
+        )
+
 
 class AccuracyScoringStrategy(ScoringStrategy):
+    supports_totals = True
+
     def calculate_score(
         self, answers: List[Answer], difficulty: Optional[DifficultyLevel] = None
     ) -> float:
         if not answers:
             return 0.0
 
-        correct_count = sum(1 for answer in answers if answer.is_correct)
-        return round(correct_count / len(answers) * 100, 2)
+        return self.score(ScoreAccumulator.from_answers(answers))
+
+    def calculate_score_from_totals(
+        self,
+        answered_count: int,
+        correct_count: int,
+        total_time: int,
+        difficulty: Optional[DifficultyLevel] = None,
+    ) -> float:
+        if answered_count == 0:
+            return 0.0
+
+        return round(correct_count / answered_count * 100, 2)
+
+    def score_cohort(self, totals: "CohortTotals") -> "np.ndarray":
+        return totals.correct_counts / totals.answered_counts * 100
@@ -1,12 +1,184 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
 from ..models.answer import Answer
+from ..models.answer_log import AnswerLog
 from ..models.question import DifficultyLevel
 
+# 检查是否安装了NumPy，按列的批量计分依赖它
+HAS_NUMPY = False
+
+try:
+    import numpy as np
+
+    from .cohort_scoring import (
+        DIFFICULTY_CODES,
+        CohortTotals,
+        group_answers,
+        round_scores,
+    )
+
+    HAS_NUMPY = True
+except ImportError:
+    pass
+
+
+@dataclass
+class ScoreAccumulator:
+    """计分所需的汇总数据，每作答一题以O(1)更新"""
+
+    answered_count: int = 0
+    correct_count: int = 0
+    total_time: int = 0  # 以秒为单位
+
+    @classmethod
+    def from_answers(cls, answers: Iterable[Answer]) -> "ScoreAccumulator":
+        """从答题记录汇总，AnswerLog直接在整列上归约"""
+        if isinstance(answers, AnswerLog):
+            return cls(len(answers), answers.correct_count(), answers.total_time())
+        accumulator = cls()
+        for answer in answers:
+            accumulator.add(answer)
+        return accumulator
+
+    def add(self, answer: Answer):
+        """计入一条答题记录"""
+        self.record(answer.is_correct, answer.time_spent)
+
+    def record(self, is_correct: bool, time_spent: int):
+        """计入一道题的结果"""
+        self.answered_count += 1
+        self.correct_count += is_correct
+        self.total_time += time_spent
+
+    def record_totals(self, answered_count: int, correct_count: int, total_time: int):
+        """计入一批题目的汇总结果"""
+        self.answered_count += answered_count
+        self.correct_count += correct_count
+        self.total_time += total_time
+
+    def reset(self):
+        self.answered_count = 0
+        self.correct_count = 0
+        self.total_time = 0
+
 
 class ScoringStrategy(ABC):
+    # 是否实现了calculate_score_from_totals，即能否只凭汇总数据计分；
+    # 不支持的策略只能按全部答题记录计分，不能用于流式练习
+    supports_totals = False
+
     @abstractmethod
     def calculate_score(
         self, answers: List[Answer], difficulty: Optional[DifficultyLevel] = None
     ) -> float:
         pass
+
+    def calculate_score_from_totals(
+        self,
+        answered_count: int,
+        correct_count: int,
+        total_time: int,
+        difficulty: Optional[DifficultyLevel] = None,
+    ) -> float:
+        """根据汇总数据计算分数，用于不保留全部答题记录的流式练习
+
+        supports_totals为True的子类必须实现本方法。
+
+        Args:
+            answered_count: 已作答的题目数
+            correct_count: 答对的题目数
+            total_time: 总用时（秒）
+            difficulty: 难度级别
+
+        Returns:
+            float: 分数
+
+        Raises:
+            TypeError: 策略不支持按汇总数据计分
+        """
+        raise TypeError(f"{type(self).__name__}不支持按汇总数据计分")
+
+    def score(
+        self,
+        accumulator: ScoreAccumulator,
+        difficulty: Optional[DifficultyLevel] = None,
+    ) -> float:
+        """根据累加器计算当前分数，耗时与已作答的题目数无关
+
+        与对同一组答题记录调用calculate_score的结果完全相同，
+        只能用于supports_totals为True的策略。
+
+        Args:
+            accumulator: 已作答题目的汇总数据
+            difficulty: 难度级别
+
+        Returns:
+            float: 分数
+        """
+        return self.calculate_score_from_totals(
+            accumulator.answered_count,
+            accumulator.correct_count,
+            accumulator.total_time,
+            difficulty,
+        )
+
+    def calculate_cohort_scores(
+        self,
+        student_ids: Sequence,
+        correct: Sequence[bool],
+        times: Sequence[int],
+        difficulties: Optional[Sequence[int]] = None,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """按列一次计算全部学生的分数
+
+        每个学生的分数与对他的全部答题记录调用calculate_score的结果完全相同。
+        学生编号可以是任意分组键，如已保存的练习的编号。
+
+        Args:
+            student_ids: 每条记录所属的学生编号
+            correct: 每条记录是否正确
+            times: 每条记录的用时（秒）
+            difficulties: 每条记录的难度编码，即在cohort_scoring.DIFFICULTY_CODES
+                中的位置；需要难度的策略必须提供
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 去重并排序后的学生编号，以及对应的分数
+
+        Raises:
+            RuntimeError: 未安装NumPy
+            TypeError: 策略不支持按汇总数据计分
+        """
+        if not HAS_NUMPY:
+            raise RuntimeError("按列的批量计分需要NumPy")
+        if not self.supports_totals:
+            raise TypeError(f"{type(self).__name__}不支持按汇总数据计分，无法批量计分")
+        totals = group_answers(student_ids, correct, times, difficulties)
+        return totals.student_ids, round_scores(self.score_cohort(totals))
+
+    def score_cohort(self, totals: "CohortTotals") -> "np.ndarray":
+        """根据每组的汇总数据计算未取整的分数，供calculate_cohort_scores调用
+
+        默认逐组调用calculate_score_from_totals，组内只有一种难度时传入该难度，
+        否则难度为None；子类可以改写为整列的向量运算。
+
+        Args:
+            totals: 每组的汇总数据
+
+        Returns:
+            np.ndarray: 每组的分数
+        """
+        scores = np.empty(len(totals.student_ids), dtype=np.float64)
+        for group in range(len(scores)):
+            difficulty = None
+            if totals.difficulty_counts is not None:
+                levels = np.flatnonzero(totals.difficulty_counts[group])
+                if len(levels) == 1:
+                    difficulty = DIFFICULTY_CODES[levels[0]]
+            scores[group] = self.calculate_score_from_totals(
+                int(totals.answered_counts[group]),
+                int(totals.correct_counts[group]),
+                int(totals.total_times[group]),
+                difficulty,
+            )
+        return scores
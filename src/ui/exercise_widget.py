@@ -36,7 +36,7 @@ from PySide6.QtCore import (
 from PySide6.QtWidgets import QScroller, QScrollerProperties  # 新增导入
 from PySide6.QtGui import QColor, QPalette, QFont, QTextCursor
 from ..core.exercise import Exercise
-from ..core.exercise_record import ExerciseRecord, QuestionRecord
+from ..core.exercise_record import ExerciseRecord
 from ..models.question import OperatorType, DifficultyLevel
 from ..observers.concrete_observers import Student
 from ..strategies.concrete_strategies import (
@@ -64,6 +64,7 @@ class UIUpdateSignals(QObject):
     client_init_failure = Signal(str)  # 传递错误信息
     append_text = Signal(str)  # 用于更新文本
     clear_text = Signal()  # 用于清除文本
+    questions_available = Signal()  # 后台生成了新题目或生成结束
 
 
 class AnimatedProgressBar(QWidget):
@@ -539,6 +540,7 @@ class ExerciseWidget(QWidget):
         self.ui_signals.client_init_failure.connect(self.onClientInitFailure)
         self.ui_signals.append_text.connect(self.appendFeedbackText)
         self.ui_signals.clear_text.connect(self.clearFeedbackText)
+        self.ui_signals.questions_available.connect(self.onQuestionsAvailable)
 
         self.setupUI()
         # self.initExercise()
@@ -956,33 +958,16 @@ class ExerciseWidget(QWidget):
         )
         list_item.updateDisplay("正确" if is_correct else "错误")
 
-        # 更新进度
-        progress = (
-            (self.current_question_index + 1) / len(self.exercise.questions) * 100
-        )
+        # 更新进度，题目可能仍在后台生成，按题目总数计算
+        progress = (self.current_question_index + 1) / self.question_count * 100
         self.progress_bar.setValue(progress)
 
-        # 记录答题信息
-        question_record = QuestionRecord(
-            content=self.exercise.questions[self.current_question_index].content,
-            user_answer=answer,
-            correct_answer=self.exercise.questions[self.current_question_index].answer,
-            is_correct=is_correct,
-            time_spent=time_spent,
-        )
-        self.exercise_record.add_question_record(question_record)
-
         # 更新当前题目索引并处理下一题
         self.current_question_index += 1
 
-        # 如果还有下一题，添加新卡片
-        if self.current_question_index < len(self.exercise.questions):
-            self.addQuestionCard(
-                self.exercise.questions[self.current_question_index].content
-            )
-            next_list_item = self.question_list.item(self.current_question_index)
-            next_list_item.updateDisplay("当前")
-            self.question_list.setCurrentItem(next_list_item)
+        # 如果还有下一题，添加新卡片；下一题尚未生成时在生成后添加
+        if self.current_question_index < self.question_count:
+            self.showCurrentQuestion()
         else:
             # 练习完成
             final_score = self.exercise.submit_exercise()
@@ -1177,8 +1162,44 @@ class ExerciseWidget(QWidget):
         # 重新获取反馈
         self.getFeedback()
 
+    def showCurrentQuestion(self):
+        """为当前题目添加卡片，题目尚未生成或卡片已存在时不做任何事"""
+        index = self.current_question_index
+        if index != len(self.question_cards) or index >= len(self.exercise.questions):
+            return
+
+        self.addQuestionCard(self.exercise.questions[index].content)
+        list_item = self.question_list.item(index)
+        list_item.updateDisplay("当前")
+        self.question_list.setCurrentItem(list_item)
+
+        if index == 0:
+            # 从第一题出现时开始计时
+            self.start_time = time.time()
+            self.exercise.last_answer_time = self.start_time
+
+    def onQuestionsAvailable(self):
+        """收取后台生成的题目，添加到列表"""
+        if self.exercise is None:
+            return
+        try:
+            questions = self.exercise.collect_prefetched()
+        except RuntimeError as e:
+            self.exercise.stop_prefetch()
+            QMessageBox.warning(self, "生成失败", f"题目生成失败：{e.__cause__}")
+            return
+
+        start = len(self.exercise.questions) - len(questions)
+        for i, question in enumerate(questions, start):
+            self.question_list.addItem(QuestionListItem(question.content, i))
+
+        self.showCurrentQuestion()
+
     def updateTimer(self):
-        if self.current_question_index < len(self.exercise.questions):
+        if (
+            self.exercise is not None
+            and self.current_question_index < self.question_count
+        ):
             elapsed_time = int(time.time() - self.start_time)
             self.time_display.setText(self.formatTime(elapsed_time))
 
@@ -1188,6 +1209,10 @@ class ExerciseWidget(QWidget):
         return f"{minutes}:{seconds:02d}"
 
     def initExercise(self):
+        # 停止上一次练习的后台生成
+        if self.exercise is not None:
+            self.exercise.stop_prefetch()
+
         # 清除现有题目
         self.question_list.clear()
         for card in self.question_cards:
@@ -1212,35 +1237,24 @@ class ExerciseWidget(QWidget):
         self.exercise.add_observer(Student("测试用户"))
         self.exercise.set_scoring_strategy(self.scoring_strategy)
 
-        # 初始化练习记录
+        # 初始化练习记录，题目记录直接取自练习的答题记录
         self.exercise_record = ExerciseRecord(
             difficulty=self.difficulty.value,
             number_range=self.number_range,
             operator_types=self.operator_types,
+            answer_log=self.exercise.answer_log,
         )
 
-        # 生成题目
-        self.exercise.generate_questions(self.question_count)
-
-        for i, question in enumerate(self.exercise.questions):
-            # 添加到列表
-            list_item = QuestionListItem(question.content, i)
-            self.question_list.addItem(list_item)
-
-        # 设置第一题为当前题目
-        first_item = self.question_list.item(0)
-        first_item.updateDisplay("当前")
-        self.question_list.setCurrentItem(first_item)
-
-        # 重置进度条
+        # 重置进度条和计时器
         self.progress_bar.setValue(0)
-
-        # 显示第一题
-        self.addQuestionCard(self.exercise.questions[0].content)
-
-        # 重置计时器
         self.start_time = time.time()
 
+        # 在后台生成题目，生成的题目通过信号在主线程中逐批加入列表，
+        # 第一题生成后立即显示
+        self.exercise.prefetch_questions(
+            self.question_count, self.ui_signals.questions_available.emit
+        )
+
     def onQuestionItemClicked(self, item: QuestionListItem):
         if 0 <= item.index < len(self.question_cards):
             card = self.question_cards[item.index]
@@ -0,0 +1,62 @@
+import unittest
+
+from src.core.exercise import Exercise
+from src.models.arithmetic_tree import ArithmeticTree
+from src.models.question import DifficultyLevel, OperatorType
+
+
+def chain(operator, values, left_deep):
+    """三个操作数的同种运算，left_deep为True时是(a op b) op c，否则是a op (b op c)"""
+    tree = ArithmeticTree()
+    tree.add_leaf(0)
+    left, right = tree.split(0, operator, 0, 0)
+    if left_deep:
+        inner_left, inner_right = tree.split(left, operator, 0, 0)
+        slots = (inner_left, inner_right, right)
+    else:
+        inner_left, inner_right = tree.split(right, operator, 0, 0)
+        slots = (left, inner_left, inner_right)
+    for slot, value in zip(slots, values):
+        tree.operands[slot] = value
+    return tree
+
+
+class CanonicalKeyTest(unittest.TestCase):
+    def test_associative_chains_share_a_key(self):
+        for operator in (OperatorType.ADDITION, OperatorType.MULTIPLICATION):
+            keys = {
+                chain(operator, values, left_deep).canonical_key()
+                for values in ((2, 0, 0), (0, 2, 0), (0, 0, 2))
+                for left_deep in (True, False)
+            }
+            self.assertEqual(len(keys), 1, keys)
+
+    def test_non_associative_chains_differ(self):
+        for operator in (OperatorType.SUBTRACTION, OperatorType.DIVISION):
+            self.assertNotEqual(
+                chain(operator, (8, 4, 2), True).canonical_key(),
+                chain(operator, (8, 4, 2), False).canonical_key(),
+            )
+
+    def test_unique_questions_render_differently(self):
+        for operator in (OperatorType.ADDITION, OperatorType.MULTIPLICATION):
+            exercise = Exercise(DifficultyLevel.MEDIUM, (0, 6), [operator])
+            exercise.generate_questions(20, unique=True, seed=1)
+            contents = [question.content for question in exercise.questions]
+            self.assertEqual(len(set(contents)), len(contents), contents)
+
+
+class NodeConversionTest(unittest.TestCase):
+    def test_to_node_returns_a_detached_copy(self):
+        tree = chain(OperatorType.SUBTRACTION, (8, 4, 2), True)
+        node = tree.to_node()
+        node.left_node.operand = 100
+
+        copy = ArithmeticTree()
+        copy.load_node(tree.to_node())
+        self.assertEqual(copy.get_arithmetic(), tree.get_arithmetic())
+        self.assertNotIn("100", tree.get_arithmetic())
+
+
+if __name__ == "__main__":
+    unittest.main()
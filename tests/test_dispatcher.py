@@ -0,0 +1,38 @@
+import threading
+import unittest
+
+from src.observers.dispatcher import AsyncDispatcher
+from src.observers.exercise_observer import ExerciseStatus
+
+
+class ReentrantObserver:
+    """第一次收到通知时，在后台线程中连续分发多个事件"""
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.statuses = []
+        self.threads = set()
+
+    def on_exercise_state_changed(self, status):
+        self.statuses.append(status)
+        self.threads.add(threading.current_thread())
+        if len(self.statuses) == 1:
+            for source in range(3):
+                self.dispatcher.dispatch(source, [self], ExerciseStatus.GRADED)
+
+
+class AsyncDispatcherTest(unittest.TestCase):
+    def test_worker_dispatch_does_not_block_when_full(self):
+        dispatcher = AsyncDispatcher(maxsize=1, coalesce=False)
+        observer = ReentrantObserver(dispatcher)
+        dispatcher.dispatch(object(), [observer], ExerciseStatus.IN_PROGRESS)
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.close()
+
+        self.assertEqual(len(observer.statuses), 4)
+        self.assertEqual(observer.threads, {dispatcher._thread})
+        self.assertEqual(dispatcher.dropped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
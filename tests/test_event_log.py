@@ -0,0 +1,175 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.core.event_log import ExerciseEventLog, recover_exercise
+from src.core.exercise import Exercise
+from src.models.question import DifficultyLevel, OperatorType
+from src.strategies.concrete_strategies import (
+    AccuracyScoringStrategy,
+    TimedScoringStrategy,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中关联日志、作答后直接退出，不关闭也不同步日志
+CRASHING_SESSION = textwrap.dedent(
+    """
+    import os, sys
+    sys.path.insert(0, {root!r})
+    from src.core.event_log import ExerciseEventLog
+    from src.core.exercise import Exercise
+    from src.models.question import DifficultyLevel, OperatorType
+
+    exercise = Exercise(DifficultyLevel.EASY, (1, 20), [OperatorType.ADDITION])
+    exercise.attach_event_log(ExerciseEventLog(sys.argv[1]))
+    exercise.generate_questions(10)
+    for i in range(6):
+        exercise.submit_answer(i, exercise.questions[i].answer + (i % 2), 3)
+    print(exercise.current_score, flush=True)
+    os._exit(1)
+    """
+)
+
+
+class EventLogCrashRecoveryTest(unittest.TestCase):
+    def test_recover_after_process_crash(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [sys.executable, "-c", CRASHING_SESSION.format(root=ROOT), directory],
+                capture_output=True,
+                text=True,
+            )
+            self.assertEqual(result.returncode, 1, result.stderr)
+            self.assertEqual(result.stderr, "")
+
+            exercise = recover_exercise(directory, resume=False)
+            self.assertEqual(len(exercise.questions), 10)
+            self.assertEqual(len(exercise.answers), 6)
+            self.assertEqual(list(exercise.answer_log.correct), [1, 0, 1, 0, 1, 0])
+            self.assertEqual(exercise.current_score, float(result.stdout))
+
+
+class HalfCreditStrategy(AccuracyScoringStrategy):
+    """改变了计分方式的子类，无法保存到日志"""
+
+    def calculate_score_from_totals(self, *args, **kwargs):
+        return super().calculate_score_from_totals(*args, **kwargs) / 2
+
+
+def make_exercise():
+    exercise = Exercise(DifficultyLevel.EASY, (1, 20), [OperatorType.ADDITION])
+    exercise.generate_questions(3)
+    return exercise
+
+
+class EventLogStrategyTest(unittest.TestCase):
+    def test_unserializable_strategy_cannot_be_attached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exercise = make_exercise()
+            exercise.set_scoring_strategy(HalfCreditStrategy())
+            event_log = ExerciseEventLog(directory)
+            with self.assertRaises(ValueError):
+                exercise.attach_event_log(event_log)
+            self.assertIsNone(exercise.event_log)
+            event_log.close()
+
+    def test_unserializable_strategy_cannot_be_set(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exercise = make_exercise()
+            exercise.attach_event_log(ExerciseEventLog(directory))
+            with self.assertRaises(ValueError):
+                exercise.set_scoring_strategy(HalfCreditStrategy())
+            self.assertIs(type(exercise.scoring_strategy), AccuracyScoringStrategy)
+
+            exercise.set_scoring_strategy(TimedScoringStrategy(0.4, 0.6))
+            exercise.event_log.close()
+            recovered = recover_exercise(directory, resume=False)
+            self.assertEqual(recovered.scoring_strategy.time_weight, 0.4)
+
+    def test_unknown_strategy_is_not_replaced_by_the_default(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exercise = make_exercise()
+            exercise.attach_event_log(ExerciseEventLog(directory))
+            exercise.event_log.close()
+            path = os.path.join(directory, "snapshot.json")
+            for strategy in (None, {"type": "bonus"}):
+                with open(path, encoding="utf-8") as file:
+                    state = json.load(file)
+                state["strategy"] = strategy
+                with open(path, "w", encoding="utf-8") as file:
+                    json.dump(state, file)
+                with self.assertRaises(ValueError):
+                    recover_exercise(directory, resume=False)
+
+    def test_partial_question_tail_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exercise = make_exercise()
+            exercise.attach_event_log(ExerciseEventLog(directory))
+            exercise.event_log.close()
+            with open(os.path.join(directory, "questions.jsonl"), "a") as file:
+                file.write('["1 + 2", 3')
+
+            recovered = recover_exercise(directory, resume=False)
+            self.assertEqual(
+                [question.content for question in recovered.questions],
+                [question.content for question in exercise.questions],
+            )
+
+    def test_submit_closes_the_log(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exercise = make_exercise()
+            event_log = ExerciseEventLog(directory)
+            exercise.attach_event_log(event_log)
+            for i, question in enumerate(exercise.questions):
+                exercise.submit_answer(i, question.answer, 1)
+            score = exercise.submit_exercise()
+
+            self.assertTrue(event_log._file.closed)
+            self.assertIsNone(exercise.event_log)
+            recovered = recover_exercise(directory, resume=False)
+            self.assertEqual(recovered.current_score, score)
+
+
+class EventLogAnswerTypesTest(unittest.TestCase):
+    def test_decimal_answer_is_recorded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exercise = make_exercise()
+            exercise.attach_event_log(ExerciseEventLog(directory))
+            exercise.submit_answer(1, Decimal(exercise.questions[1].answer), 4)
+            exercise.event_log.sync()
+
+            recovered = recover_exercise(directory, resume=False)
+            self.assertEqual(list(recovered.answer_log.correct), [1])
+            self.assertEqual(recovered.current_score, exercise.current_score)
+
+    @unittest.skipIf(np is None, "需要NumPy")
+    def test_numpy_scalars_are_recorded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exercise = make_exercise()
+            exercise.attach_event_log(ExerciseEventLog(directory))
+            exercise.submit_answer(np.int64(0), exercise.questions[0].answer, 4)
+            exercise.submit_answer(2, np.float32(1.5), np.int64(4))
+            exercise.event_log.sync()
+
+            self.assertIs(type(exercise.correct_count), int)
+            recovered = recover_exercise(directory, resume=False)
+            self.assertEqual(len(recovered.answers), 2)
+            self.assertEqual(
+                list(recovered.answer_log.correct), list(exercise.answer_log.correct)
+            )
+            self.assertEqual(recovered.current_score, exercise.current_score)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from src.core.exercise import Exercise
+from src.models.question import DifficultyLevel, OperatorType
+
+
+def make_exercise(count=5):
+    exercise = Exercise(DifficultyLevel.EASY, (1, 20), [OperatorType.ADDITION])
+    exercise.generate_questions(count)
+    return exercise
+
+
+def log_lengths(exercise):
+    return {len(column) for column in exercise.answer_log._columns()}
+
+
+class SubmitAnswerTest(unittest.TestCase):
+    def test_fractional_time_is_recorded(self):
+        exercise = make_exercise()
+        self.assertTrue(exercise.submit_answer(0, exercise.questions[0].answer, 2.5))
+        self.assertEqual(log_lengths(exercise), {1})
+        self.assertEqual(exercise.total_time_spent, 2)
+        self.assertEqual(exercise.answer_log.total_time(), 2)
+
+    def test_invalid_time_leaves_nothing_behind(self):
+        exercise = make_exercise()
+        with self.assertRaises((TypeError, ValueError)):
+            exercise.submit_answer(0, exercise.questions[0].answer, "slow")
+        self.assertEqual(log_lengths(exercise), {0})
+        self.assertIsNone(exercise.questions[0].user_answer)
+        self.assertEqual(exercise.answered_count, 0)
+
+
+class SubmitAnswersBatchTest(unittest.TestCase):
+    def test_invalid_time_leaves_nothing_behind(self):
+        exercise = make_exercise()
+        answers = [question.answer for question in exercise.questions]
+        with self.assertRaises((TypeError, ValueError)):
+            exercise.submit_answers_batch(range(5), answers, [1, 2, 3, None, 5])
+        self.assertEqual(log_lengths(exercise), {0})
+        self.assertTrue(all(q.user_answer is None for q in exercise.questions))
+        self.assertEqual(exercise.answered_count, 0)
+
+    def test_fractional_times_match_the_log(self):
+        exercise = make_exercise()
+        answers = [question.answer for question in exercise.questions]
+        exercise.submit_answers_batch(range(5), answers, [1.5] * 5)
+        self.assertEqual(log_lengths(exercise), {5})
+        self.assertEqual(exercise.total_time_spent, exercise.answer_log.total_time())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from src.core.exercise import Exercise
+from src.factories.factory_cache import default_factory_cache
+from src.factories.parallel import shard_seed
+from src.models.question import DifficultyLevel, OperatorType
+
+CONFIG = (DifficultyLevel.EASY, (0, 5), [OperatorType.ADDITION])
+
+
+def contents(questions):
+    return [question.content for question in questions]
+
+
+class SeededGenerationTest(unittest.TestCase):
+    def setUp(self):
+        self.generator = default_factory_cache.get_generator(*CONFIG, uniform=True)
+        self.exercise = Exercise(*CONFIG, question_generator=self.generator)
+
+    def test_seed_uses_the_injected_factory(self):
+        state = self.generator.factory.rng.getstate()
+        self.exercise.generate_questions(30, seed=3)
+        expected = self.generator.factory.clone(shard_seed(3, 0)).generate_batch(30)
+        self.assertEqual(contents(self.exercise.questions), contents(expected))
+        self.assertEqual(self.generator.factory.rng.getstate(), state)
+
+    def test_unique_seed_leaves_the_shared_generator_alone(self):
+        state = self.generator.factory.rng.getstate()
+        self.exercise.generate_questions(5, seed=3, unique=True)
+        other = Exercise(*CONFIG, question_generator=self.generator)
+        other.generate_questions(5, seed=3, unique=True)
+        self.assertEqual(contents(self.exercise.questions), contents(other.questions))
+        self.assertEqual(self.generator.factory.rng.getstate(), state)
+
+    def test_workers_are_rejected_for_an_injected_generator(self):
+        with self.assertRaises(ValueError):
+            self.exercise.generate_questions(5, workers=2)
+        self.assertEqual(self.exercise.questions, [])
+
+    def test_seed_matches_parallel_generation(self):
+        serial = Exercise(*CONFIG)
+        serial.generate_questions(50, seed=5)
+        parallel = Exercise(*CONFIG)
+        parallel.generate_questions(50, seed=5, workers=2)
+        self.assertEqual(contents(serial.questions), contents(parallel.questions))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from src.core.exercise import Exercise
+from src.core.exercise_record import ExerciseRecord, QuestionRecord
+from src.models.question import DifficultyLevel, OperatorType
+
+
+class ExerciseRecordTest(unittest.TestCase):
+    def setUp(self):
+        self.exercise = Exercise(
+            DifficultyLevel.EASY, (1, 20), [OperatorType.ADDITION]
+        )
+        self.exercise.generate_questions(3)
+        self.record = ExerciseRecord(
+            "简单", (1, 20), ["加法"], answer_log=self.exercise.answer_log
+        )
+        self.manual = QuestionRecord("1 + 1", 2, 2, True, 5)
+        self.record.add_question_record(self.manual)
+
+    def test_view_follows_the_answer_log(self):
+        questions = self.record.questions
+        self.assertEqual(len(questions), 1)
+        self.exercise.submit_answer(2, self.exercise.questions[2].answer, 7)
+        self.assertEqual(len(questions), 2)
+        self.assertIs(questions[0], self.manual)
+        self.assertEqual(questions[-1].content, self.exercise.questions[2].content)
+        self.assertEqual(questions[-1].time_spent, 7)
+        self.assertTrue(questions[-1].is_correct)
+
+    def test_list_mutation_fails_loudly(self):
+        with self.assertRaises(TypeError):
+            self.record.questions.append(self.manual)
+        with self.assertRaises(TypeError):
+            self.record.questions[0] = self.manual
+        self.assertEqual(len(self.record.questions), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from src.factories.factory_cache import default_factory_cache
+from src.models.question import DifficultyLevel, OperatorType
+
+
+def is_composite(value):
+    value = abs(value)
+    return value == 0 or any(value % d == 0 for d in range(2, value))
+
+
+class CompositeNumbersTest(unittest.TestCase):
+    def setUp(self):
+        self.factory = default_factory_cache.get_factory(
+            DifficultyLevel.EASY, (-10, 30), [OperatorType.MULTIPLICATION]
+        )
+
+    def test_matches_a_naive_check(self):
+        expected = {v for v in range(-10, 31) if abs(v) > 3 and is_composite(v)}
+        expected.add(0)
+        self.assertEqual(self.factory.composite_numbers, expected)
+        self.assertEqual(
+            sorted(self.factory.composite_numbers),
+            list(self.factory.iter_composite_numbers()),
+        )
+
+    def test_is_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.factory.composite_numbers = set()
+        with self.assertRaises(AttributeError):
+            self.factory.composite_numbers.add(7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from src.core.exercise import Exercise
+from src.models.question import DifficultyLevel, OperatorType
+from src.strategies.scoring_strategy import (
+    HAS_NUMPY,
+    ScoreAccumulator,
+    ScoringStrategy,
+)
+
+
+class CorrectCountStrategy(ScoringStrategy):
+    """只实现calculate_score的自定义策略：每答对一题得一分"""
+
+    def calculate_score(self, answers, difficulty=None):
+        return float(sum(answer.is_correct for answer in answers))
+
+
+class PenaltyStrategy(ScoringStrategy):
+    """只按汇总数据计分的自定义策略：每答错一题扣十分"""
+
+    supports_totals = True
+
+    def calculate_score(self, answers, difficulty=None):
+        return self.score(ScoreAccumulator.from_answers(answers), difficulty)
+
+    def calculate_score_from_totals(
+        self, answered_count, correct_count, total_time, difficulty=None
+    ):
+        return float(100 - 10 * (answered_count - correct_count))
+
+
+def make_exercise():
+    exercise = Exercise(DifficultyLevel.EASY, (1, 20), [OperatorType.ADDITION])
+    exercise.set_scoring_strategy(CorrectCountStrategy())
+    return exercise
+
+
+class CustomStrategyTest(unittest.TestCase):
+    def test_current_score_uses_the_answer_log(self):
+        exercise = make_exercise()
+        exercise.generate_questions(4)
+        for i, question in enumerate(exercise.questions):
+            exercise.submit_answer(i, question.answer + i % 2, 1)
+        self.assertEqual(exercise.current_score, 2.0)
+
+    def test_stream_requires_totals(self):
+        exercise = make_exercise()
+        with self.assertRaises(ValueError):
+            exercise.start_stream()
+
+
+@unittest.skipUnless(HAS_NUMPY, "按列的批量计分需要NumPy")
+class CohortDefaultTest(unittest.TestCase):
+    def test_default_loops_the_totals_path(self):
+        ids, scores = PenaltyStrategy().calculate_cohort_scores(
+            ["b", "a", "b", "a", "a"],
+            [True, False, False, False, True],
+            [1, 2, 3, 4, 5],
+        )
+        self.assertEqual(ids.tolist(), ["a", "b"])
+        self.assertEqual(scores.tolist(), [80.0, 90.0])
+
+    def test_strategy_without_totals_is_rejected(self):
+        with self.assertRaises(TypeError):
+            CorrectCountStrategy().calculate_cohort_scores([0], [True], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import unittest
+
+from src.core.session_manager import SessionManager
+from src.models.question import DifficultyLevel, OperatorType
+
+CONFIG = (DifficultyLevel.EASY, (1, 20), [OperatorType.ADDITION])
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.statuses = []
+
+    def on_exercise_state_changed(self, status):
+        self.statuses.append(status)
+
+
+class SessionManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.manager = SessionManager(idle_timeout=None)
+        self.first = self.manager.create_session(*CONFIG, 5)
+        self.second = self.manager.create_session(*CONFIG, 5)
+
+    def test_session_observer_only_sees_its_session(self):
+        observer = RecordingObserver()
+        self.manager.get_session(self.first).add_observer(observer)
+        self.manager.get_session(self.second).generate_questions(1)
+        self.assertEqual(observer.statuses, [])
+        self.assertEqual(self.manager.observers, [])
+
+    def test_manager_observer_sees_every_session(self):
+        observer = RecordingObserver()
+        self.manager.add_observer(observer)
+        third = self.manager.create_session(*CONFIG, 5)
+        for session_id in (self.first, self.second, third):
+            self.manager.get_session(session_id).generate_questions(1)
+        self.assertEqual(len(observer.statuses), 3)
+
+    def test_later_generation_takes_the_shared_lock(self):
+        exercise = self.manager.get_session(self.first)
+        other = self.manager.get_session(self.second)
+        generator = exercise.question_generator
+        self.assertIs(generator, other.question_generator)
+
+        with generator.lock:
+            worker = threading.Thread(target=exercise.generate_questions, args=(3,))
+            worker.start()
+            worker.join(0.2)
+            self.assertTrue(worker.is_alive())
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(len(exercise.questions), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()